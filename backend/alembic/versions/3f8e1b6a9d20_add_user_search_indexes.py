@@ -0,0 +1,43 @@
+"""Add user search indexes
+
+Revision ID: 3f8e1b6a9d20
+Revises: 9c41d2e7a3b5
+Create Date: 2026-10-17 14:05:12.604517
+
+"""
+from alembic import op
+
+
+# Revision identifiers, used by Alembic.
+revision = '3f8e1b6a9d20'
+down_revision = '9c41d2e7a3b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Btree indexes for role/created_at filters and sorting
+    op.create_index('ix_users_role_created_at', 'users', ['role', 'created_at'])
+    op.create_index('ix_users_created_at', 'users', ['created_at'])
+    op.create_index('ix_users_name', 'users', ['name'])
+
+    # Trigram GIN indexes for prefix and substring search (PostgreSQL only)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            'ix_users_name_trgm', 'users', ['name'],
+            postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}
+        )
+        op.create_index(
+            'ix_users_email_trgm', 'users', ['email'],
+            postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_users_email_trgm', table_name='users')
+        op.drop_index('ix_users_name_trgm', table_name='users')
+    op.drop_index('ix_users_name', table_name='users')
+    op.drop_index('ix_users_created_at', table_name='users')
+    op.drop_index('ix_users_role_created_at', table_name='users')
@@ -0,0 +1,27 @@
+"""Add token_version to User
+
+Revision ID: 9c41d2e7a3b5
+Revises: 5b0026fe4f47
+Create Date: 2026-10-17 09:12:40.118302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Revision identifiers, used by Alembic.
+revision = '9c41d2e7a3b5'
+down_revision = '5b0026fe4f47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'users',
+        sa.Column('token_version', sa.Integer(), nullable=False, server_default='0')
+    )
+
+
+def downgrade():
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,94 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, status
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from app.deps import require_admin
+from app.schemas.auth import Principal
+from app.core.context import get_request_metadata
+from app.core.logging import logger
+from app.db.instrumentation import mongo_command_stats, sql_query_stats
+from app.utils.profiling import list_reports, read_folded
+
+
+router = APIRouter()
+
+
+@router.get(
+    "/profiles",
+    summary="List Request Profiles",
+    description="Stored request profiles, newest first, with their per-phase timings (admin only). "
+                "Profiling must be enabled with `PROFILING_ENABLED`.",
+    responses={
+        200: {"description": "Profile metadata."},
+        403: {"description": "Admin privileges required."}
+    }
+)
+async def list_profiles(current_user: Principal = Depends(require_admin)):
+    return await run_in_threadpool(list_reports)
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    response_class=PlainTextResponse,
+    summary="Get Request Profile",
+    description="Folded stacks of one profiled request, ready for flamegraph.pl or speedscope (admin only).",
+    responses={
+        200: {"description": "Folded stacks, one `frames count` line per distinct stack."},
+        403: {"description": "Admin privileges required."},
+        404: {"description": "Profile not found."}
+    }
+)
+async def read_profile(
+    profile_id: str = Path(..., pattern="^[0-9a-f]{32}$"),
+    current_user: Principal = Depends(require_admin),
+    request: Request = None
+):
+    client_ip, request_id = get_request_metadata(request)
+
+    folded = await run_in_threadpool(read_folded, profile_id)
+    if folded is None:
+        logger.warning("[%s] Profile %s requested from %s was not found.", request_id, profile_id, client_ip)
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return PlainTextResponse(folded)
+
+
+@router.get(
+    "/queries",
+    summary="Top Queries",
+    description="Statistics of the SQL statements and Mongo commands this worker ran, grouped by fingerprint "
+                "and ordered by the chosen column, with the latest captured plan for slow SELECTs (admin only).",
+    responses={
+        200: {"description": "Top fingerprints per database."},
+        403: {"description": "Admin privileges required."}
+    }
+)
+async def top_queries(
+    limit: int = Query(20, ge=1, le=500),
+    order_by: Literal["total_ms", "p95_ms", "p99_ms", "max_ms", "mean_ms", "count", "errors"] = Query("total_ms"),
+    current_user: Principal = Depends(require_admin),
+):
+    return {
+        "sql": sql_query_stats.top(limit, order_by),
+        "mongo": mongo_command_stats.top(limit, order_by),
+    }
+
+
+@router.delete(
+    "/queries",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Reset Query Statistics",
+    description="Start this worker's query statistics afresh, e.g. after a deploy (admin only).",
+    responses={
+        204: {"description": "Statistics cleared."},
+        403: {"description": "Admin privileges required."}
+    }
+)
+async def reset_queries(
+    current_user: Principal = Depends(require_admin),
+    request: Request = None
+):
+    client_ip, request_id = get_request_metadata(request)
+
+    sql_query_stats.reset()
+    mongo_command_stats.reset()
+    logger.info("[%s] Query statistics reset by user ID %s from %s.", request_id, current_user.id, client_ip)
@@ -1,22 +1,16 @@
-import uuid
 from fastapi import APIRouter, HTTPException, Depends, status, Request
-from app.repositories.base import BaseRepository
-from app.deps import get_user_repository, get_current_user
-from app.utils.security import verify_password
+from app.repositories.base import BaseRepository, run_repository_method
+from app.deps import get_user_repository, get_current_principal, verify_principal
+from app.utils.security import verify_password_async
 from app.utils.jwt import create_access_token
 from app.core.config import settings
-from app.schemas.auth import SignInRequest, TokenResponse
-from app.db.models import User
+from app.schemas.auth import SignInRequest, TokenResponse, Principal
+from app.core.context import get_request_metadata
 from app.core.logging import logger
+from app.middleware.compression import no_compression
 from datetime import timedelta
 
 
-def get_request_metadata(request: Request):
-    client_ip = request.client.host
-    request_id = str(uuid.uuid4())
-    return client_ip, request_id
-
-
 router = APIRouter()
 
 
@@ -32,20 +26,23 @@ router = APIRouter()
         422: {"description": "Validation error."}
     }
 )
-def signin(
+@no_compression  # Responses carrying tokens are never compressed (BREACH)
+async def signin(
     credentials: SignInRequest, 
     user_repo: BaseRepository = Depends(get_user_repository),
     request: Request = None
 ):
     client_ip, request_id = get_request_metadata(request)
 
-    db_user = user_repo.get_by_email(credentials.email.lower())
-    if not db_user or not verify_password(credentials.password, db_user.hashed_password):
+    db_user = await run_repository_method(user_repo.get_by_email, credentials.email.lower())
+    if not db_user or not await verify_password_async(credentials.password, db_user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     expires_in = timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)  # Define token expiry duration
-    access_token = create_access_token({"user_id": db_user.id, "role": db_user.role}, expires_in)
-    logger.info(f"[{request_id}] User {client_ip} signed in: {credentials.email.lower()}")
+    access_token = create_access_token(
+        {"user_id": db_user.id, "role": db_user.role, "ver": db_user.token_version}, expires_in
+    )
+    logger.info("[%s] User %s signed in: %s", request_id, client_ip, credentials.email.lower())
     return {"access_token": access_token}
 
 
@@ -59,11 +56,14 @@ def signin(
         401: {"description": "Invalid or expired token."}
     }
 )
-def signout(
+async def signout(
+    current_user: Principal = Depends(get_current_principal),
     user_repo: BaseRepository = Depends(get_user_repository),
-    current_user: User = Depends(get_current_user),
     request: Request = None
 ):
     client_ip, request_id = get_request_metadata(request)
-    logger.info(f"[{request_id}] User from {client_ip} with ID {current_user.id} signed out.")
+
+    # The revocation registry is per process; a user deleted elsewhere is only known to the database
+    current_user = await verify_principal(current_user, user_repo)
+    logger.info("[%s] User from %s with ID %s signed out.", request_id, client_ip, current_user.id)
     return {"detail": "Successfully signed out."}
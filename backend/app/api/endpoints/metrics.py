@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Response
+from app.core.metrics import render_metrics
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """
+    Prometheus scrape endpoint. Keep it reachable from the scraper only.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
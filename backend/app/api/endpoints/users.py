@@ -1,18 +1,34 @@
-import uuid
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Request
-from typing import List
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Request, Response
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Any, List, Literal, Optional, Tuple
+from pydantic import ValidationError
+from bson import ObjectId
 
-from app.repositories.base import BaseRepository
-from app.deps import get_user_repository, get_current_user
-from app.schemas.user import UserCreate, UserOut, UserUpdate
-from app.db.models import User
-from app.core.logging import logger
-
-
-def get_request_metadata(request: Request):
-    client_ip = request.client.host
-    request_id = str(uuid.uuid4())
-    return client_ip, request_id
+from app.repositories.base import BaseRepository, run_repository_method
+from app.deps import get_user_repository, get_current_principal, require_admin, verify_principal
+from app.schemas.auth import Principal
+from app.schemas.user import UserCreate, UserFilter, UserOut, UserUpdate, UserImportRow, UserImportResult
+from app.core.config import settings
+from app.db.routing import mark_recent_write
+from app.core.context import get_request_metadata
+from app.core.logging import SAMPLED, logger
+from app.utils.security import hash_password_async
+from app.utils.jwt import revoke_user_tokens
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.http_cache import (
+    has_conditional_headers,
+    is_not_modified,
+    last_modified,
+    make_etag,
+    not_modified,
+    validator_headers,
+)
+from app.utils.export import ENCODERS, encode_rows
+from app.utils.counts import total_users, invalidate_user_count
+from app.utils.serialization import json_response, render_user, render_users
+from app.utils.importer import ImportDecodeError, ImportRow, iter_import_batches
 
 
 router = APIRouter()
@@ -30,110 +46,437 @@ router = APIRouter()
         422: {"description": "Validation error."}
     }
 )
-def create_user(
+async def create_user(
     user: UserCreate, 
     user_repo: BaseRepository = Depends(get_user_repository),
-    request: Request = None
+    request: Request = None,
+    response: Response = None
 ):
     client_ip, request_id = get_request_metadata(request)
 
-    existing_user = user_repo.get_by_email(user.email.lower())
-    if existing_user:
+    # Index-only pre-check so a taken email never pays for bcrypt
+    if await run_repository_method(user_repo.get_existing_emails, [user.email.strip().lower()]):
         logger.warning(
-            f"[{request_id}] Duplicate email registration attempt from {client_ip}: {user.email}"
+            "[%s] Duplicate email registration attempt from %s: %s",
+            request_id, client_ip, user.email,
         )
         raise HTTPException(status_code=400, detail="Email already registered.")
     
-    new_user = user_repo.create(user.dict())
+    user_data = user.dict()
+    user_data["hashed_password"] = await hash_password_async(user_data.pop("password"))
+    # The insert itself settles races between concurrent signups for the same email
+    new_user = await run_repository_method(user_repo.create, user_data)
+    if new_user is None:
+        logger.warning(
+            "[%s] Duplicate email registration attempt from %s: %s",
+            request_id, client_ip, user.email,
+        )
+        raise HTTPException(status_code=400, detail="Email already registered.")
+    mark_recent_write(request, new_user.id, response)  # The cookie covers the sign-in that follows
+    invalidate_user_count()
     logger.info(
-        f"[{request_id}] User created from {client_ip} with ID {new_user.id} and email {new_user.email}"
+        "[%s] User created from %s with ID %s and email %s",
+        request_id, client_ip, new_user.id, new_user.email,
     )
     return new_user
 
 
+async def _import_batch(
+    batch: List[ImportRow], seen_emails: set, user_repo: BaseRepository
+) -> List[UserImportRow]:
+    """
+    Validate, deduplicate, hash and insert one batch of import rows.
+    """
+    results = {}
+    candidates = []
+    for line, data, error in batch:
+        if error is None:
+            try:
+                candidate = UserCreate(**data)
+            except ValidationError as e:
+                error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        if error is not None:
+            results[line] = UserImportRow(line=line, status="invalid", error=error)
+            continue
+        email = candidate.email.strip().lower()
+        if email in seen_emails:
+            results[line] = UserImportRow(line=line, status="duplicate", email=email)
+            continue
+        seen_emails.add(email)
+        candidates.append((line, email, candidate))
+
+    # One set-based lookup per batch rather than one per row
+    existing = await run_repository_method(user_repo.get_existing_emails, [email for _, email, _ in candidates])
+    to_create = [(line, email, user) for line, email, user in candidates if email not in existing]
+    for line, email, _ in candidates:
+        if email in existing:
+            results[line] = UserImportRow(line=line, status="duplicate", email=email)
+
+    # The hashing limiter bounds how many of these run at once
+    hashes = await asyncio.gather(*(hash_password_async(user.password) for _, _, user in to_create))
+    created = await run_repository_method(user_repo.create_many, [
+        {"name": user.name, "email": email, "role": user.role, "hashed_password": hashed}
+        for (_, email, user), hashed in zip(to_create, hashes)
+    ])
+    for line, email, _ in to_create:
+        if email in created:
+            results[line] = UserImportRow(line=line, status="created", email=email, id=created[email])
+        else:
+            # Registered concurrently between the lookup and the insert
+            results[line] = UserImportRow(line=line, status="duplicate", email=email)
+
+    return [results[line] for line, _, _ in batch]
+
+
+@router.post(
+    "/import",
+    response_model=UserImportResult,
+    summary="Import Users",
+    description=(
+        "Create many users from a streamed NDJSON or CSV (with header) body with the same fields as "
+        "Create User. Rows are processed in batches: one duplicate lookup and one multi-row insert per "
+        "batch, with passwords hashed in parallel. Returns the outcome of every row. Admins only."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+    responses={
+        200: {"description": "Import processed; see per-row results."},
+        400: {"description": "Body is not valid UTF-8; rows in earlier batches stay imported."},
+        403: {"description": "Admin privileges required."}
+    }
+)
+async def import_users(
+    request: Request,
+    response: Response,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    user_repo: BaseRepository = Depends(get_user_repository),
+    current_user: Principal = Depends(require_admin),
+):
+    client_ip, request_id = get_request_metadata(request)
+
+    results: List[UserImportRow] = []
+    seen_emails = set()
+    try:
+        async for batch in iter_import_batches(request.stream(), format, settings.IMPORT_BATCH_SIZE):
+            results.extend(await _import_batch(batch, seen_emails, user_repo))
+    except ImportDecodeError as e:
+        invalidate_user_count()  # Earlier batches may have created users
+        logger.warning(
+            "[%s] User import (%s) by user ID %s from %s stopped at line %s: invalid UTF-8.",
+            request_id, format, current_user.id, client_ip, e.line,
+        )
+        raise HTTPException(status_code=400, detail=str(e))
+    mark_recent_write(request, current_user.id, response)
+    invalidate_user_count()
+
+    summary = UserImportResult(
+        created=sum(row.status == "created" for row in results),
+        duplicates=sum(row.status == "duplicate" for row in results),
+        invalid=sum(row.status == "invalid" for row in results),
+        results=results,
+    )
+    logger.info(
+        "[%s] User import (%s) by user ID %s from %s: %s created, %s duplicates, %s invalid.",
+        request_id, format, current_user.id, client_ip, summary.created, summary.duplicates, summary.invalid,
+    )
+    return summary
+
+
+async def total_count_headers(user_repo: BaseRepository, filters: Optional[UserFilter] = None) -> dict:
+    """
+    `X-Total-Count` (plus `X-Total-Count-Estimated` when approximate) from the cached count.
+    """
+    total, exact = await total_users(user_repo, filters)
+    headers = {"X-Total-Count": str(total)}
+    if not exact:
+        headers["X-Total-Count-Estimated"] = "true"
+    return headers
+
+
+def get_user_filters(
+    role: Optional[str] = Query(None, description="Only users with this role."),
+    created_after: Optional[datetime] = Query(None, description="Created at or after this time."),
+    created_before: Optional[datetime] = Query(None, description="Created before this time."),
+    name: Optional[str] = Query(None, min_length=1, max_length=255, description="Case-insensitive name match."),
+    email: Optional[str] = Query(None, min_length=1, max_length=255, description="Email match."),
+    match: Literal["prefix", "contains"] = Query("prefix", description="How `name` and `email` are matched."),
+    sort: Literal["id", "-id", "created_at", "-created_at", "name", "-name", "email", "-email"] = Query(
+        "id", description="Sort field, `-` for descending. Ties are broken by ID."
+    ),
+) -> UserFilter:
+    """
+    Dependency collecting the list filters from query parameters.
+    """
+    return UserFilter(
+        role=role, created_after=created_after, created_before=created_before,
+        name=name, email=email, match=match, sort=sort,
+    )
+
+
+def next_cursor(filters: UserFilter, id, sort_key) -> str:
+    """
+    Cursor for the page after a row: its sort key and id (plain id for the default order).
+    """
+    if filters.sort == "id":
+        return encode_cursor({"id": id})
+    if isinstance(sort_key, datetime):
+        sort_key = sort_key.isoformat()
+    return encode_cursor({"sort": filters.sort, "key": sort_key, "id": id})
+
+
+def valid_cursor_id(id) -> bool:
+    """
+    Whether a decoded cursor id has the backend's ID type: an integer, or an ObjectId string on MongoDB.
+    """
+    if settings.DB_TYPE == "nosql":
+        return isinstance(id, str) and ObjectId.is_valid(id)
+    return isinstance(id, int) and not isinstance(id, bool)
+
+
+def cursor_position(cursor: str, filters: UserFilter) -> Tuple[Any, Any]:
+    """
+    Decode a cursor into `(after_id, after_key)`. Raises ValueError if it is malformed,
+    holds values of the wrong type or was issued for a different sort order.
+    """
+    values = decode_cursor(cursor)
+    if "id" not in values or values.get("sort", "id") != filters.sort:
+        raise ValueError("Invalid cursor")
+    if not valid_cursor_id(values["id"]):
+        raise ValueError("Invalid cursor")
+    key = values.get("key")
+    if filters.sort_field == "id":
+        return values["id"], None
+    if not isinstance(key, str):
+        raise ValueError("Invalid cursor")
+    if filters.sort_field == "created_at":
+        key = datetime.fromisoformat(key)  # ValueError unless ISO 8601
+    return values["id"], key
+
+
 @router.get(
     "/",
     response_model=List[UserOut],
     summary="List Users",
-    description="Retrieve a paginated list of all registered users.",
+    description=(
+        "Retrieve a paginated list of registered users, optionally filtered by role, "
+        "`created_at` range and name/email prefix or substring, and sorted by `sort` (ID by default). "
+        "Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next page; "
+        "cursor pages cost the same at any depth, unlike `skip`. "
+        "Send the page's `ETag` back in `If-None-Match` to get 304 when nothing on it changed."
+    ),
     responses={
-        200: {"description": "List of users returned successfully."},
+        200: {
+            "description": "List of users returned successfully.",
+            "headers": {
+                "X-Next-Cursor": {"description": "Cursor for the next page, absent on the last page."},
+                "ETag": {"description": "Version of this page, derived from its rows' `(id, updated_at)`."},
+                "X-Total-Count": {"description": "Total number of users; an estimate on large tables."},
+                "X-Total-Count-Estimated": {"description": "`true` when `X-Total-Count` is an estimate."},
+            },
+        },
+        304: {"description": "Page unchanged since the given `If-None-Match`/`If-Modified-Since`."},
+        400: {"description": "Invalid cursor."},
         422: {"description": "Validation error on pagination parameters."}
     }
 )
-def read_users(
+async def read_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=10000), 
+    cursor: Optional[str] = Query(None, description="Opaque cursor from `X-Next-Cursor`; overrides `skip`."),
+    filters: UserFilter = Depends(get_user_filters),
     user_repo: BaseRepository = Depends(get_user_repository),
     request: Request = None
 ):
     client_ip, request_id = get_request_metadata(request)
 
-    users = user_repo.get_all(skip=skip, limit=limit)
-    logger.info(f"[{request_id}] {len(users)} users fetched by {client_ip}.")
-    return users
+    after_id = after_key = None
+    if cursor is not None:
+        try:
+            after_id, after_key = cursor_position(cursor, filters)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+    page = {"skip": skip, "limit": limit, "after_id": after_id, "filters": filters, "after_key": after_key}
+
+    if has_conditional_headers(request):
+        # Compare against (id, updated_at) only; full rows are loaded just when the page changed
+        versions = await run_repository_method(user_repo.get_page_versions, **page)
+        etag, modified = make_etag(versions), last_modified(versions)
+        if is_not_modified(request, etag, modified):
+            logger.info("[%s] User list not modified for %s.", request_id, client_ip, extra=SAMPLED)
+            not_modified_response = not_modified(etag, modified)
+            not_modified_response.headers.update(await total_count_headers(user_repo, filters))
+            if len(versions) == limit:
+                id, _, sort_key = versions[-1]
+                not_modified_response.headers["X-Next-Cursor"] = next_cursor(filters, id, sort_key)
+            return not_modified_response
+
+    users = await run_repository_method(user_repo.get_all, **page)
+    versions = [(user.id, user.updated_at) for user in users]
+    headers = validator_headers(make_etag(versions), last_modified(versions))
+    headers.update(await total_count_headers(user_repo, filters))
+    if len(users) == limit:
+        headers["X-Next-Cursor"] = next_cursor(filters, users[-1].id, getattr(users[-1], filters.sort_field))
+    logger.info("[%s] %s users fetched by %s.", request_id, len(users), client_ip, extra=SAMPLED)
+    # Rendered by a precompiled adapter rather than the generic response_model path
+    return json_response(render_users(users), headers=headers)
+
+
+@router.get(
+    "/export",
+    summary="Export Users",
+    description=(
+        "Stream every user as NDJSON or CSV. Rows are read through a server-side cursor "
+        "and written as they arrive, so memory use does not grow with the table. Admins only."
+    ),
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Users streamed successfully.",
+            "content": {"application/x-ndjson": {}, "text/csv": {}},
+        },
+        403: {"description": "Admin privileges required."}
+    }
+)
+async def export_users(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    user_repo: BaseRepository = Depends(get_user_repository),
+    current_user: Principal = Depends(require_admin),
+    request: Request = None
+):
+    client_ip, request_id = get_request_metadata(request)
+
+    encoder = ENCODERS[format]()
+    logger.info(
+        "[%s] User export (%s) started by user ID %s from %s.",
+        request_id, format, current_user.id, client_ip,
+    )
+    return StreamingResponse(
+        encode_rows(user_repo.iter_all(), encoder),
+        media_type=encoder.media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{encoder.extension}"'},
+    )
 
 
 @router.get(
     "/{user_id}",
     response_model=UserOut,
     summary="Get User",
-    description="Retrieve the details of a specific user by ID.",
+    description=(
+        "Retrieve the details of a specific user by ID. Supports `If-None-Match` and "
+        "`If-Modified-Since`, answered from `updated_at` alone."
+    ),
     responses={
         200: {"description": "User details returned successfully."},
+        304: {"description": "User unchanged since the given validators."},
         404: {"description": "User not found."}
     }
 )
-def read_user(
+async def read_user(
     user_id: int = Path(..., gt=0),
     user_repo: BaseRepository = Depends(get_user_repository),
-    current_user_id: int = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     request: Request = None
 ):
     client_ip, request_id = get_request_metadata(request)
 
-    db_user = user_repo.get_by_id(user_id)
+    if has_conditional_headers(request):
+        updated_at = await run_repository_method(user_repo.get_version, user_id)
+        if updated_at is not None:
+            versions = [(user_id, updated_at)]
+            etag, modified = make_etag(versions), last_modified(versions)
+            if is_not_modified(request, etag, modified):
+                logger.info(
+                    "[%s] User ID %s not modified for %s.",
+                    request_id, user_id, client_ip, extra=SAMPLED,
+                )
+                return not_modified(etag, modified)
+
+    db_user = await run_repository_method(user_repo.get_by_id, user_id)
     if not db_user:
-        logger.warning(f"[{request_id}] User ID {user_id} not found. Request from {client_ip}.")
+        logger.warning("[%s] User ID %s not found. Request from %s.", request_id, user_id, client_ip)
         raise HTTPException(status_code=404, detail="User not found.")
-    
-    logger.info(f"[{request_id}] User ID {user_id} fetched by {client_ip}.")
-    return db_user
+
+    versions = [(db_user.id, db_user.updated_at)]
+    logger.info("[%s] User ID %s fetched by %s.", request_id, user_id, client_ip, extra=SAMPLED)
+    return json_response(
+        render_user(db_user), headers=validator_headers(make_etag(versions), last_modified(versions))
+    )
 
 
 @router.put(
     "/{user_id}",
     response_model=UserOut,
     summary="Update User",
-    description="Update a user's details. Only the user or an admin can perform this action.",
+    description=(
+        "Update a user's details. Only the user or an admin can perform this action; "
+        "only admins can change roles."
+    ),
     responses={
         200: {"description": "User updated successfully."},
-        403: {"description": "Unauthorized to update this user."},
+        401: {"description": "Invalid, expired or revoked token."},
+        403: {"description": "Unauthorized to update this user or to change roles."},
         404: {"description": "User not found."}
     }
 )
-def update_user(
+async def update_user(
     user_id: int,
     updates: UserUpdate,
     user_repo: BaseRepository = Depends(get_user_repository),
-    current_user: User = Depends(get_current_user),
-    request: Request = None
+    current_user: Principal = Depends(get_current_principal),
+    request: Request = None,
+    response: Response = None
 ):
     client_ip, request_id = get_request_metadata(request)
 
-    db_user = user_repo.get_by_id(user_id)
-    if not db_user:
-        logger.warning(f"[{request_id}] Attempted update on non-existent user ID {user_id} from {client_ip}.")
-        raise HTTPException(status_code=404, detail="User not found.")
-    
+    if current_user.role == "admin" and (user_id != current_user.id or updates.role is not None):
+        # Admin rights come from the stored row, so a demoted or deleted admin's token stops here
+        current_user = await verify_principal(current_user, user_repo)
     if user_id != current_user.id and current_user.role != "admin":
+        # Only rejected requests pay for a lookup, which keeps 404 ahead of 403
+        if not await run_repository_method(user_repo.get_by_id, user_id):
+            logger.warning(
+                "[%s] Attempted update on non-existent user ID %s from %s.",
+                request_id, user_id, client_ip,
+            )
+            raise HTTPException(status_code=404, detail="User not found.")
         logger.warning(
-            f"[{request_id}] Unauthorized update attempt on user ID {user_id} by user ID {current_user.id} from {client_ip}."
+            "[%s] Unauthorized update attempt on user ID %s by user ID %s from %s.",
+            request_id, user_id, current_user.id, client_ip,
         )
         raise HTTPException(status_code=403, detail="Unauthorized to update this user.")
+    if updates.role is not None and current_user.role != "admin":
+        logger.warning(
+            "[%s] Role change on user ID %s refused for non-admin user ID %s from %s.",
+            request_id, user_id, current_user.id, client_ip,
+        )
+        raise HTTPException(status_code=403, detail="Only admins can change roles.")
 
-    updated_user = user_repo.update(user_id, updates.dict(exclude_unset=True))
-    logger.info(f"[{request_id}] User ID {user_id} updated successfully by {client_ip}.")
+    update_data = updates.dict(exclude_unset=True)
+    password = update_data.pop("password", None)
+    if password:
+        update_data["hashed_password"] = await hash_password_async(password)
+
+    # Single UPDATE ... RETURNING; no row back means the user does not exist
+    updated_user = await run_repository_method(user_repo.update, user_id, update_data)
+    if not updated_user:
+        logger.warning(
+            "[%s] Attempted update on non-existent user ID %s from %s.",
+            request_id, user_id, client_ip,
+        )
+        raise HTTPException(status_code=404, detail="User not found.")
+    if "role" in update_data:
+        # Tokens issued before a role change carry a stale role claim
+        revoke_user_tokens(user_id, updated_user.token_version)
+    mark_recent_write(request, current_user.id, response)
+    invalidate_user_count()  # Filtered totals depend on role, name and email
+    logger.info("[%s] User ID %s updated successfully by %s.", request_id, user_id, client_ip)
     return updated_user
 
 
@@ -144,28 +487,45 @@ def update_user(
     description="Delete a user account. Only the user or an admin can delete an account.",
     responses={
         204: {"description": "User deleted successfully."},
+        401: {"description": "Invalid, expired or revoked token."},
         403: {"description": "Unauthorized to delete this user."},
         404: {"description": "User not found."}
     }
 )
-def delete_user(
+async def delete_user(
     user_id: int,
     user_repo: BaseRepository = Depends(get_user_repository),
-    current_user: User = Depends(get_current_user),
-    request: Request = None
+    current_user: Principal = Depends(get_current_principal),
+    request: Request = None,
+    response: Response = None
 ):
     client_ip, request_id = get_request_metadata(request)
 
-    db_user = user_repo.get_by_id(user_id)
-    if not db_user:
-        logger.warning(f"[{request_id}] Attempted deletion of non-existent user ID {user_id} from {client_ip}.")
-        raise HTTPException(status_code=404, detail="User not found.")
-
+    if current_user.role == "admin" and user_id != current_user.id:
+        # Admin rights come from the stored row, so a demoted or deleted admin's token stops here
+        current_user = await verify_principal(current_user, user_repo)
     if user_id != current_user.id and current_user.role != "admin":
+        # Only rejected requests pay for a lookup, which keeps 404 ahead of 403
+        if not await run_repository_method(user_repo.get_by_id, user_id):
+            logger.warning(
+                "[%s] Attempted deletion of non-existent user ID %s from %s.",
+                request_id, user_id, client_ip,
+            )
+            raise HTTPException(status_code=404, detail="User not found.")
         logger.warning(
-            f"[{request_id}] Unauthorized deletion attempt on user ID {user_id} by user ID {current_user.id} from {client_ip}."
+            "[%s] Unauthorized deletion attempt on user ID %s by user ID %s from %s.",
+            request_id, user_id, current_user.id, client_ip,
         )
         raise HTTPException(status_code=403, detail="Unauthorized to delete this user.")
 
-    user_repo.delete(user_id)
-    logger.info(f"[{request_id}] User ID {user_id} deleted successfully by {client_ip}.")
+    # Single DELETE ... RETURNING; no row back means the user does not exist
+    if not await run_repository_method(user_repo.delete, user_id):
+        logger.warning(
+            "[%s] Attempted deletion of non-existent user ID %s from %s.",
+            request_id, user_id, client_ip,
+        )
+        raise HTTPException(status_code=404, detail="User not found.")
+    revoke_user_tokens(user_id)
+    mark_recent_write(request, current_user.id, response)
+    invalidate_user_count()
+    logger.info("[%s] User ID %s deleted successfully by %s.", request_id, user_id, client_ip)
@@ -0,0 +1,75 @@
+"""
+Per-request context: the request ID and time spent in each phase of the request.
+
+Both live in contextvars set by `RequestContextMiddleware`, so they follow the
+request through awaits and into threadpool calls without being passed around.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+from fastapi import Request
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+class PhaseTimings:
+    """
+    Accumulated seconds per phase ("auth", "db", "hash", "serialize") for one request.
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.active: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def enter(self, phase: str) -> bool:
+        """
+        Mark `phase` as running. Returns False if it already was (a nested call).
+        """
+        with self._lock:
+            depth = self.active.get(phase, 0)
+            self.active[phase] = depth + 1
+            return depth == 0
+
+    def exit(self, phase: str, elapsed: Optional[float]) -> None:
+        with self._lock:
+            self.active[phase] -= 1
+            if elapsed is not None:
+                self.seconds[phase] = self.seconds.get(phase, 0.0) + elapsed
+
+
+phase_timings_var: ContextVar[Optional[PhaseTimings]] = ContextVar("phase_timings", default=None)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """
+    Add the time spent in the block to `phase` for the current request. Nested
+    blocks of the same phase count once; outside a request this is a no-op.
+    """
+    timings = phase_timings_var.get()
+    if timings is None:
+        yield
+        return
+    outermost = timings.enter(phase)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.exit(phase, time.perf_counter() - started if outermost else None)
+
+
+def get_request_id() -> str:
+    return request_id_var.get()
+
+
+def get_request_metadata(request: Request) -> Tuple[str, str]:
+    """
+    Client address and the current request ID, for log lines.
+    """
+    client_ip = request.client.host if request.client else "-"
+    return client_ip, get_request_id()
@@ -1,19 +1,185 @@
+"""
+Application logging.
+
+Request handlers only put records on a bounded in-memory queue; a background
+`QueueListener` thread formats them (as JSON by default) and writes them to the
+terminal and a rotating, gzip-compressed log file. When the queue is full (for
+example, the disk is slow) records are dropped instead of blocking the request;
+drops, sampled-out records and the queue depth are exported as Prometheus
+metrics. High-volume lines logged with `extra=SAMPLED` are kept only at the
+configured per-level rate. Every record carries the current request ID.
+
+Log with %-style arguments (`logger.info("[%s] ...", request_id)`) so messages
+are formatted in the listener thread, and only for records that are kept.
+"""
+
+import atexit
+import gzip
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import shutil
+from datetime import datetime, timezone
+
+from app.core.config import settings
+from app.core.context import request_id_var
+from app.core.metrics import log_queue_depth, log_records_dropped, log_records_sampled_out
+
+SAMPLED = {"sampled": True}  # Pass as `extra` on high-volume lines
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per line, including any `extra` fields passed to the logger.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key != "sampled":
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep records marked `sampled` with the probability configured for their level.
+    """
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        rate = self.rates.get(record.levelname, 1.0)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        log_records_sampled_out.inc()
+        return False
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Stamp each record with the current request's ID while still in the request's context.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueue records without formatting them, and drop them when the queue is full.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener lives in this process, so the record can travel unformatted
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc()
+            return
+        log_queue_depth.set(self.queue.qsize())
+
+
+class DepthTrackingQueueListener(logging.handlers.QueueListener):
+    """
+    A `QueueListener` that keeps the queue depth gauge current as it drains the queue.
+    """
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        record = super().dequeue(block)
+        log_queue_depth.set(self.queue.qsize())
+        return record
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def _file_handler() -> logging.Handler:
+    """
+    Rotate on a schedule when `LOG_ROTATE_WHEN` is set (e.g. "midnight"), otherwise by size.
+    Rotated files are gzip-compressed, on the listener thread.
+    """
+    path = os.path.join(settings.LOG_DIR, "backend.log")
+    if settings.LOG_ROTATE_WHEN:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            path, when=settings.LOG_ROTATE_WHEN, backupCount=settings.LOG_BACKUP_COUNT, utc=True
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=settings.LOG_MAX_BYTES, backupCount=settings.LOG_BACKUP_COUNT
+        )
+    handler.namer = lambda name: name + ".gz"
+    handler.rotator = _gzip_rotator
+    return handler
+
+
+def _parse_rates(spec: str) -> dict:
+    """
+    Parse "INFO=0.1,DEBUG=0.01" into {"INFO": 0.1, "DEBUG": 0.01}.
+    """
+    rates = {}
+    for part in spec.split(","):
+        level, _, rate = part.partition("=")
+        if level.strip() and rate.strip():
+            rates[level.strip().upper()] = float(rate)
+    return rates
+
 
 # Ensure logs directory exists
-LOG_DIR = "logs"
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR)
-
-# Basic config for logging to terminal and file
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(os.path.join(LOG_DIR, "backend.log")),  # Logs to file
-        logging.StreamHandler()  # Logs to terminal
-    ]
-)
+os.makedirs(settings.LOG_DIR, exist_ok=True)
+
+formatter = JSONFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+output_handlers = [_file_handler(), logging.StreamHandler()]  # Logs to file and terminal
+for output_handler in output_handlers:
+    output_handler.setFormatter(formatter)
+
+log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+queue_handler = DroppingQueueHandler(log_queue)
+sampling_filter = SamplingFilter(_parse_rates(settings.LOG_SAMPLE_RATES))
+queue_handler.addFilter(sampling_filter)
+queue_handler.addFilter(RequestIdFilter())
+listener = DepthTrackingQueueListener(log_queue, *output_handlers, respect_handler_level=True)
+
+logging.basicConfig(level=settings.LOG_LEVEL.upper(), handlers=[queue_handler])
+listener.start()
+
+
+def stop_logging() -> None:
+    """
+    Flush queued records and stop the listener thread. Safe to call more than once.
+    """
+    if listener._thread is not None:
+        listener.stop()
+
+
+atexit.register(stop_logging)
+
 
 logger = logging.getLogger(__name__)
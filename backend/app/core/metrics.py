@@ -0,0 +1,229 @@
+"""
+Prometheus metrics.
+
+Every metric is defined here; the hot paths hold on to label children bound
+once (at import, or the first time a route is seen) so recording a sample
+never builds a label dict or takes the metric's label lock.
+
+With several worker processes, set `PROMETHEUS_MULTIPROC_DIR` to an empty,
+writable directory before starting them: each worker then writes its samples
+there and `/metrics` aggregates all of them, whichever worker serves it.
+"""
+
+import os
+import threading
+import time
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from pymongo import monitoring
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# HTTP, labelled by route template (never the raw path) so cardinality stays bounded
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time to serve a request", ["method", "route"]
+)
+http_requests = Counter(
+    "http_requests", "Completed requests by status class", ["method", "route", "status"]
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "Requests being served", ["route"], multiprocess_mode="livesum"
+)
+STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+
+# Response compression, labelled by encoding; overall ratio = input bytes / output bytes
+compression_input_bytes = Counter(
+    "http_compression_input_bytes", "Response bytes before compression", ["encoding"]
+)
+compression_output_bytes = Counter(
+    "http_compression_output_bytes", "Response bytes after compression", ["encoding"]
+)
+compression_ratio = Histogram(
+    "http_compression_ratio",
+    "Bytes before over bytes after compression, per response",
+    ["encoding"],
+    buckets=(1.0, 1.5, 2.0, 3.0, 4.0, 6.0, 10.0, 20.0),
+)
+compression_duration = Histogram(
+    "http_compression_duration_seconds",
+    "Time spent compressing one response",
+    ["encoding"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5),
+)
+
+# SQLAlchemy connection pools, labelled by engine ("primary", "replica0", ...)
+db_pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to get a connection from the pool, including opening a new one",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+db_pool_size = Gauge("db_pool_size", "Configured pool size", ["engine"], multiprocess_mode="livesum")
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out", "Connections currently checked out", ["engine"], multiprocess_mode="livesum"
+)
+db_pool_overflow = Gauge(
+    "db_pool_overflow", "Checked-out connections beyond the pool size", ["engine"], multiprocess_mode="livesum"
+)
+
+# Motor / PyMongo connection pool
+mongo_pool_connections = Gauge("mongo_pool_connections", "Open connections", multiprocess_mode="livesum")
+mongo_pool_checked_out = Gauge(
+    "mongo_pool_checked_out", "Connections currently checked out", multiprocess_mode="livesum"
+)
+mongo_pool_checkout_wait = Histogram(
+    "mongo_pool_checkout_wait_seconds",
+    "Time to get a connection from the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+mongo_pool_checkout_failures = Counter("mongo_pool_checkout_failures", "Failed connection checkouts")
+
+# Logging queue (see app.core.logging)
+log_records_dropped = Counter("log_records_dropped", "Log records dropped because the queue was full")
+log_records_sampled_out = Counter("log_records_sampled_out", "Sampled log records not kept")
+log_queue_depth = Gauge("log_queue_depth", "Log records waiting for the writer thread", multiprocess_mode="livesum")
+
+# bcrypt on the dedicated hashing pool
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds",
+    "Time spent in one bcrypt hash or verify",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0),
+)
+password_hash_pending = Gauge(
+    "password_hash_pending", "bcrypt operations queued or running", multiprocess_mode="livesum"
+)
+
+# JWT verification
+jwt_verify_duration = Histogram(
+    "jwt_verify_duration_seconds",
+    "Time to verify an access token",
+    ["outcome"],
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01),
+)
+jwt_verify_cached = jwt_verify_duration.labels("cached")
+jwt_verify_decoded = jwt_verify_duration.labels("decoded")
+jwt_verify_invalid = jwt_verify_duration.labels("invalid")
+
+# Verified-token cache; hit ratio = hits / (hits + misses)
+jwt_cache_lookups = Counter("jwt_cache_lookups", "Verified-token cache lookups by outcome", ["outcome"])
+jwt_cache_hits = jwt_cache_lookups.labels("hits")
+jwt_cache_misses = jwt_cache_lookups.labels("misses")
+
+# User cache; hit ratio = (hits + negative_hits) / all lookups
+user_cache_lookups = Counter("user_cache_lookups", "User cache lookups by outcome", ["outcome"])
+USER_CACHE_OUTCOMES = {
+    outcome: user_cache_lookups.labels(outcome) for outcome in ("hits", "negative_hits", "misses")
+}
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Time connection checkouts on `engine` and keep its pool gauges current.
+    For an `AsyncEngine`, pass its `sync_engine`.
+    """
+    wait = db_pool_checkout_wait.labels(name)
+    size = db_pool_size.labels(name)
+    checked_out = db_pool_checked_out.labels(name)
+    overflow = db_pool_overflow.labels(name)
+
+    # Wrapped on the engine rather than the pool, which `dispose()` replaces
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return raw_connection(*args, **kwargs)
+        finally:
+            wait.observe(time.perf_counter() - started)
+
+    engine.raw_connection = timed_raw_connection
+
+    # Counted here: the pool's own counters only change after the checkin event fires
+    lock = threading.Lock()
+    in_use = 0
+
+    def update_gauges(delta: int) -> None:
+        nonlocal in_use
+        with lock:
+            in_use += delta
+            checked_out.set(in_use)
+            pool = engine.pool
+            if isinstance(pool, QueuePool):
+                size.set(pool.size())
+                overflow.set(max(in_use - pool.size(), 0))
+
+    event.listen(engine, "checkout", lambda *_: update_gauges(1))
+    event.listen(engine, "checkin", lambda *_: update_gauges(-1))
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """
+    Feed PyMongo connection pool events (shared by Motor) into the mongo_pool_* metrics.
+    """
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        mongo_pool_connections.inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        mongo_pool_connections.dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        mongo_pool_checkout_failures.inc()
+
+    def connection_checked_out(self, event):
+        mongo_pool_checked_out.inc()
+        mongo_pool_checkout_wait.observe(event.duration)
+
+    def connection_checked_in(self, event):
+        mongo_pool_checked_out.dec()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Exposition body and content type: this process's metrics, or every
+    worker's when running in multiprocess mode.
+    """
+    registry = REGISTRY
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """
+    Drop this worker's live gauges from the shared directory on shutdown.
+    """
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,292 @@
+"""
+Query statistics and the slow-query log, for SQLAlchemy and Motor.
+
+Statements are grouped by fingerprint: the SQL with every literal and bound
+parameter replaced by `?` (IN lists and multi-row VALUES collapsed), or a Mongo
+command's name, collection and filter shape. Each fingerprint keeps a count,
+totals and its most recent latencies for percentiles. Only statements slower
+than `SLOW_QUERY_MS` are logged; with `SLOW_QUERY_EXPLAIN` (PostgreSQL only) a
+slow SELECT is re-run under `EXPLAIN (ANALYZE, BUFFERS)`, at most once a
+minute per fingerprint, and the plan is logged and kept with its statistics.
+
+Statistics are per process and exposed on `/api/admin/queries`.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from pymongo import monitoring
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.logging import logger
+
+OTHER = "<other>"  # Fingerprints beyond QUERY_STATS_SIZE are counted together
+EXPLAIN_INTERVAL = 60.0  # Seconds between plans captured for one fingerprint
+MAX_FINGERPRINT_LENGTH = 2000
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_REPEATED_ROWS = re.compile(r"(\((?:\?, )*\?\))(?:, \1)+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint_sql(statement: str) -> str:
+    """
+    Normalise a SQL statement so that executions differing only in values group together.
+    """
+    text = _WHITESPACE.sub(" ", statement).strip()
+    text = _STRING.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _REPEATED_ROWS.sub(r"\1, ...", text)
+    text = _PLACEHOLDER_LIST.sub("(?, ...)", text)
+    return text[:MAX_FINGERPRINT_LENGTH]
+
+
+# Command fields that do not change what the server has to do
+_MONGO_NOISE = {
+    "$db", "$clusterTime", "$readPreference", "lsid", "txnNumber", "autocommit", "startTransaction",
+    "readConcern", "writeConcern", "comment", "cursor", "batchSize", "limit", "skip", "singleBatch",
+    "ordered", "documents", "maxTimeMS", "apiVersion",
+}
+# Handshakes, auth and cursor housekeeping
+_MONGO_IGNORED = {
+    "hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue", "authenticate",
+    "getnonce", "buildInfo", "endSessions", "killCursors", "getMore",
+}
+
+
+def _shape(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        if value and all(isinstance(item, dict) for item in value):
+            return [_shape(item) for item in value]  # e.g. an aggregation pipeline or $or branches
+        return ["?"]
+    return "?"
+
+
+def fingerprint_mongo(command_name: str, command: dict) -> str:
+    """
+    `find users {"email": "?"}`: command, collection and the shape of everything else that matters.
+    """
+    collection = command.get(command_name, "")
+    if not isinstance(collection, str):
+        collection = ""
+    details = {}
+    for key, value in command.items():
+        if key == command_name or key in _MONGO_NOISE:
+            continue
+        if key in ("updates", "deletes") and isinstance(value, list) and value:
+            value = value[0]  # Each statement in a batch has the same shape
+        details[key] = _shape(value)
+    text = f"{command_name} {collection} {json.dumps(details, default=str)}".strip()
+    return text[:MAX_FINGERPRINT_LENGTH]
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class _Entry:
+    __slots__ = ("count", "errors", "total", "max", "recent", "plan", "explained_at")
+
+    def __init__(self, samples: int):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=samples)
+        self.plan: Optional[str] = None
+        self.explained_at = 0.0
+
+
+class QueryStats:
+    """
+    Per-fingerprint counts, totals and recent latencies, bounded in fingerprints and samples.
+    """
+
+    def __init__(self, size: int, samples: int):
+        self.size = size
+        self.samples = samples
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def record(self, fingerprint: str, seconds: float, failed: bool = False) -> None:
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                if len(self._entries) >= self.size:
+                    fingerprint = OTHER
+                entry = self._entries.setdefault(fingerprint, _Entry(self.samples))
+            entry.count += 1
+            entry.errors += failed
+            entry.total += seconds
+            entry.max = max(entry.max, seconds)
+            entry.recent.append(seconds)
+
+    def claim_explain(self, fingerprint: str) -> bool:
+        """
+        Whether a plan may be captured for `fingerprint` now; claims the slot if so.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None or now - entry.explained_at < EXPLAIN_INTERVAL:
+                return False
+            entry.explained_at = now
+            return True
+
+    def set_plan(self, fingerprint: str, plan: str) -> None:
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is not None:
+                entry.plan = plan
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> List[dict]:
+        """
+        The `limit` fingerprints with the highest `order_by` (total_ms, p95_ms, max_ms, count, ...).
+        """
+        with self._lock:
+            snapshot = [
+                (fingerprint, entry.count, entry.errors, entry.total, entry.max, sorted(entry.recent), entry.plan)
+                for fingerprint, entry in self._entries.items()
+            ]
+        rows = [
+            {
+                "fingerprint": fingerprint,
+                "count": count,
+                "errors": errors,
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total / count * 1000, 3),
+                "max_ms": round(longest * 1000, 3),
+                "p50_ms": round(_percentile(recent, 0.50) * 1000, 3),
+                "p95_ms": round(_percentile(recent, 0.95) * 1000, 3),
+                "p99_ms": round(_percentile(recent, 0.99) * 1000, 3),
+                "plan": plan,
+            }
+            for fingerprint, count, errors, total, longest, recent, plan in snapshot
+        ]
+        rows.sort(key=lambda row: row[order_by], reverse=True)
+        return rows[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+sql_query_stats = QueryStats(settings.QUERY_STATS_SIZE, settings.QUERY_STATS_SAMPLES)
+mongo_command_stats = QueryStats(settings.QUERY_STATS_SIZE, settings.QUERY_STATS_SAMPLES)
+
+
+def _explain(connection, statement: str, parameters) -> Optional[str]:
+    """
+    Plan of a statement that just ran, from the raw DBAPI connection so it is not instrumented itself.
+    Runs in a savepoint so a failing EXPLAIN cannot abort the caller's transaction.
+    """
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            raise
+        cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany) -> None:
+    connection.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(connection, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - connection.info["query_started"].pop()
+    fingerprint = fingerprint_sql(statement)
+    sql_query_stats.record(fingerprint, elapsed)
+    if elapsed * 1000 < settings.SLOW_QUERY_MS:
+        return
+
+    plan = None
+    if (
+        settings.SLOW_QUERY_EXPLAIN
+        and connection.dialect.name == "postgresql"
+        and not executemany
+        and statement.lstrip()[:6].upper() == "SELECT"
+        and sql_query_stats.claim_explain(fingerprint)
+    ):
+        try:
+            plan = _explain(connection, statement, parameters)
+            sql_query_stats.set_plan(fingerprint, plan)
+        except Exception as e:
+            logger.warning("Could not EXPLAIN slow query: %s", e)
+    logger.warning(
+        "Slow SQL (%.1fms): %s", elapsed * 1000, fingerprint,
+        extra={"duration_ms": round(elapsed * 1000, 2), "fingerprint": fingerprint, "plan": plan},
+    )
+
+
+def _handle_error(context) -> None:
+    connection = context.connection
+    started = connection.info.get("query_started") if connection is not None else None
+    if started and context.statement is not None:
+        sql_query_stats.record(fingerprint_sql(context.statement), time.perf_counter() - started.pop(), failed=True)
+
+
+def instrument_queries(engine: Engine) -> None:
+    """
+    Record statistics for every statement `engine` runs. For an `AsyncEngine`, pass its `sync_engine`.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    The Motor counterpart of `instrument_queries`: statistics and slow-command logging.
+    No EXPLAIN is captured; listeners must not issue commands themselves.
+    """
+
+    def __init__(self):
+        # (request_id, connection_id) -> fingerprint, between a command's start and its outcome
+        self._pending: Dict[tuple, str] = {}
+
+    def started(self, event):
+        if event.command_name not in _MONGO_IGNORED:
+            self._pending[(event.request_id, event.connection_id)] = fingerprint_mongo(
+                event.command_name, event.command
+            )
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool) -> None:
+        fingerprint = self._pending.pop((event.request_id, event.connection_id), None)
+        if fingerprint is None:
+            return
+        elapsed = event.duration_micros / 1_000_000
+        mongo_command_stats.record(fingerprint, elapsed, failed)
+        if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+            logger.warning(
+                "Slow Mongo command (%.1fms): %s", elapsed * 1000, fingerprint,
+                extra={"duration_ms": round(elapsed * 1000, 2), "fingerprint": fingerprint},
+            )
@@ -2,12 +2,17 @@
 SQLAlchemy ORM models.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, func
+from sqlalchemy import DDL, Column, DateTime, Index, Integer, String, event, func
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import declarative_base
 
 # Base class for all models
 Base = declarative_base()
 
+# SQLite's CURRENT_TIMESTAMP has no fractional seconds; binding values in the same
+# text format keeps created_at/updated_at comparisons (filters, cursors) correct there
+Timestamp = DateTime(timezone=True).with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite")
+
 class User(Base):
     """
     User model representing registered users.
@@ -19,5 +24,30 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     role = Column(String, nullable=False, default="user")
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now(), nullable=False)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped to invalidate issued tokens
+    created_at = Column(Timestamp, server_default=func.now(), nullable=False)
+    updated_at = Column(Timestamp, onupdate=func.now(), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Role filter with created_at range/sort, and created_at on its own
+        Index("ix_users_role_created_at", "role", "created_at"),
+        Index("ix_users_created_at", "created_at"),
+        Index("ix_users_name", "name"),
+        # Trigram indexes back prefix and substring LIKE/ILIKE search on PostgreSQL
+        Index(
+            "ix_users_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_users_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+        # SQLite would otherwise hand a deleted user's ID to the next user, unlike a PostgreSQL sequence
+        {"sqlite_autoincrement": True},
+    )
+
+
+# The trigram indexes need the extension when tables are created without Alembic
+event.listen(
+    User.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,57 @@
+"""
+MongoDB connection handler using Motor.
+
+A single client, and therefore a single connection pool, is shared by the
+whole process. It is opened in the application lifespan and closed on shutdown.
+"""
+
+from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from app.core.config import settings
+from app.core.metrics import MongoPoolListener
+from app.db.instrumentation import MongoCommandListener
+
+_client: Optional[AsyncIOMotorClient] = None
+
+
+def connect_mongo() -> AsyncIOMotorClient:
+    """
+    Create the process-wide client if it does not exist yet.
+    """
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(
+            settings.MONGODB_URL, event_listeners=[MongoPoolListener(), MongoCommandListener()]
+        )
+    return _client
+
+
+def close_mongo() -> None:
+    """
+    Close the process-wide client and its connection pool.
+    """
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+def get_mongo_database() -> AsyncIOMotorDatabase:
+    """
+    Return the configured database on the shared client.
+    """
+    return connect_mongo().get_database(settings.MONGODB_NAME)
+
+
+async def ensure_indexes() -> None:
+    """
+    Create the indexes the repositories rely on. Safe to run on every startup.
+    """
+    users = get_mongo_database()["users"]
+    await users.create_index("email", unique=True)
+    # List filters and sorts (see `list_users_query`)
+    await users.create_index([("role", 1), ("created_at", 1)])
+    await users.create_index([("created_at", 1), ("_id", 1)])
+    await users.create_index([("name", 1), ("_id", 1)])
+    await users.create_index([("email", 1), ("_id", 1)])
+    # match=contains stays unindexed: text indexes match whole words, not substrings
@@ -0,0 +1,70 @@
+"""
+Read-your-writes routing for read replicas.
+
+Replicas lag behind the primary, so a caller who just wrote would otherwise
+risk reading their own change back stale. After a write, the caller's reads
+go to the primary for `READ_YOUR_WRITES_SECONDS`.
+
+Every write response sets a short-lived cookie holding the window's end, so
+the caller's next read is pinned on whichever worker serves it; this also
+covers signups, which have no token yet. The caller's user id (from the
+token, or the user just created) is remembered per process as well, for
+clients that drop cookies. Callers are never keyed on their address, which
+NAT and proxies share.
+"""
+
+import time
+from fastapi import Request, Response
+from typing import List, Optional
+from app.core.config import settings
+from app.db.session import READ_URLS
+from app.utils.cache import TTLCache
+from app.utils.jwt import verify_access_token
+
+_recent_writers = TTLCache(maxsize=100000, ttl=settings.READ_YOUR_WRITES_SECONDS)
+
+# Holds the Unix time the window ends; forging it only sends the caller's own reads to the primary
+READ_YOUR_WRITES_COOKIE = "read_your_writes_until"
+
+
+def _caller_keys(request: Request, user_id: Optional[int] = None) -> List[str]:
+    if user_id is None:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                user_id = verify_access_token(token).get("user_id")
+            except ValueError:
+                pass
+    return [f"user:{user_id}"] if user_id is not None else []
+
+
+def mark_recent_write(request: Request, user_id: Optional[int] = None, response: Optional[Response] = None) -> None:
+    """
+    Pin the caller's reads to the primary for the read-your-writes window.
+
+    Pass the endpoint's `response` so the window cookie reaches other workers too.
+    """
+    if not READ_URLS:
+        return
+    for key in _caller_keys(request, user_id):
+        _recent_writers.set(key, True)
+    if response is not None:
+        window = settings.READ_YOUR_WRITES_SECONDS
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE, f"{time.time() + window:.3f}",
+            max_age=max(1, round(window)), httponly=True, samesite="lax",
+        )
+
+
+def _in_cookie_window(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(READ_YOUR_WRITES_COOKIE, "0")) > time.time()
+    except ValueError:
+        return False
+
+
+def reads_from_primary(request: Request) -> bool:
+    """
+    Whether the caller wrote recently enough that replicas may not have caught up.
+    """
+    return _in_cookie_window(request) or any(_recent_writers.get(key) for key in _caller_keys(request))
@@ -1,11 +1,21 @@
 """
 Database connection handler using SQLAlchemy and PostgreSQL.
+
+Writes always go to the primary `engine`. When `SQL_READ_URLS` lists read
+replicas, read-only sessions are bound to one of them, picked per session
+according to `SQL_READ_WEIGHTS`.
 """
 
 import os
+import random
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from typing import List, Optional, Sequence
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.db.instrumentation import instrument_queries
 
 # Get the database URL from the environment
 DATABASE_URL = settings.SQL_URL
@@ -14,15 +24,93 @@ DATABASE_URL = settings.SQL_URL
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set in the environment variables.")
 
+READ_URLS = [url.strip() for url in settings.SQL_READ_URLS.split(",") if url.strip()]
+READ_WEIGHTS = [float(weight) for weight in settings.SQL_READ_WEIGHTS.split(",") if weight.strip()] or [1.0] * len(READ_URLS)
+
+if len(READ_WEIGHTS) != len(READ_URLS):
+    raise ValueError("SQL_READ_WEIGHTS must have one weight per SQL_READ_URLS entry.")
+
+
+def pool_options(url: str) -> dict:
+    """
+    Connection pool sizing for an engine. In-memory SQLite uses a fixed pool that takes no sizing.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {"pool_size": settings.SQL_POOL_SIZE, "max_overflow": settings.SQL_MAX_OVERFLOW}
+
+
+def choose_read_engine(engines: Sequence, weights: Sequence[float]):
+    """
+    Weighted random pick of a replica engine.
+    """
+    return random.choices(engines, weights=weights)[0]
+
+
 # Create the SQLAlchemy engine
 engine = create_engine(
     DATABASE_URL,
-    echo=True,  # Optional: Logs all SQL statements (remove in production)
+    echo=settings.SQL_ECHO,  # Every statement, synchronously; slow ones are logged by the instrumentation
+    **pool_options(DATABASE_URL),
 )
 
+# Read replica engines, empty when every query goes to the primary
+read_engines: List[Engine] = [create_engine(url, **pool_options(url)) for url in READ_URLS]
+
+instrument_engine(engine, "primary")
+instrument_queries(engine)
+for index, replica in enumerate(read_engines):
+    instrument_engine(replica, f"replica{index}")
+    instrument_queries(replica)
+
 # Create a configured "SessionLocal" class
 SessionLocal = sessionmaker(
     autocommit=False,  # We manage transactions manually
     autoflush=False,  # Disable automatic flush
+    expire_on_commit=False,  # Rows returned by a write stay loaded after the commit
     bind=engine       # Connect the session to the engine
 )
+
+# Read-only sessions; bound to a replica when created
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def to_async_url(url: str) -> str:
+    """
+    Swap a sync driver for its asyncio counterpart in a database URL.
+    """
+    for sync_prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+# The async engines are only built when enabled, so sync deployments need no async driver
+async_engine: Optional[AsyncEngine] = None
+async_read_engines: List[AsyncEngine] = []
+AsyncSessionLocal: Optional[async_sessionmaker] = None
+AsyncReadSessionLocal: Optional[async_sessionmaker] = None
+
+if settings.SQL_ASYNC:
+    ASYNC_DATABASE_URL = settings.ASYNC_SQL_URL or to_async_url(DATABASE_URL)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL))
+    async_read_engines = [
+        create_async_engine(to_async_url(url), **pool_options(url)) for url in READ_URLS
+    ]
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,  # Returned users are serialised after the commit
+    )
+    AsyncReadSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+    instrument_engine(async_engine.sync_engine, "async_primary")
+    instrument_queries(async_engine.sync_engine)
+    for index, replica in enumerate(async_read_engines):
+        instrument_engine(replica.sync_engine, f"async_replica{index}")
+        instrument_queries(replica.sync_engine)
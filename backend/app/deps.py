@@ -1,15 +1,33 @@
-from .db.session import SessionLocal
+from .db.session import (
+    AsyncReadSessionLocal,
+    AsyncSessionLocal,
+    ReadSessionLocal,
+    async_read_engines,
+    choose_read_engine,
+    read_engines,
+    READ_WEIGHTS,
+    SessionLocal,
+)
+from .db.routing import reads_from_primary
+from .db.mongo import get_mongo_database
 from sqlalchemy.orm import Session
-from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import AsyncGenerator, Generator, Optional
+from fastapi import Depends, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from app.utils.jwt import verify_access_token
+from app.utils.jwt import verify_access_token, is_token_revoked
 from app.crud.user import get_user
 from app.db.models import User
+from app.repositories.base import run_repository_method
 from app.repositories.user_sql import UserSQLRepository
+from app.repositories.user_sql_async import AsyncUserSQLRepository
 from app.repositories.user_nosql import UserNoSQLRepository
+from app.repositories.cached import CachedUserRepository, create_user_cache_backend
 from app.core.config import settings
+from app.core.context import timed
+from app.schemas.auth import Principal
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/signin")
 
@@ -25,55 +43,205 @@ def get_db() -> Generator:
     finally:
         db.close()
 
-def get_nosql_db():
+async def get_read_db(request: Request) -> AsyncGenerator:
     """
-    Dependency to provide a MongoDB client.
+    Dependency to get a read-only DB session on a weighted replica.
+
+    Yields None, meaning "use the primary session", when no replicas are
+    configured or the caller is inside their read-your-writes window.
     """
-    client = AsyncIOMotorClient(settings.MONGODB_URL)
-    db = client.get_database(settings.MONGODB_NAME)
-    return db
+    if not read_engines or reads_from_primary(request):
+        yield None
+        return
+    db = ReadSessionLocal(bind=choose_read_engine(read_engines, READ_WEIGHTS))
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
 
-def get_user_repository(
-    db_type: str = Depends(lambda: settings.DB_TYPE), 
-    sql_db: Session = Depends(get_db), 
-    nosql_db = Depends(get_nosql_db)
-):
+async def get_async_db() -> AsyncGenerator:
+    """
+    Dependency to get an async DB session (requires `SQL_ASYNC=true`).
+    Closes the session after use.
     """
-    Dependency to switch between SQL and NoSQL repositories dynamically.
+    async with AsyncSessionLocal() as db:
+        yield db
 
-    - If `DB_TYPE="sql"`, uses `UserSQLRepository`
-    - If `DB_TYPE="nosql"`, uses `UserNoSQLRepository`
+async def get_async_read_db(request: Request) -> AsyncGenerator:
+    """
+    Async counterpart of `get_read_db`.
     """
-    if db_type == "nosql":
-        return UserNoSQLRepository(nosql_db)
-    return UserSQLRepository(sql_db)
+    if not async_read_engines or reads_from_primary(request):
+        yield None
+        return
+    async with AsyncReadSessionLocal(bind=choose_read_engine(async_read_engines, READ_WEIGHTS)) as db:
+        yield db
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    user_repo=Depends(get_user_repository)
-) -> User:
+async def get_nosql_db() -> AsyncIOMotorDatabase:
     """
-    Extract the user from the JWT token and load from DB.
+    Dependency to provide the MongoDB database from the shared client.
+    """
+    return get_mongo_database()
+
+def get_sql_user_repository(
+    sql_db: Session = Depends(get_db),
+    read_db: Optional[Session] = Depends(get_read_db)
+) -> UserSQLRepository:
+    """
+    Dependency providing the SQL user repository.
+    """
+    return UserSQLRepository(sql_db, read_db)
+
+async def get_async_sql_user_repository(
+    sql_db: AsyncSession = Depends(get_async_db),
+    read_db: Optional[AsyncSession] = Depends(get_async_read_db)
+) -> AsyncUserSQLRepository:
+    """
+    Dependency providing the async SQL user repository.
+    """
+    return AsyncUserSQLRepository(sql_db, read_db)
+
+async def get_nosql_user_repository(
+    nosql_db: AsyncIOMotorDatabase = Depends(get_nosql_db)
+) -> UserNoSQLRepository:
+    """
+    Dependency providing the MongoDB user repository.
+    """
+    return UserNoSQLRepository(nosql_db)
+
+# Picked once at startup, so requests only resolve the configured backend's dependencies.
+# - If `DB_TYPE="sql"`, uses `UserSQLRepository` (`AsyncUserSQLRepository` with `SQL_ASYNC=true`)
+# - If `DB_TYPE="nosql"`, uses `UserNoSQLRepository`
+if settings.DB_TYPE == "nosql":
+    get_backend_user_repository = get_nosql_user_repository
+elif settings.SQL_ASYNC:
+    get_backend_user_repository = get_async_sql_user_repository
+else:
+    get_backend_user_repository = get_sql_user_repository
+
+user_cache_backend = create_user_cache_backend()
+
+async def get_cached_user_repository(
+    user_repo=Depends(get_backend_user_repository)
+) -> CachedUserRepository:
+    """
+    Dependency wrapping the configured repository in the read-through user cache.
+    """
+    return CachedUserRepository(user_repo, user_cache_backend)
+
+# With `USER_CACHE_BACKEND` set, repository reads go through the cache first
+get_user_repository = (
+    get_cached_user_repository if user_cache_backend is not None else get_backend_user_repository
+)
+
+def _verified_claims(token: str) -> dict:
+    """
+    Verify the JWT and return its claims, rejecting revoked or incomplete tokens.
     """
     try:
-        payload = verify_access_token(token)
-        user_id = payload.get("user_id")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token: missing user_id"
-            )
+        with timed("auth"):
+            payload = verify_access_token(token)
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token"
         )
+    if payload.get("user_id") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token: missing user_id"
+        )
+    with timed("auth"):
+        revoked = is_token_revoked(payload)
+    if revoked:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token"
+        )
+    return payload
+
+async def get_current_principal(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Build the caller's identity from the verified token claims.
+
+    No database round trip: use this when a handler only needs the caller's
+    id and role. Role changes and deletions revoke older tokens through the
+    per-process revocation registry only, so until it expires a token whose
+    user was deleted out of band or on another worker still passes here
+    (e.g. `GET /api/users/{id}`). Paths that must refuse it call
+    `verify_principal`.
+    """
+    payload = _verified_claims(token)
+    return Principal(id=payload["user_id"], role=payload.get("role", "user"), ver=payload.get("ver", 0))
+
+def _stored(user, field: str, default=None):
+    """
+    A field of a repository row: an ORM object, a cached user or a MongoDB document.
+    """
+    return user.get(field, default) if isinstance(user, dict) else getattr(user, field)
+
+async def verify_principal(principal: Principal, user_repo) -> Principal:
+    """
+    Re-check a claims-only principal against the stored user.
 
-    user = user_repo.get_by_id(user_id)
+    The revocation registry is per process and forgotten on restart, so any
+    action that needs more than the caller's own account (admin endpoints,
+    acting on other users, role changes) confirms here that the user still
+    exists and the token is not older than the stored token version. The
+    role returned is the stored one, not the claim.
+    """
+    user = await run_repository_method(user_repo.get_by_id, principal.id)
+    if user is None or principal.ver < _stored(user, "token_version", 0):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token"
+        )
+    return Principal(id=principal.id, role=_stored(user, "role", "user"), ver=principal.ver)
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    user_repo=Depends(get_user_repository)
+) -> User:
+    """
+    Extract the user from the JWT token and load from DB.
+
+    Handlers that need the full row opt in to this instead of `get_current_principal`.
+    """
+    payload = _verified_claims(token)
+    user_id = payload["user_id"]
+
+    user = await run_repository_method(user_repo.get_by_id, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    if payload.get("ver", 0) < _stored(user, "token_version", 0):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token"
+        )
 
     return user
+
+async def require_admin(
+    principal: Principal = Depends(get_current_principal),
+    user_repo=Depends(get_user_repository)
+) -> Principal:
+    """
+    Restrict an endpoint to admins, by the stored role rather than the token's claim.
+
+    A demoted or deleted admin is refused at once on every worker.
+    """
+    if principal.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required."
+        )
+    current_user = await verify_principal(principal, user_repo)
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required."
+        )
+    return current_user
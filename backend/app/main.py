@@ -1,14 +1,47 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.endpoints import auth, users
+from app.api.endpoints import admin, auth, metrics, users
 from app.db.models import Base
-from app.db.session import engine
+from app.db.session import engine, async_engine, read_engines, async_read_engines
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware, confirm_profile_request
+from app.middleware.request_context import RequestContextMiddleware
+from app.db.mongo import connect_mongo, close_mongo, ensure_indexes
 from app.core.config import settings
+from app.core.metrics import mark_process_dead
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open connections for the configured backend on startup and release them on shutdown.
+    """
+    if settings.DB_TYPE == "nosql":
+        connect_mongo()
+        await ensure_indexes()
+    else:
+        # Create tables (optional during development)
+        Base.metadata.create_all(bind=engine)
+    yield
+    if settings.DB_TYPE == "nosql":
+        close_mongo()
+    else:
+        engine.dispose()
+        for replica in read_engines:
+            replica.dispose()
+        if async_engine is not None:
+            await async_engine.dispose()
+        for replica in async_read_engines:
+            await replica.dispose()
+    mark_process_dead()
 
-# Create tables (optional during development)
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
+    lifespan=lifespan,
+    # Header-triggered profiles are kept only for callers who are admins by the stored role
+    dependencies=[Depends(confirm_profile_request)] if settings.PROFILING_ENABLED else [],
     title="User Management API",
     description="""
     ## Overview
@@ -51,8 +84,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=[  # Let browsers read pagination and validator headers
+        "X-Next-Cursor", "X-Total-Count", "X-Total-Count-Estimated", "ETag", "Last-Modified",
+        "X-Request-ID", "Server-Timing", "X-Profile-ID",
+    ],
 )
 
+# Compress large responses (user pages, exports) for clients that accept it
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    encodings=tuple(encoding.strip() for encoding in settings.COMPRESSION_ENCODINGS.split(",")),
+    levels={
+        "gzip": settings.COMPRESSION_GZIP_LEVEL,
+        "br": settings.COMPRESSION_BROTLI_LEVEL,
+        "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+    },
+)
+
+# Opt-in request profiling; not installed at all when disabled
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        interval=settings.PROFILING_INTERVAL_MS / 1000,
+    )
+
+# Per-route latency, in-flight and status metrics, served at /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Outermost, so the request ID and timings cover every other middleware
+app.add_middleware(RequestContextMiddleware)
+
 # Routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+app.include_router(metrics.router)
@@ -0,0 +1,274 @@
+"""
+Negotiated response compression (zstd, brotli, gzip).
+
+A pure ASGI middleware, so `StreamingResponse` bodies are compressed chunk by
+chunk and flushed as they go instead of being buffered. Bodies smaller than
+the threshold, responses that already carry a `Content-Encoding` (for example
+precompressed files) and non-text content types are passed through untouched.
+
+brotli and zstd are offered only when the `brotli` / `zstandard` packages are
+installed; gzip is always available.
+"""
+
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from anyio import to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import (
+    compression_duration,
+    compression_input_bytes,
+    compression_output_bytes,
+    compression_ratio,
+)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+THREADPOOL_CHUNK_SIZE = 256 * 1024  # Larger chunks are compressed off the event loop
+
+
+def no_compression(endpoint: Callable) -> Callable:
+    """
+    Route decorator: never compress this endpoint's responses, e.g. because they
+    carry secrets next to request-controlled data (BREACH).
+    """
+    endpoint.compression_disabled = True
+    return endpoint
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+CODECS = {"gzip": _Gzip}
+if brotli is not None:
+    CODECS["br"] = _Brotli
+if zstandard is not None:
+    CODECS["zstd"] = _Zstd
+
+
+def negotiate(accept_encoding: str, preference: List[str]) -> Optional[str]:
+    """
+    Pick the encoding with the highest q-value in `Accept-Encoding`, breaking ties
+    by server preference. Returns None when identity is the best choice.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name.strip()] = q
+
+    best, best_q = None, 0.0
+    for encoding in preference:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+# Label children bound once per encoding
+_METRICS = {
+    encoding: (
+        compression_input_bytes.labels(encoding),
+        compression_output_bytes.labels(encoding),
+        compression_ratio.labels(encoding),
+        compression_duration.labels(encoding),
+    )
+    for encoding in CODECS
+}
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with the best encoding both sides support.
+
+    `levels` maps an encoding to its compression level (gzip 1-9, br 0-11, zstd 1-22),
+    trading CPU for bandwidth. Endpoints marked with `no_compression` are skipped.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        encodings: Tuple[str, ...] = ("zstd", "br", "gzip"),
+        levels: Optional[Dict[str, int]] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = [encoding for encoding in encodings if encoding in CODECS]
+        self.levels = {"gzip": 6, "br": 4, "zstd": 3, **(levels or {})}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self, scope, encoding)(receive, send)
+
+
+class _CompressedResponder:
+    """
+    Per-response state: holds back the start message until the body size (or the
+    first streamed chunks) show whether compression is worth it.
+    """
+
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, encoding: str):
+        self.middleware = middleware
+        self.scope = scope
+        self.encoding = encoding
+        self.start: Optional[Message] = None
+        self.pending: List[bytes] = []
+        self.compressor = None
+        self.passthrough = False
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.seconds = 0.0
+
+    async def __call__(self, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.middleware.app(self.scope, receive, self.send_wrapper)
+
+    def _should_compress(self) -> bool:
+        endpoint = self.scope.get("endpoint")
+        if getattr(endpoint, "compression_disabled", False):
+            return False
+        if self.start["status"] < 200 or self.start["status"] in (204, 304):
+            return False
+        headers = Headers(raw=self.start["headers"])
+        if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+            return False
+        return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+    async def _compress(self, data: bytes, final: bool) -> bytes:
+        started = time.perf_counter()
+        if len(data) >= THREADPOOL_CHUNK_SIZE:
+            body = await to_thread.run_sync(self.compressor.compress, data)
+        else:
+            body = self.compressor.compress(data)
+        if final:
+            body += self.compressor.finish()
+        self.seconds += time.perf_counter() - started
+        self.raw_bytes += len(data)
+        self.compressed_bytes += len(body)
+        return body
+
+    async def _begin_compression(self, more_body: bool) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        # The compressed body is a different representation of the resource
+        if headers.get("etag", "").startswith('"'):
+            headers["ETag"] = "W/" + headers["etag"]
+        del headers["content-length"]
+        self.compressor = CODECS[self.encoding](self.middleware.levels[self.encoding])
+        body = await self._compress(b"".join(self.pending), final=not more_body)
+        self.pending = []
+        if not more_body:
+            headers["Content-Length"] = str(len(body))
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+        if not more_body:
+            self._record()
+
+    async def _pass_through(self, more_body: bool) -> None:
+        self.passthrough = True
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": b"".join(self.pending), "more_body": more_body})
+        self.pending = []
+
+    def _record(self) -> None:
+        input_bytes, output_bytes, ratio, duration = _METRICS[self.encoding]
+        input_bytes.inc(self.raw_bytes)
+        output_bytes.inc(self.compressed_bytes)
+        if self.compressed_bytes:
+            ratio.observe(self.raw_bytes / self.compressed_bytes)
+        duration.observe(self.seconds)
+
+    async def send_wrapper(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            if not self._should_compress():
+                self.passthrough = True
+                await self.send(message)
+            else:
+                # Every compressible response varies by Accept-Encoding, compressed or not
+                MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self.compressor is not None:
+            body = await self._compress(body, final=not more_body)
+            await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+            if not more_body:
+                self._record()
+            return
+
+        # Hold back the start message until the threshold is crossed or the body ends
+        self.pending.append(body)
+        buffered = sum(len(chunk) for chunk in self.pending)
+        if buffered >= self.middleware.minimum_size:
+            await self._begin_compression(more_body)
+        elif not more_body:
+            await self._pass_through(more_body=False)
@@ -0,0 +1,101 @@
+"""
+Per-route request metrics.
+
+Requests are labelled by the matched route's path template (`/api/users/{user_id}`),
+so cardinality stays bounded whatever paths clients send; anything no route
+matches shares the "unmatched" label. Label children are bound the first time
+a route is seen and reused for every later request.
+
+The route is resolved before the request is passed on, so the in-flight gauge
+is labelled too and counts time spent in the inner middleware.
+"""
+
+import time
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import STATUS_CLASSES, http_request_duration, http_requests, http_requests_in_flight
+
+UNMATCHED = "unmatched"
+
+
+def _match(routes: Sequence[BaseRoute], scope: Scope, prefix: str = "") -> Optional[Tuple[Match, str]]:
+    partial = None
+    for route in routes:
+        included = getattr(route, "original_router", None)
+        if included is not None:
+            # A router added with include_router: its routes only know their own part (`/{user_id}`)
+            included_prefix = prefix + route.include_context.prefix
+            if not scope["path"].startswith(scope.get("root_path", "") + included_prefix):
+                continue
+            found = _match(included.routes, scope, included_prefix)
+        else:
+            match, _ = route.matches({**scope, "root_path": scope.get("root_path", "") + prefix})
+            found = (match, prefix + route.path_format) if match != Match.NONE else None
+        if found is not None and found[0] == Match.FULL:
+            return found
+        partial = partial or found
+    return partial  # The router answers a wrong method with 405 from the first partial match
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Full path template of the route the app's router will match, found the same
+    way the router does (`route.matches(scope)`) but without routing the request.
+    """
+    router = getattr(scope.get("app"), "router", None)
+    found = _match(router.routes, scope) if router is not None else None
+    return found[1] if found is not None else UNMATCHED
+
+
+class _RouteMetrics(NamedTuple):
+    duration: object
+    responses: Tuple[object, ...]  # One counter per status class
+    in_flight: object
+
+
+class MetricsMiddleware:
+    """
+    Record latency and responses per status class for each route, and the requests in flight.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._children: Dict[Tuple[str, str], _RouteMetrics] = {}
+
+    def _metrics_for(self, method: str, route: str) -> _RouteMetrics:
+        children = self._children.get((method, route))
+        if children is None:
+            children = _RouteMetrics(
+                http_request_duration.labels(method, route),
+                tuple(http_requests.labels(method, route, status) for status in STATUS_CLASSES),
+                http_requests_in_flight.labels(route),
+            )
+            self._children[(method, route)] = children
+        return children
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics = self._metrics_for(scope["method"], route_template(scope))
+        metrics.in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.in_flight.dec()
+            metrics.duration.observe(elapsed)
+            metrics.responses[min(max(status_code // 100, 1), 5) - 1].inc()
@@ -0,0 +1,145 @@
+"""
+On-demand request profiling.
+
+A request is profiled when an admin sends `X-Profile: 1` with their bearer
+token, or when it is picked by `PROFILING_SAMPLE_RATE`. The response then
+carries `X-Profile-ID`, under which the folded stacks and per-phase timings
+(auth, db, hash, serialize) can be fetched from `/api/admin/profiles`.
+
+The token's role claim only starts the sampler. The profile is kept once
+`confirm_profile_request`, installed as an app-wide dependency, has found the
+caller to be an admin by the stored role, as `require_admin` does; otherwise
+it is discarded.
+
+Only one request per process is profiled at a time; others run normally. The
+middleware is only installed when `PROFILING_ENABLED` is set, so disabled
+profiling costs nothing.
+"""
+
+import random
+import threading
+import time
+import uuid
+
+from typing import Optional
+
+from anyio import to_thread
+from fastapi import Depends, HTTPException, Request
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.context import phase_timings_var, request_id_var
+from app.core.logging import logger
+from app.deps import get_user_repository, verify_principal
+from app.schemas.auth import Principal
+from app.utils.jwt import is_token_revoked, verify_access_token
+from app.utils.profiling import StackSampler, save_report
+
+PROFILE_HEADER = "x-profile"
+
+
+def _admin_claims(headers: Headers) -> Optional[Principal]:
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = verify_access_token(token)
+    except ValueError:
+        return None
+    if payload.get("role") != "admin" or payload.get("user_id") is None or is_token_revoked(payload):
+        return None
+    return Principal(id=payload["user_id"], role="admin", ver=payload.get("ver", 0))
+
+
+async def confirm_profile_request(request: Request, user_repo=Depends(get_user_repository)) -> None:
+    """
+    Keep a header-triggered profile only if the caller is an admin by the stored role.
+
+    A no-op for requests that did not ask to be profiled.
+    """
+    principal = getattr(request.state, "profile_principal", None)
+    if principal is None:
+        return
+    try:
+        principal = await verify_principal(principal, user_repo)
+    except HTTPException:
+        return
+    request.state.profile_confirmed = principal.role == "admin"
+
+
+class ProfilingMiddleware:
+    """
+    Sample the stacks of requests that asked to be profiled (or were picked at random).
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 0.0, interval: float = 0.005):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self._busy = False  # Only touched on the event loop thread
+
+    def _requested_by(self, scope: Scope) -> Optional[Principal]:
+        headers = Headers(scope=scope)
+        if headers.get(PROFILE_HEADER, "") in ("", "0"):
+            return None
+        return _admin_claims(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._busy:
+            await self.app(scope, receive, send)
+            return
+        sampled = bool(self.sample_rate) and random.random() < self.sample_rate
+        principal = None if sampled else self._requested_by(scope)
+        if not sampled and principal is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        if principal is not None:
+            state["profile_principal"] = principal  # Confirmed, or not, by `confirm_profile_request`
+
+        def kept() -> bool:
+            return sampled or state.get("profile_confirmed", False)
+
+        self._busy = True
+        profile_id = uuid.uuid4().hex
+        sampler = StackSampler(self.interval, threading.get_ident())
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if kept():
+                    MutableHeaders(scope=message)["X-Profile-ID"] = profile_id
+            await send(message)
+
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            duration = time.perf_counter() - started
+            self._busy = False
+            if kept():
+                timings = phase_timings_var.get()
+                report = {
+                    "id": profile_id,
+                    "request_id": request_id_var.get(),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "started_at": time.time() - duration,
+                    "duration_ms": round(duration * 1000, 2),
+                    "phases_ms": {
+                        phase: round(seconds * 1000, 2) for phase, seconds in (timings.seconds if timings else {}).items()
+                    },
+                    "samples": sampler.samples,
+                    "interval_ms": self.interval * 1000,
+                }
+                await to_thread.run_sync(save_report, profile_id, report, sampler.folded())
+                logger.info(
+                    "[%s] Profiled %s %s as %s (%s samples)",
+                    report["request_id"], scope["method"], scope["path"], profile_id, sampler.samples,
+                )
@@ -0,0 +1,79 @@
+"""
+Request ID propagation and per-phase timing.
+
+Each request gets the caller's `X-Request-ID` (when it is a sane token) or a new
+one. The ID is echoed back, attached to every log record, and the time spent in
+auth, database, hashing and serialisation is reported in `Server-Timing` and
+in one structured log line per request.
+"""
+
+import re
+import time
+import uuid
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.context import PhaseTimings, phase_timings_var, request_id_var
+from app.core.logging import SAMPLED, logger
+
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+def server_timing(timings: PhaseTimings, total: float) -> str:
+    """
+    `Server-Timing` value, e.g. `auth;dur=0.4, db;dur=3.1, total;dur=5.2` (milliseconds).
+    """
+    entries = [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in sorted(timings.seconds.items())]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+class RequestContextMiddleware:
+    """
+    Set the request ID and phase timings contextvars for the duration of each request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = Headers(scope=scope).get("x-request-id", "")
+        request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+        timings = PhaseTimings()
+        request_token = request_id_var.set(request_id)
+        timings_token = phase_timings_var.set(timings)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                headers["Server-Timing"] = server_timing(timings, time.perf_counter() - started)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            logger.info(
+                "[%s] %s %s -> %s in %.1fms",
+                request_id, scope["method"], scope["path"], status_code, duration * 1000,
+                extra={
+                    **(SAMPLED if status_code < 400 else {}),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": round(duration * 1000, 2),
+                    "phases_ms": {phase: round(seconds * 1000, 2) for phase, seconds in timings.seconds.items()},
+                },
+            )
+            phase_timings_var.reset(timings_token)
+            request_id_var.reset(request_token)
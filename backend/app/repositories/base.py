@@ -1,5 +1,10 @@
+import inspect
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, List, Optional
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Generic, Iterator, TypeVar, List, Optional, Set, Tuple, Union
+from starlette.concurrency import run_in_threadpool
+from app.core.context import timed
+from app.schemas.user import UserFilter
 
 T = TypeVar("T")  # Represents any data model
 
@@ -18,11 +23,84 @@ class BaseRepository(ABC, Generic[T]):
         pass
 
     @abstractmethod
-    def get_all(self, skip: int = 0, limit: int = 100) -> List[T]:
+    def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[Union[int, str]] = None,
+        filters: Optional[UserFilter] = None,
+        after_key: Any = None,
+    ) -> List[T]:
+        """
+        Return up to `limit` records matching `filters`, in its sort order (by id when
+        not given). With `after_id` set, pagination is keyset based (rows after the
+        `(after_key, after_id)` sort position) and `skip` is ignored, so deep pages
+        cost the same as the first one.
+        """
         pass
 
     @abstractmethod
-    def create(self, obj_data: dict) -> T:
+    def count(self, exact_below: int, filters: Optional[UserFilter] = None) -> Tuple[int, bool]:
+        """
+        Return `(total, exact)`. Uses the database's cheap row estimate and only counts
+        exactly when that estimate is below `exact_below`, so large tables are never scanned.
+        With filters, counts at most `exact_below` matches; `exact` is False when capped.
+        """
+        pass
+
+    @abstractmethod
+    def get_version(self, id: int) -> Optional[datetime]:
+        """
+        Return only the record's `updated_at`, or None if it does not exist. A cheap
+        freshness check for conditional requests.
+        """
+        pass
+
+    @abstractmethod
+    def get_page_versions(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[Union[int, str]] = None,
+        filters: Optional[UserFilter] = None,
+        after_key: Any = None,
+    ) -> List[Tuple[Union[int, str], datetime, Any]]:
+        """
+        Return `(id, updated_at, sort_key)` for the rows `get_all` would return with the same arguments.
+        """
+        pass
+
+    @abstractmethod
+    def iter_all(self, batch_size: int = 1000) -> Union[Iterator[T], AsyncIterator[T]]:
+        """
+        Stream every record ordered by id, fetching `batch_size` rows at a time
+        through a server-side cursor instead of materialising the table.
+        """
+        pass
+
+    @abstractmethod
+    def create(self, obj_data: dict) -> Optional[T]:
+        """
+        Insert one record in a single statement. Returns None when the email is
+        already registered, as decided by the unique index, so concurrent
+        signups cannot both succeed.
+        """
+        pass
+
+    @abstractmethod
+    def create_many(self, objs: List[dict]) -> Dict[str, Union[int, str]]:
+        """
+        Insert many records in batched statements. Each dict carries a precomputed
+        `hashed_password`. Rows whose email already exists are skipped rather than
+        failing the batch. Returns the new id of every inserted row, keyed by email.
+        """
+        pass
+
+    @abstractmethod
+    def get_existing_emails(self, emails: List[str]) -> Set[str]:
+        """
+        Return which of the given (normalised) emails are already registered, in one query.
+        """
         pass
 
     @abstractmethod
@@ -32,3 +110,16 @@ class BaseRepository(ABC, Generic[T]):
     @abstractmethod
     def delete(self, id: int) -> bool:
         pass
+
+
+async def run_repository_method(method: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Call a repository method from an async endpoint.
+
+    Async repositories are awaited directly; blocking ones run in the threadpool
+    so they never stall the event loop. Time spent counts as the request's "db" phase.
+    """
+    with timed("db"):
+        if inspect.iscoroutinefunction(method):
+            return await method(*args, **kwargs)
+        return await run_in_threadpool(method, *args, **kwargs)
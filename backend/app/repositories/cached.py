@@ -0,0 +1,281 @@
+"""
+Read-through caching for any user repository.
+
+`CachedUserRepository` wraps a `BaseRepository` and serves `get_by_id`
+from a cache backend, invalidating entries on every write. Lookups that
+find nothing are cached briefly as well, so repeated probes for unknown
+ids or emails do not reach the database.
+
+Cached entries never contain `hashed_password`. `get_by_email` (used by
+sign-in, which needs the hash) always reads through to the database, and
+only "no such email" answers are cached for it.
+"""
+
+import json
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from app.core.config import settings
+from app.core.metrics import USER_CACHE_OUTCOMES
+from app.repositories.base import BaseRepository, run_repository_method
+from app.utils.cache import TTLCache
+
+_NOT_FOUND = "null"  # Cached marker for lookups that found nothing
+
+
+@dataclass
+class CachedUser:
+    """
+    Public fields of a user as held in the cache. There is deliberately no password hash.
+    """
+    id: Union[int, str]
+    name: str
+    email: str
+    role: str
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    token_version: int = 0
+
+    @classmethod
+    def from_user(cls, user) -> "CachedUser":
+        if isinstance(user, dict):  # MongoDB documents
+            return cls(
+                id=str(user["_id"]),
+                name=user["name"],
+                email=user["email"],
+                role=user.get("role", "user"),
+                created_at=user.get("created_at"),
+                updated_at=user.get("updated_at"),
+                token_version=user.get("token_version", 0),
+            )
+        return cls(
+            id=user.id,
+            name=user.name,
+            email=user.email,
+            role=user.role,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            token_version=user.token_version,
+        )
+
+    def dumps(self) -> str:
+        return json.dumps(asdict(self), default=lambda value: value.isoformat())
+
+    @classmethod
+    def loads(cls, raw: str) -> "CachedUser":
+        data = json.loads(raw)
+        for field in ("created_at", "updated_at"):
+            if data[field] is not None:
+                data[field] = datetime.fromisoformat(data[field])
+        return cls(**data)
+
+
+class CacheBackend(ABC):
+    """
+    Minimal async key/value store holding serialised entries.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU with per-entry TTL. Invalidation is only seen by this process.
+    """
+
+    def __init__(self, maxsize: int):
+        self.cache = TTLCache(maxsize=maxsize, ttl=settings.USER_CACHE_TTL)
+
+    async def get(self, key: str) -> Optional[str]:
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self.cache.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.cache.delete(key)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Shared store speaking the Redis protocol, e.g. a `redis.asyncio.Redis` client.
+    Any object with async `get`, `set(key, value, px=...)` and `delete(*keys)` will do.
+    """
+
+    def __init__(self, client, prefix: str = "users:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.client.get(self.prefix + key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self.client.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+
+class CacheStats:
+    """
+    Process-wide hit/miss counters across all cached repositories.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+        USER_CACHE_OUTCOMES[outcome].inc()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+            }
+
+
+user_cache_stats = CacheStats()
+
+
+def create_user_cache_backend() -> Optional[CacheBackend]:
+    """
+    Build the backend selected by `USER_CACHE_BACKEND`, or None when caching is off.
+    """
+    if settings.USER_CACHE_BACKEND == "memory":
+        return MemoryCacheBackend(maxsize=settings.USER_CACHE_SIZE)
+    if settings.USER_CACHE_BACKEND == "redis":
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise ValueError("USER_CACHE_BACKEND=redis requires the 'redis' package.")
+        return RedisCacheBackend(redis.from_url(settings.REDIS_URL))
+    return None
+
+
+class CachedUserRepository(BaseRepository):
+    """
+    Decorator adding a read-through cache in front of another user repository.
+    """
+
+    def __init__(self, repository: BaseRepository, backend: CacheBackend):
+        self.repository = repository
+        self.backend = backend
+
+    @staticmethod
+    def _id_key(id) -> str:
+        return f"id:{id}"
+
+    @staticmethod
+    def _email_key(email: str) -> str:
+        return f"email:{email.strip().lower()}"
+
+    async def get_by_id(self, id) -> Optional[CachedUser]:
+        raw = await self.backend.get(self._id_key(id))
+        if raw == _NOT_FOUND:
+            user_cache_stats.record("negative_hits")
+            return None
+        if raw is not None:
+            user_cache_stats.record("hits")
+            return CachedUser.loads(raw)
+
+        user_cache_stats.record("misses")
+        user = await run_repository_method(self.repository.get_by_id, id)
+        if user is None:
+            await self.backend.set(self._id_key(id), _NOT_FOUND, settings.USER_CACHE_NEGATIVE_TTL)
+            return None
+        cached = CachedUser.from_user(user)
+        await self.backend.set(self._id_key(id), cached.dumps(), settings.USER_CACHE_TTL)
+        return cached
+
+    async def get_by_email(self, email: str):
+        key = self._email_key(email)
+        if await self.backend.get(key) == _NOT_FOUND:
+            user_cache_stats.record("negative_hits")
+            return None
+
+        # Always a fresh read: callers of this need the password hash, which is never cached
+        user_cache_stats.record("misses")
+        user = await run_repository_method(self.repository.get_by_email, email)
+        if user is None:
+            await self.backend.set(key, _NOT_FOUND, settings.USER_CACHE_NEGATIVE_TTL)
+            return None
+        cached = CachedUser.from_user(user)
+        await self.backend.set(self._id_key(cached.id), cached.dumps(), settings.USER_CACHE_TTL)
+        return user
+
+    async def get_all(self, skip: int = 0, limit: int = 100, after_id=None, filters=None, after_key=None) -> list:
+        return await run_repository_method(
+            self.repository.get_all, skip=skip, limit=limit, after_id=after_id, filters=filters, after_key=after_key
+        )
+
+    async def count(self, exact_below: int, filters=None) -> Tuple[int, bool]:
+        return await run_repository_method(self.repository.count, exact_below, filters)
+
+    async def get_version(self, id) -> Optional[datetime]:
+        raw = await self.backend.get(self._id_key(id))
+        if raw is not None and raw != _NOT_FOUND:
+            return CachedUser.loads(raw).updated_at
+        return await run_repository_method(self.repository.get_version, id)
+
+    async def get_page_versions(
+        self, skip: int = 0, limit: int = 100, after_id=None, filters=None, after_key=None
+    ) -> List[Tuple]:
+        return await run_repository_method(
+            self.repository.get_page_versions,
+            skip=skip, limit=limit, after_id=after_id, filters=filters, after_key=after_key,
+        )
+
+    def iter_all(self, batch_size: int = 1000) -> Union[Iterator, AsyncIterator]:
+        return self.repository.iter_all(batch_size)
+
+    async def get_existing_emails(self, emails: List[str]) -> Set[str]:
+        return await run_repository_method(self.repository.get_existing_emails, emails)
+
+    async def create(self, obj_data: dict):
+        user = await run_repository_method(self.repository.create, obj_data)
+        if user is not None:
+            await self.backend.delete(self._email_key(obj_data["email"]), self._id_key(CachedUser.from_user(user).id))
+        return user
+
+    async def create_many(self, objs: List[dict]) -> Dict[str, Union[int, str]]:
+        created = await run_repository_method(self.repository.create_many, objs)
+        await self.backend.delete(*(self._email_key(email) for email in created))
+        return created
+
+    async def update(self, id, obj_data: dict):
+        user = await run_repository_method(self.repository.update, id, obj_data)
+        keys = [self._id_key(id)]
+        if obj_data.get("email"):
+            keys.append(self._email_key(obj_data["email"]))
+        await self.backend.delete(*keys)
+        return user
+
+    async def delete(self, id) -> bool:
+        deleted = await run_repository_method(self.repository.delete, id)
+        await self.backend.delete(self._id_key(id))
+        return deleted
@@ -1,9 +1,54 @@
+import re
+from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from app.repositories.base import BaseRepository
-from typing import List, Optional
-from app.schemas.user import UserOut
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from app.schemas.user import UserFilter, UserOut
 from bson import ObjectId
-from app.utils.security import hash_password
+from app.utils.security import hash_password_async
+
+SORT_FIELDS = {"id": "_id", "created_at": "created_at", "name": "name", "email": "email"}
+
+
+def list_users_query(
+    filters: Optional[UserFilter] = None, after_id: Optional[str] = None, after_key: Any = None
+) -> Tuple[dict, list]:
+    """
+    Build the find() filter and sort for a list page. Role/created_at use the compound
+    index; anchored (prefix) regexes on name and email are bounded scans of their indexes.
+    Unanchored (match=contains) regexes scan every index key.
+    """
+    filters = filters or UserFilter()
+    query: Dict[str, Any] = {}
+    if filters.role is not None:
+        query["role"] = filters.role
+    created_at = {}
+    if filters.created_after is not None:
+        created_at["$gte"] = filters.created_after
+    if filters.created_before is not None:
+        created_at["$lt"] = filters.created_before
+    if created_at:
+        query["created_at"] = created_at
+    anchor = "^" if filters.match == "prefix" else ""
+    if filters.name is not None:
+        query["name"] = {"$regex": anchor + re.escape(filters.name), "$options": "i"}
+    if filters.email is not None:
+        query["email"] = {"$regex": anchor + re.escape(filters.email.lower())}
+
+    field = SORT_FIELDS[filters.sort_field]
+    direction = -1 if filters.descending else 1
+    if after_id is not None:
+        op = "$lt" if filters.descending else "$gt"
+        if field == "_id":
+            position = {"_id": {op: ObjectId(after_id)}}
+        else:
+            position = {"$or": [{field: {op: after_key}}, {field: after_key, "_id": {op: ObjectId(after_id)}}]}
+        query = {"$and": [query, position]} if query else position
+    sort = [(field, direction)] if field == "_id" else [(field, direction), ("_id", direction)]
+    return query, sort
+
 
 class UserNoSQLRepository(BaseRepository[UserOut]):
     """
@@ -19,19 +64,123 @@ class UserNoSQLRepository(BaseRepository[UserOut]):
     async def get_by_email(self, email: str) -> Optional[dict]:
         return await self.db.find_one({"email": email.lower()})
 
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[dict]:
-        return await self.db.find().skip(skip).limit(limit).to_list(length=limit)
+    async def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[str] = None,
+        filters: Optional[UserFilter] = None,
+        after_key: Any = None,
+    ) -> List[dict]:
+        # With after_id, a range scan on the sort index instead of skipping documents
+        query, sort = list_users_query(filters, after_id, after_key)
+        cursor = self.db.find(query).sort(sort)
+        if after_id is None:
+            cursor = cursor.skip(skip)
+        return await cursor.limit(limit).to_list(length=limit)
+
+    async def count(self, exact_below: int, filters: Optional[UserFilter] = None) -> Tuple[int, bool]:
+        if filters is not None and filters.is_filtered():
+            query, _ = list_users_query(filters)
+            matched = await self.db.count_documents(query, limit=exact_below)
+            return matched, matched < exact_below
+        # Read from collection metadata, no scan
+        estimate = await self.db.estimated_document_count()
+        if estimate >= exact_below:
+            return estimate, False
+        return await self.db.count_documents({}), True
+
+    async def get_version(self, id: str) -> Optional[datetime]:
+        document = await self.db.find_one({"_id": ObjectId(id)}, {"updated_at": 1})
+        return document["updated_at"] if document else None
+
+    async def get_page_versions(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[str] = None,
+        filters: Optional[UserFilter] = None,
+        after_key: Any = None,
+    ) -> List[Tuple[str, datetime, Any]]:
+        query, sort = list_users_query(filters, after_id, after_key)
+        field = sort[0][0]
+        cursor = self.db.find(query, {"updated_at": 1, field: 1}).sort(sort)
+        if after_id is None:
+            cursor = cursor.skip(skip)
+        documents = await cursor.limit(limit).to_list(length=limit)
+        return [
+            (str(document["_id"]), document.get("updated_at"), document.get(field))
+            for document in documents
+        ]
+
+    async def iter_all(self, batch_size: int = 1000) -> AsyncIterator[dict]:
+        async for document in self.db.find().sort("_id", 1).batch_size(batch_size):
+            yield document
+
+    async def create(self, obj_data: dict) -> Optional[dict]:
+        hashed_password = obj_data.get("hashed_password") or await hash_password_async(obj_data["password"])
+        now = datetime.now(timezone.utc)
+        document = {
+            "name": obj_data["name"].strip(),
+            "email": obj_data["email"].strip().lower(),
+            "hashed_password": hashed_password,
+            "role": obj_data.get("role") or "user",
+            "token_version": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        try:
+            # The unique email index settles concurrent signups
+            await self.db.insert_one(document)
+        except DuplicateKeyError:
+            return None
+        return document  # insert_one assigns _id on the document client-side
+
+    async def create_many(self, objs: List[dict]) -> Dict[str, str]:
+        if not objs:
+            return {}
+        now = datetime.now(timezone.utc)
+        documents = [
+            {
+                "name": obj["name"].strip(),
+                "email": obj["email"].strip().lower(),
+                "hashed_password": obj["hashed_password"],
+                "role": obj.get("role") or "user",
+                "token_version": 0,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for obj in objs
+        ]
+        failed = set()
+        try:
+            # Unordered, so one duplicate does not stop the rest of the batch
+            await self.db.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error["code"] != 11000 for error in errors):
+                raise
+            failed = {error["index"] for error in errors}
+        # insert_many assigns _id on the documents client-side
+        return {doc["email"]: str(doc["_id"]) for i, doc in enumerate(documents) if i not in failed}
 
-    async def create(self, obj_data: dict) -> dict:
-        obj_data["hashed_password"] = hash_password(obj_data["password"])
-        obj_data.pop("password", None)  # Remove plain password
-        result = await self.db.insert_one(obj_data)
-        return await self.get_by_id(result.inserted_id)
+    async def get_existing_emails(self, emails: List[str]) -> Set[str]:
+        if not emails:
+            return set()
+        cursor = self.db.find({"email": {"$in": emails}}, {"email": 1, "_id": 0})
+        return {doc["email"] async for doc in cursor}
 
     async def update(self, id: str, obj_data: dict) -> Optional[dict]:
-        await self.db.update_one({"_id": ObjectId(id)}, {"$set": obj_data})
-        return await self.get_by_id(id)
+        values = {key: value for key, value in obj_data.items() if value is not None}
+        if "email" in values:
+            values["email"] = values["email"].strip().lower()
+        changes = {"$set": {**values, "updated_at": datetime.now(timezone.utc)}}
+        if values.get("role") is not None:
+            changes["$inc"] = {"token_version": 1}  # Invalidates tokens carrying the old role
+        return await self.db.find_one_and_update(
+            {"_id": ObjectId(id)}, changes, return_document=ReturnDocument.AFTER
+        )
 
     async def delete(self, id: str) -> bool:
-        result = await self.db.delete_one({"_id": ObjectId(id)})
-        return result.deleted_count > 0
+        deleted = await self.db.find_one_and_delete({"_id": ObjectId(id)}, projection={"_id": 1})
+        return deleted is not None
@@ -1,56 +1,261 @@
+from sqlalchemy import case, delete, func, insert, select, text, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.db.models import User
+from app.schemas.user import UserFilter
 from app.repositories.base import BaseRepository
 from app.utils.security import hash_password
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+
+def insert_ignoring_duplicates(dialect_name: str):
+    """
+    INSERT into users that skips rows whose email already exists, where the dialect supports it.
+    """
+    if dialect_name == "postgresql":
+        return postgresql.insert(User).on_conflict_do_nothing(index_elements=[User.email])
+    if dialect_name == "sqlite":
+        return sqlite.insert(User).on_conflict_do_nothing(index_elements=[User.email])
+    return insert(User)
+
+
+def new_user_values(obj_data: dict) -> dict:
+    """
+    Column values for a new user row from a dict carrying a precomputed `hashed_password`.
+    """
+    return {
+        "name": obj_data["name"].strip(),
+        "email": obj_data["email"].strip().lower(),
+        "hashed_password": obj_data["hashed_password"],
+        "role": obj_data.get("role") or "user",
+    }
+
+
+def update_user_statement(id: int, obj_data: dict):
+    """
+    A single UPDATE ... RETURNING for one user, or None when there is nothing to change.
+    """
+    values = {key: value for key, value in obj_data.items() if value is not None}
+    if not values:
+        return None
+    if "email" in values:
+        values["email"] = values["email"].strip().lower()
+    if "role" in values:
+        # SET expressions see the pre-update row, so this only bumps on an actual role change,
+        # invalidating tokens that carry the old role
+        values["token_version"] = case(
+            (User.role != values["role"], User.token_version + 1), else_=User.token_version
+        )
+    return (
+        update(User)
+        .where(User.id == id)
+        .values(**values)
+        .returning(User)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+
+
+def delete_user_statement(id: int):
+    """
+    A single DELETE ... RETURNING for one user.
+    """
+    return (
+        delete(User)
+        .where(User.id == id)
+        .returning(User.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def estimated_count_statement(dialect_name: str):
+    """
+    Planner row estimate for users, where the dialect keeps one (PostgreSQL's reltuples).
+    """
+    if dialect_name == "postgresql":
+        return text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'users'::regclass")
+    return None
+
+
+SORT_COLUMNS = {"id": User.id, "created_at": User.created_at, "name": User.name, "email": User.email}
+
+
+def like_pattern(value: str, match: str) -> str:
+    """
+    LIKE pattern for a prefix or substring match, with wildcards in `value` escaped.
+    """
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%" if match == "prefix" else f"%{escaped}%"
+
+
+def filter_users_query(
+    query, filters: Optional[UserFilter] = None, after_id: Optional[int] = None, after_key: Any = None
+):
+    """
+    Apply list filters, the requested order (ties broken by id) and, for keyset
+    pages, the position after the `(after_key, after_id)` the client last saw.
+
+    Role and created_at are served by btree indexes; name and email matches by
+    the trigram GIN indexes on PostgreSQL.
+    """
+    filters = filters or UserFilter()
+    if filters.role is not None:
+        query = query.where(User.role == filters.role)
+    if filters.created_after is not None:
+        query = query.where(User.created_at >= filters.created_after)
+    if filters.created_before is not None:
+        query = query.where(User.created_at < filters.created_before)
+    if filters.name is not None:
+        query = query.where(User.name.ilike(like_pattern(filters.name, filters.match), escape="\\"))
+    if filters.email is not None:
+        # Emails are stored lowercased, so a case-sensitive LIKE is enough
+        query = query.where(User.email.like(like_pattern(filters.email.lower(), filters.match), escape="\\"))
+
+    column = SORT_COLUMNS[filters.sort_field]
+    if after_id is not None:
+        if column is User.id:
+            position = (User.id, after_id)
+        else:
+            # Typed so the key binds in the column's storage format
+            after = tuple_(after_key, after_id, types=[column.type, User.id.type])
+            position = (tuple_(column, User.id), after)
+        query = query.where(position[0] < position[1] if filters.descending else position[0] > position[1])
+
+    order = [column] if column is User.id else [column, User.id]
+    return query.order_by(*(item.desc() if filters.descending else item for item in order))
+
+
+def list_users_query(
+    skip: int, limit: int, after_id: Optional[int], filters: Optional[UserFilter], after_key: Any
+):
+    """
+    SELECT for one list page, keyset based when `after_id` is given.
+    """
+    query = filter_users_query(select(User), filters, after_id, after_key)
+    return (query if after_id is not None else query.offset(skip)).limit(limit)
+
+
+def exact_count_statement(filters: Optional[UserFilter] = None, cap: Optional[int] = None):
+    """
+    COUNT(*) over users, or over at most `cap` rows matching `filters` so that a
+    broad filter stops counting early.
+    """
+    if filters is None or not filters.is_filtered():
+        return select(func.count()).select_from(User)
+    matching = filter_users_query(select(User.id), filters).order_by(None).limit(cap)
+    return select(func.count()).select_from(matching.subquery())
+
+
+def page_versions_query(
+    skip: int, limit: int, after_id: Optional[int], filters: Optional[UserFilter] = None, after_key: Any = None
+):
+    """
+    SELECT id, updated_at and the sort key for the page `get_all` would return, without loading full rows.
+    """
+    sort_key = SORT_COLUMNS[(filters or UserFilter()).sort_field].label("sort_key")
+    query = filter_users_query(select(User.id, User.updated_at, sort_key), filters, after_id, after_key)
+    return (query if after_id is not None else query.offset(skip)).limit(limit)
+
 
 class UserSQLRepository(BaseRepository[User]):
     """
     User repository for SQL-based databases (PostgreSQL, MySQL).
+
+    Reads go to `read_db` (a replica) when given, writes always go to `db`.
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, read_db: Optional[Session] = None):
         self.db = db
+        self.read_db = read_db if read_db is not None else db
 
     def get_by_id(self, id: int) -> Optional[User]:
-        return self.db.query(User).filter(User.id == id).first()
+        return self.read_db.query(User).filter(User.id == id).first()
 
     def get_by_email(self, email: str) -> Optional[User]:
-        return self.db.query(User).filter(User.email == email.lower()).first()
+        return self.read_db.query(User).filter(User.email == email.lower()).first()
+
+    def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+        filters: Optional[UserFilter] = None,
+        after_key: Any = None,
+    ) -> List[User]:
+        return self.read_db.scalars(list_users_query(skip, limit, after_id, filters, after_key)).all()
+
+    def count(self, exact_below: int, filters: Optional[UserFilter] = None) -> Tuple[int, bool]:
+        if filters is not None and filters.is_filtered():
+            matched = self.read_db.scalar(exact_count_statement(filters, cap=exact_below))
+            return matched, matched < exact_below
+        estimate_stmt = estimated_count_statement(self.read_db.get_bind().dialect.name)
+        if estimate_stmt is not None:
+            # reltuples is -1 until the table is first analysed
+            estimate = self.read_db.scalar(estimate_stmt)
+            if estimate is not None and estimate >= exact_below:
+                return estimate, False
+        return self.read_db.scalar(exact_count_statement()), True
+
+    def get_version(self, id: int) -> Optional[datetime]:
+        return self.read_db.scalar(select(User.updated_at).where(User.id == id))
+
+    def get_page_versions(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+        filters: Optional[UserFilter] = None,
+        after_key: Any = None,
+    ) -> List[Tuple[int, datetime, Any]]:
+        return self.read_db.execute(page_versions_query(skip, limit, after_id, filters, after_key)).all()
 
-    def get_all(self, skip: int = 0, limit: int = 100) -> List[User]:
-        return self.db.query(User).offset(skip).limit(limit).all()
+    def iter_all(self, batch_size: int = 1000) -> Iterator[User]:
+        # yield_per streams results (server-side cursor on PostgreSQL) in fixed-size batches
+        query = select(User).order_by(User.id).execution_options(yield_per=batch_size)
+        yield from self.read_db.scalars(query)
 
-    def create(self, obj_data: dict) -> User:
-        new_user = User(
-            name=obj_data["name"].strip(),
-            email=obj_data["email"].strip().lower(),
-            hashed_password=hash_password(obj_data["password"]),
-            role=obj_data.get("role", "user")
+    def create(self, obj_data: dict) -> Optional[User]:
+        if not obj_data.get("hashed_password"):
+            obj_data = {**obj_data, "hashed_password": hash_password(obj_data["password"])}
+        # INSERT ... ON CONFLICT (email) DO NOTHING RETURNING: one round trip, and the
+        # unique index rather than a prior lookup decides between concurrent signups
+        stmt = (
+            insert_ignoring_duplicates(self.db.get_bind().dialect.name)
+            .values(**new_user_values(obj_data))
+            .returning(User)
         )
-        self.db.add(new_user)
-        self.db.commit()
-        self.db.refresh(new_user)
+        try:
+            new_user = self.db.scalars(stmt).first()
+            self.db.commit()
+        except IntegrityError:  # Dialects without ON CONFLICT support
+            self.db.rollback()
+            return None
         return new_user
 
+    def create_many(self, objs: List[dict]) -> Dict[str, int]:
+        if not objs:
+            return {}
+        # One multi-row INSERT ... RETURNING per batch instead of a round trip per user
+        stmt = insert_ignoring_duplicates(self.db.get_bind().dialect.name).returning(User.id, User.email)
+        created = {email: id for id, email in self.db.execute(stmt, [new_user_values(obj) for obj in objs])}
+        self.db.commit()
+        return created
+
+    def get_existing_emails(self, emails: List[str]) -> Set[str]:
+        if not emails:
+            return set()
+        return set(self.read_db.scalars(select(User.email).where(User.email.in_(emails))))
+
     def update(self, id: int, obj_data: dict) -> Optional[User]:
-        user = self.get_by_id(id)
-        if not user:
-            return None
-        
-        for key, value in obj_data.items():
-            if value is not None:
-                setattr(user, key, value)
-        
+        stmt = update_user_statement(id, obj_data)
+        if stmt is None:
+            return self.get_by_id(id)
+        user = self.db.scalars(stmt).first()
         self.db.commit()
-        self.db.refresh(user)
         return user
 
     def delete(self, id: int) -> bool:
-        user = self.get_by_id(id)
-        if not user:
-            return False
-
-        self.db.delete(user)
+        deleted = self.db.execute(delete_user_statement(id)).first()
         self.db.commit()
-        return True
+        return deleted is not None
@@ -0,0 +1,124 @@
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import User
+from app.schemas.user import UserFilter
+from app.repositories.base import BaseRepository
+from app.repositories.user_sql import (
+    delete_user_statement,
+    estimated_count_statement,
+    exact_count_statement,
+    insert_ignoring_duplicates,
+    list_users_query,
+    new_user_values,
+    page_versions_query,
+    update_user_statement,
+)
+from app.utils.security import hash_password_async
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+class AsyncUserSQLRepository(BaseRepository[User]):
+    """
+    User repository for SQL databases over asyncio drivers (asyncpg, aiosqlite).
+
+    Queries run on the event loop, so in-flight requests do not hold threadpool slots.
+    Reads go to `read_db` (a replica) when given, writes always go to `db`.
+    """
+
+    def __init__(self, db: AsyncSession, read_db: Optional[AsyncSession] = None):
+        self.db = db
+        self.read_db = read_db if read_db is not None else db
+
+    async def get_by_id(self, id: int) -> Optional[User]:
+        return await self.read_db.scalar(select(User).where(User.id == id))
+
+    async def get_by_email(self, email: str) -> Optional[User]:
+        return await self.read_db.scalar(select(User).where(User.email == email.lower()))
+
+    async def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+        filters: Optional[UserFilter] = None,
+        after_key: Any = None,
+    ) -> List[User]:
+        result = await self.read_db.scalars(list_users_query(skip, limit, after_id, filters, after_key))
+        return result.all()
+
+    async def count(self, exact_below: int, filters: Optional[UserFilter] = None) -> Tuple[int, bool]:
+        if filters is not None and filters.is_filtered():
+            matched = await self.read_db.scalar(exact_count_statement(filters, cap=exact_below))
+            return matched, matched < exact_below
+        estimate_stmt = estimated_count_statement(self.read_db.get_bind().dialect.name)
+        if estimate_stmt is not None:
+            # reltuples is -1 until the table is first analysed
+            estimate = await self.read_db.scalar(estimate_stmt)
+            if estimate is not None and estimate >= exact_below:
+                return estimate, False
+        return await self.read_db.scalar(exact_count_statement()), True
+
+    async def get_version(self, id: int) -> Optional[datetime]:
+        return await self.read_db.scalar(select(User.updated_at).where(User.id == id))
+
+    async def get_page_versions(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+        filters: Optional[UserFilter] = None,
+        after_key: Any = None,
+    ) -> List[Tuple[int, datetime, Any]]:
+        result = await self.read_db.execute(page_versions_query(skip, limit, after_id, filters, after_key))
+        return result.all()
+
+    async def iter_all(self, batch_size: int = 1000) -> AsyncIterator[User]:
+        query = select(User).order_by(User.id).execution_options(yield_per=batch_size)
+        async for user in await self.read_db.stream_scalars(query):
+            yield user
+
+    async def create(self, obj_data: dict) -> Optional[User]:
+        if not obj_data.get("hashed_password"):
+            # On the event loop: hash on the bcrypt pool, never inline
+            obj_data = {**obj_data, "hashed_password": await hash_password_async(obj_data["password"])}
+        stmt = (
+            insert_ignoring_duplicates(self.db.get_bind().dialect.name)
+            .values(**new_user_values(obj_data))
+            .returning(User)
+        )
+        try:
+            new_user = (await self.db.scalars(stmt)).first()
+            await self.db.commit()
+        except IntegrityError:  # Dialects without ON CONFLICT support
+            await self.db.rollback()
+            return None
+        return new_user
+
+    async def create_many(self, objs: List[dict]) -> Dict[str, int]:
+        if not objs:
+            return {}
+        stmt = insert_ignoring_duplicates(self.db.get_bind().dialect.name).returning(User.id, User.email)
+        result = await self.db.execute(stmt, [new_user_values(obj) for obj in objs])
+        created = {email: id for id, email in result}
+        await self.db.commit()
+        return created
+
+    async def get_existing_emails(self, emails: List[str]) -> Set[str]:
+        if not emails:
+            return set()
+        result = await self.read_db.scalars(select(User.email).where(User.email.in_(emails)))
+        return set(result)
+
+    async def update(self, id: int, obj_data: dict) -> Optional[User]:
+        stmt = update_user_statement(id, obj_data)
+        if stmt is None:
+            return await self.get_by_id(id)
+        user = (await self.db.scalars(stmt)).first()
+        await self.db.commit()
+        return user
+
+    async def delete(self, id: int) -> bool:
+        deleted = (await self.db.execute(delete_user_statement(id))).first()
+        await self.db.commit()
+        return deleted is not None
@@ -9,3 +9,12 @@ class SignInRequest(BaseModel):
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
+
+
+class Principal(BaseModel):
+    """
+    Identity built from verified token claims, without a database lookup.
+    """
+    id: int
+    role: str
+    ver: int = 0  # Token version the claims were issued at
@@ -2,8 +2,8 @@
 Pydantic schemas for User model.
 """
 
-from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
+from typing import List, Literal, Optional, Union
 from datetime import datetime
 
 
@@ -35,15 +35,39 @@ class UserCreate(BaseModel):
 class UserOut(BaseModel):
     id: int
     name: str
-    email: EmailStr
+    # Validated as EmailStr on the way in; re-running email validation per output row
+    # was most of the cost of serialising large pages
+    email: str = Field(..., json_schema_extra={"format": "email"})
     role: str  # Added role
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        model_config = {
-            "from_attributes": True
-        }  # Tells Pydantic to convert ORM objects to JSON
+    model_config = ConfigDict(from_attributes=True)  # Tells Pydantic to convert ORM objects to JSON
+
+
+# Query parameters for filtering and sorting the user list
+class UserFilter(BaseModel):
+    role: Optional[str] = None
+    created_after: Optional[datetime] = None  # Inclusive
+    created_before: Optional[datetime] = None  # Exclusive
+    name: Optional[str] = None  # Case-insensitive
+    email: Optional[str] = None
+    match: Literal["prefix", "contains"] = "prefix"  # How name and email are matched
+    sort: Literal["id", "-id", "created_at", "-created_at", "name", "-name", "email", "-email"] = "id"
+
+    @property
+    def sort_field(self) -> str:
+        return self.sort.lstrip("-")
+
+    @property
+    def descending(self) -> bool:
+        return self.sort.startswith("-")
+
+    def is_filtered(self) -> bool:
+        return any(
+            value is not None
+            for value in (self.role, self.created_after, self.created_before, self.name, self.email)
+        )
 
 
 # Schema for updating an existing user
@@ -57,3 +81,20 @@ class UserUpdate(BaseModel):
     @classmethod
     def strip_email(cls, v):
         return v.strip() if v else v
+
+
+# Schema for the outcome of one row in a bulk import
+class UserImportRow(BaseModel):
+    line: int
+    status: str  # "created", "duplicate" or "invalid"
+    email: Optional[str] = None
+    id: Optional[Union[int, str]] = None
+    error: Optional[str] = None
+
+
+# Schema for a bulk import summary
+class UserImportResult(BaseModel):
+    created: int
+    duplicates: int
+    invalid: int
+    results: List[UserImportRow]
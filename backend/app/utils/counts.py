@@ -0,0 +1,40 @@
+"""
+Cached total user count for list responses.
+
+The count is shared by every list request for `USER_COUNT_CACHE_SECONDS`, and is
+dropped as soon as this process creates, updates or deletes users. Other workers see
+such changes when their own entry expires.
+"""
+
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.repositories.base import BaseRepository, run_repository_method
+from app.schemas.user import UserFilter
+from app.utils.cache import TTLCache
+
+count_cache = TTLCache(maxsize=256, ttl=settings.USER_COUNT_CACHE_SECONDS)
+
+
+async def total_users(user_repo: BaseRepository, filters: Optional[UserFilter] = None) -> Tuple[int, bool]:
+    """
+    Return `(total, exact)`, counting exactly only below `USER_COUNT_EXACT_THRESHOLD`.
+    Each distinct filter combination is cached separately.
+    """
+    if filters is not None and filters.is_filtered():
+        key = filters.model_dump_json(exclude={"sort"})
+    else:
+        key, filters = "users", None
+    cached = count_cache.get(key)
+    if cached is not None:
+        return cached
+    total = await run_repository_method(user_repo.count, settings.USER_COUNT_EXACT_THRESHOLD, filters)
+    count_cache.set(key, total)
+    return total
+
+
+def invalidate_user_count() -> None:
+    """
+    Forget the cached totals after users are created, updated or deleted.
+    """
+    count_cache.clear()
@@ -0,0 +1,88 @@
+"""
+Streaming encoders for bulk user exports.
+
+Rows are encoded one at a time and grouped into chunks of roughly
+`chunk_size` bytes, so memory use does not depend on the table size and a
+sync source is only hopped onto the threadpool once per chunk.
+"""
+
+import csv
+import io
+from typing import AsyncIterator, Iterable, Iterator, Union
+
+from app.schemas.user import UserOut
+
+EXPORT_FIELDS = list(UserOut.model_fields)
+
+
+class NDJSONEncoder:
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def header(self) -> str:
+        return ""
+
+    def row(self, user) -> str:
+        return UserOut.model_validate(user, from_attributes=True).model_dump_json() + "\n"
+
+
+class CSVEncoder:
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _line(self, values) -> str:
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._writer.writerow(values)
+        return self._buffer.getvalue()
+
+    def header(self) -> str:
+        return self._line(EXPORT_FIELDS)
+
+    def row(self, user) -> str:
+        data = UserOut.model_validate(user, from_attributes=True).model_dump(mode="json")
+        return self._line([data[field] for field in EXPORT_FIELDS])
+
+
+ENCODERS = {"ndjson": NDJSONEncoder, "csv": CSVEncoder}
+
+
+def _chunks(rows: Iterable, encoder, chunk_size: int) -> Iterator[bytes]:
+    parts, size = [encoder.header()], 0
+    for user in rows:
+        line = encoder.row(user)
+        parts.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield "".join(parts).encode()
+            parts, size = [], 0
+    if parts:
+        yield "".join(parts).encode()
+
+
+async def _chunks_async(rows: AsyncIterator, encoder, chunk_size: int) -> AsyncIterator[bytes]:
+    parts, size = [encoder.header()], 0
+    async for user in rows:
+        line = encoder.row(user)
+        parts.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield "".join(parts).encode()
+            parts, size = [], 0
+    if parts:
+        yield "".join(parts).encode()
+
+
+def encode_rows(
+    rows: Union[Iterable, AsyncIterator], encoder, chunk_size: int = 64 * 1024
+) -> Union[Iterator[bytes], AsyncIterator[bytes]]:
+    """
+    Encode users from a sync or async iterator into byte chunks for a StreamingResponse.
+    """
+    if hasattr(rows, "__aiter__"):
+        return _chunks_async(rows, encoder, chunk_size)
+    return _chunks(rows, encoder, chunk_size)
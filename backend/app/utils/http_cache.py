@@ -0,0 +1,84 @@
+"""
+Conditional GET support: validators for user resources and 304 handling.
+
+A user's version is `(id, updated_at)`; a page's version is the ordered list of
+its rows' versions, so inserts, deletes and edits within the page all change it.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional, Tuple
+
+from fastapi import Request, Response, status
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; the columns are stored in UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def make_etag(versions: Iterable[Tuple[object, Optional[datetime]]]) -> str:
+    """
+    Strong ETag over one or more `(id, updated_at)` pairs; any further items are ignored.
+    """
+    digest = hashlib.sha256()
+    for id, updated_at, *_ in versions:
+        stamp = _utc(updated_at).isoformat() if updated_at is not None else ""
+        digest.update(f"{id}@{stamp};".encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def last_modified(versions: Iterable[Tuple[object, Optional[datetime]]]) -> Optional[datetime]:
+    """
+    Latest `updated_at` among the given versions, if any.
+    """
+    stamps = [_utc(updated_at) for _, updated_at, *_ in versions if updated_at is not None]
+    return max(stamps) if stamps else None
+
+
+def validator_headers(etag: str, modified: Optional[datetime]) -> dict:
+    """
+    `ETag` and `Last-Modified` headers for a response. Clients may store it but must revalidate.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if modified is not None:
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, modified: Optional[datetime]) -> bool:
+    """
+    Whether the request's validators still match. `If-None-Match` takes precedence
+    over `If-Modified-Since`, as in RFC 9110.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison is what RFC 9110 prescribes for If-None-Match
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have one-second resolution
+    return modified.replace(microsecond=0) <= since
+
+
+def has_conditional_headers(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def not_modified(etag: str, modified: Optional[datetime]) -> Response:
+    """
+    Empty 304 response carrying the current validators.
+    """
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag, modified))
@@ -0,0 +1,140 @@
+"""
+Streaming decoders for bulk user imports.
+
+The request body is decoded incrementally and handed out in batches of
+parsed rows, so an import of any size only keeps one batch in memory.
+CSV goes through a single `csv.reader`, so quoted fields may span lines.
+"""
+
+import codecs
+import csv
+import json
+from collections import deque
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+
+# (line number, parsed row or None, parse error or None)
+ImportRow = Tuple[int, Optional[dict], Optional[str]]
+
+
+class ImportDecodeError(ValueError):
+    """
+    The body is not valid UTF-8.
+    """
+
+    def __init__(self, line: int):
+        super().__init__(f"Invalid UTF-8 on line {line}.")
+        self.line = line
+
+
+class _PendingLines:
+    """
+    Lines handed to the CSV reader, refilled as the body arrives.
+
+    Lines are only added up to the end of a record, so the reader never runs
+    dry in the middle of one.
+    """
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Yield (line number, line) with line endings kept.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    line_number = 0
+    async for chunk in chunks:
+        buffered = len(decoder.getstate()[0])
+        try:
+            pending += decoder.decode(chunk)
+        except UnicodeDecodeError as e:
+            newlines = pending.count("\n") + chunk[:max(0, e.start - buffered)].count(b"\n")
+            raise ImportDecodeError(line_number + newlines + 1) from e
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, line + "\n"
+    try:
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        raise ImportDecodeError(line_number + pending.count("\n") + 1) from e
+    if pending:
+        yield line_number + 1, pending
+
+
+def _parse_ndjson(line: str) -> Tuple[Optional[dict], Optional[str]]:
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError:
+        return None, "Invalid JSON"
+    if not isinstance(data, dict):
+        return None, "Expected a JSON object"
+    return data, None
+
+
+def _read_records(reader, pending: _PendingLines) -> Iterator[Tuple[int, Optional[List[str]], Optional[str]]]:
+    """
+    Read every record in `pending` as (first line number, values or None, error or None).
+    """
+    while pending.lines:
+        line_number = reader.line_num + 1
+        try:
+            yield line_number, next(reader), None
+        except csv.Error as e:
+            yield line_number, None, f"Invalid CSV: {e}"
+
+
+async def iter_import_batches(
+    chunks: AsyncIterator[bytes], format: str, batch_size: int
+) -> AsyncIterator[List[ImportRow]]:
+    """
+    Parse an NDJSON or CSV (with header) body into batches of rows. Blank lines are skipped.
+
+    Raises `ImportDecodeError` at the first byte that is not valid UTF-8.
+    """
+    batch: List[ImportRow] = []
+    header = None
+    pending = _PendingLines()
+    reader = csv.reader(pending)
+    in_quotes = False
+
+    def read_pending() -> None:
+        nonlocal header
+        for line_number, values, error in _read_records(reader, pending):
+            if error is not None:
+                batch.append((line_number, None, error))
+            elif not values or (len(values) == 1 and not values[0].strip()):
+                continue
+            elif header is None:
+                header = [name.strip() for name in values]
+            elif len(values) != len(header):
+                batch.append((line_number, None, f"Expected {len(header)} columns, got {len(values)}"))
+            else:
+                batch.append((line_number, dict(zip(header, values)), None))
+
+    async for line_number, line in _iter_lines(chunks):
+        if format == "csv":
+            pending.lines.append(line)
+            if line.count('"') % 2:
+                in_quotes = not in_quotes
+            if in_quotes:
+                continue  # A quoted field carries on to the next line
+            read_pending()
+        elif line.strip():
+            batch.append((line_number, *_parse_ndjson(line)))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    read_pending()  # A quote left open at the end of the body
+    if batch:
+        yield batch
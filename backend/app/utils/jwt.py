@@ -1,9 +1,38 @@
 """
 JWT utilities for token creation and verification.
+
+Verified payloads are cached by token digest until the token expires, so a
+client reusing its token only pays for the signature check once.
 """
+import hashlib
+import threading
+import time
+from typing import Optional
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 from app.core.config import settings
+from app.core.metrics import (
+    jwt_cache_hits,
+    jwt_cache_misses,
+    jwt_verify_cached,
+    jwt_verify_decoded,
+    jwt_verify_invalid,
+)
+from app.utils.cache import TTLCache
+
+# Verified payloads keyed by SHA-256 of the raw token
+token_cache = TTLCache(
+    maxsize=settings.JWT_CACHE_SIZE,
+    ttl=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+# user_id -> (minimum accepted "ver" claim or None for every token, wall-clock expiry)
+_revocations: dict = {}
+_revocations_lock = threading.Lock()
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
 
 
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
@@ -20,8 +49,66 @@ def verify_access_token(token: str) -> dict:
     """
     Verify a JWT token and return the payload.
     """
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        return payload
-    except JWTError:
-        raise ValueError("Invalid token")
+    started = time.perf_counter()
+    key = _token_key(token)
+    payload = token_cache.get(key)
+    timer = jwt_verify_cached
+    if payload is None:
+        jwt_cache_misses.inc()
+        try:
+            payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        except JWTError:
+            jwt_verify_invalid.observe(time.perf_counter() - started)
+            raise ValueError("Invalid token")
+        ttl = payload["exp"] - time.time() if "exp" in payload else None
+        if ttl is None or ttl > 0:
+            token_cache.set(key, payload, ttl=ttl)
+        timer = jwt_verify_decoded
+    else:
+        jwt_cache_hits.inc()
+    timer.observe(time.perf_counter() - started)
+    return dict(payload)  # Callers get a copy so the cached payload stays intact
+
+
+def invalidate_token(token: str) -> None:
+    """
+    Forget a cached verification, e.g. when a token is revoked.
+    """
+    token_cache.delete(_token_key(token))
+
+
+def clear_token_cache() -> None:
+    """
+    Forget every cached verification, e.g. after rotating the signing key.
+    """
+    token_cache.clear()
+
+
+def revoke_user_tokens(user_id: int, below_version: Optional[int] = None) -> None:
+    """
+    Reject a user's tokens whose "ver" claim is lower than `below_version`,
+    or all of their tokens when no version is given (e.g. the user was deleted).
+
+    Entries only need to outlive the tokens they reject, so they expire after
+    one token lifetime. The registry is per process; the token version stored
+    on the user row remains the authoritative check in `get_current_user`.
+    """
+    now = time.time()
+    expires_at = now + settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    with _revocations_lock:
+        for key in [key for key, (_, expiry) in _revocations.items() if expiry <= now]:
+            del _revocations[key]
+        _revocations[user_id] = (below_version, expires_at)
+
+
+def is_token_revoked(payload: dict) -> bool:
+    """
+    Check a verified payload against the revocation registry.
+    """
+    entry = _revocations.get(payload.get("user_id"))
+    if entry is None:
+        return False
+    below_version, expires_at = entry
+    if expires_at <= time.time():
+        return False
+    return below_version is None or payload.get("ver", 0) < below_version
@@ -0,0 +1,32 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor is the sort key of the last row a client has seen, encoded so that
+clients treat it as a token rather than something to build by hand.
+"""
+
+import base64
+import binascii
+import json
+
+
+def encode_cursor(values: dict) -> str:
+    """
+    Encode the last row's sort key as a URL-safe token.
+    """
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decode a token produced by `encode_cursor`. Raises ValueError if it is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, dict):
+        raise ValueError("Invalid cursor")
+    return values
@@ -0,0 +1,142 @@
+"""
+Wall-clock stack sampling for on-demand request profiles.
+
+While a request is profiled, a background thread samples the stacks of the
+event loop thread and of busy AnyIO worker threads (where blocking database
+calls and bcrypt run) every `PROFILING_INTERVAL_MS`. Stacks are folded into the
+collapsed format (`thread;outer;inner count`) that flamegraph.pl, speedscope and
+similar tools read. Other requests served concurrently show up in the same
+samples; the report's per-phase timings are this request's alone.
+
+Reports are written to `PROFILING_DIR`, so any worker process can serve them.
+"""
+
+import json
+import os
+import sys
+import threading
+from collections import Counter
+from types import FrameType
+from typing import List, Optional
+
+from app.core.config import settings
+
+WORKER_THREAD_PREFIX = "AnyIO worker thread"
+_IDLE_MODULES = ("threading.py", "queue.py")  # Where an idle worker thread waits for work
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = "/".join(code.co_filename.replace("\\", "/").split("/")[-2:])
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _folded_stack(thread_label: str, frame: FrameType) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_label)
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """
+    Sample the event loop thread and busy worker threads on a background thread until stopped.
+    """
+
+    def __init__(self, interval: float, loop_thread: int):
+        self.interval = interval
+        self.loop_thread = loop_thread
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == self.loop_thread:
+                label = "event loop"
+            elif names.get(ident, "").startswith(WORKER_THREAD_PREFIX):
+                if frame.f_code.co_filename.endswith(_IDLE_MODULES):
+                    continue
+                label = "worker thread"
+            else:
+                continue
+            self.stacks[_folded_stack(label, frame)] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _report_path(profile_id: str, extension: str) -> str:
+    return os.path.join(settings.PROFILING_DIR, f"{profile_id}.{extension}")
+
+
+def save_report(profile_id: str, report: dict, folded: str) -> None:
+    """
+    Write a report and its folded stacks, then delete the oldest beyond `PROFILING_MAX_REPORTS`.
+    """
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    with open(_report_path(profile_id, "folded"), "w") as f:
+        f.write(folded)
+    # The metadata goes last: a listed report always has its stacks
+    with open(_report_path(profile_id, "json"), "w") as f:
+        json.dump(report, f)
+
+    for stale in list_report_ids()[settings.PROFILING_MAX_REPORTS:]:
+        for extension in ("json", "folded"):
+            try:
+                os.remove(_report_path(stale, extension))
+            except FileNotFoundError:
+                pass  # Pruned concurrently by another worker
+
+
+def list_report_ids() -> List[str]:
+    """
+    Stored profile IDs, newest first.
+    """
+    try:
+        entries = [entry for entry in os.scandir(settings.PROFILING_DIR) if entry.name.endswith(".json")]
+    except FileNotFoundError:
+        return []
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    return [entry.name[: -len(".json")] for entry in entries]
+
+
+def list_reports() -> List[dict]:
+    """
+    Metadata of the stored reports, newest first.
+    """
+    reports = []
+    for profile_id in list_report_ids():
+        try:
+            with open(_report_path(profile_id, "json")) as f:
+                reports.append(json.load(f))
+        except FileNotFoundError:
+            continue
+    return reports
+
+
+def read_folded(profile_id: str) -> Optional[str]:
+    """
+    Folded stacks of one report, or None if it does not exist (any more).
+    """
+    try:
+        with open(_report_path(profile_id, "folded")) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
@@ -1,12 +1,32 @@
 """
 Security utilities: password hashing and verification.
+
+bcrypt is deliberately slow, so the async helpers run it on worker threads
+gated by a dedicated capacity limiter. A burst of logins then queues behind
+its own limit instead of exhausting the threadpool shared by every sync
+endpoint and dependency. bcrypt releases the GIL while hashing, so threads
+are enough to keep the event loop and cheap reads responsive.
 """
 
+import threading
+import time
+
+from anyio import CapacityLimiter, to_thread
 from passlib.context import CryptContext
 
+from app.core.config import settings
+from app.core.context import timed
+from app.core.metrics import password_hash_duration, password_hash_pending
+
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Limits how many bcrypt operations run at once, independently of AnyIO's default limiter
+hashing_limiter = CapacityLimiter(settings.PASSWORD_HASH_WORKERS)
+
+_stats_lock = threading.Lock()
+_stats = {"completed": 0, "total_seconds": 0.0}
+
 
 def hash_password(password: str) -> str:
     """
@@ -20,3 +40,53 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Verify a plain password against its hash.
     """
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def _timed(func, *args):
+    """
+    Run a hashing function and record how long it took.
+    """
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        elapsed = time.perf_counter() - start
+        with _stats_lock:
+            _stats["completed"] += 1
+            _stats["total_seconds"] += elapsed
+        password_hash_duration.observe(elapsed)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a plain password on the dedicated hashing pool.
+    """
+    with timed("hash"), password_hash_pending.track_inprogress():
+        return await to_thread.run_sync(_timed, hash_password, password, limiter=hashing_limiter)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a plain password against its hash on the dedicated hashing pool.
+    """
+    with timed("hash"), password_hash_pending.track_inprogress():
+        return await to_thread.run_sync(
+            _timed, verify_password, plain_password, hashed_password, limiter=hashing_limiter
+        )
+
+
+def hashing_stats() -> dict:
+    """
+    Snapshot of the hashing pool: capacity, running and queued operations, and totals.
+    """
+    limiter_stats = hashing_limiter.statistics()
+    with _stats_lock:
+        completed = _stats["completed"]
+        total_seconds = _stats["total_seconds"]
+    return {
+        "capacity": int(hashing_limiter.total_tokens),
+        "in_flight": limiter_stats.borrowed_tokens,
+        "queued": limiter_stats.tasks_waiting,
+        "completed": completed,
+        "total_seconds": total_seconds,
+    }
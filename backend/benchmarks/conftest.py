@@ -0,0 +1,58 @@
+"""
+Fixtures for the pytest-benchmark suite.
+
+Runs fully offline against a throwaway SQLite database; `SQL_URL` is set before
+the app is imported so every engine points at it. Each run is saved as JSON
+under `.benchmarks/`, so runs on different commits can be compared:
+
+    python -m pytest benchmarks
+    pytest-benchmark compare 0001 0002 --group-by=name
+"""
+
+import os
+import tempfile
+
+import pytest
+from pytest_benchmark.utils import get_tag
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="benchmarks-"), "bench.db")
+os.environ["SQL_URL"] = f"sqlite:///{DB_PATH}"  # Never a real database: the seed drops all tables
+
+from app.db.models import Base, User  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.repositories.user_sql import UserSQLRepository  # noqa: E402
+
+SEED_ROWS = 1000
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Autosave every run, as if `--benchmark-autosave` had been passed
+    if not config.option.benchmark_save:
+        config.option.benchmark_autosave = config.option.benchmark_autosave or get_tag()
+
+
+@pytest.fixture(scope="session")
+def seeded_db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add_all(
+            User(name=f"User {i}", email=f"user{i}@example.com", role="admin" if i % 10 == 0 else "user",
+                 hashed_password="x")
+            for i in range(1, SEED_ROWS + 1)
+        )
+        db.commit()
+    finally:
+        db.close()
+    return engine
+
+
+@pytest.fixture
+def user_repo(seeded_db):
+    db = SessionLocal()
+    try:
+        yield UserSQLRepository(db)
+    finally:
+        db.close()
@@ -0,0 +1,379 @@
+"""
+Load test of the user API with weighted scenarios and latency budgets.
+
+Virtual users each create an account, sign in and then loop over scenarios
+(get, list, update, signin, create) picked by weight, until the run ends.
+Requests made during the warm-up are not counted. The report gives requests,
+RPS, p50, p95, p99 and errors per scenario, and `--check` fails (exit code 1)
+when a scenario exceeds its budget in the committed baseline file.
+
+Budgets are a tolerance over the median of several runs (`--runs`), and the
+baseline notes the machine it was recorded on: latencies only compare across
+similar hardware, and `--check` warns when the machine differs.
+
+By default the real ASGI app is driven in-process against a throwaway SQLite
+database, so generator and app share one event loop. `--uvicorn` starts a
+server on localhost instead, and `--url` targets one that is already running.
+Export `SQL_URL` (or `DB_TYPE=nosql` and `MONGODB_URL`) to run against a local
+Postgres or Mongo instead of SQLite.
+
+    python -m benchmarks.load_test --check
+    python -m benchmarks.load_test --uvicorn --users 50 --seconds 30
+    python -m benchmarks.load_test --weight signin=0 --weight create=0
+    python -m benchmarks.load_test --update-baseline --runs 5   # after an intended change
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+os.environ.setdefault("SQL_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='load-test-'), 'bench.db')}")
+
+import httpx  # noqa: E402
+
+from benchmarks.stats import percentile  # noqa: E402
+
+BASELINE = Path(__file__).with_name("load_baseline.json")
+PASSWORD = "load-test-password"
+RUN = uuid.uuid4().hex[:8]  # Keeps emails unique against a database that outlives the run
+
+
+class VirtualUser:
+    """
+    One simulated client: its own account, token and sign-in credentials.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, known_ids: list):
+        self.client = client
+        self.known_ids = known_ids
+        self.id = None
+        self.email = None
+        self.headers = {}
+
+    async def register(self) -> None:
+        response = await create(self)
+        response.raise_for_status()
+        self.id, self.email = response.json()["id"], response.json()["email"]
+        (await signin(self)).raise_for_status()
+
+
+_emails = iter(range(sys.maxsize))
+
+
+async def create(user: VirtualUser) -> httpx.Response:
+    body = {"name": "Load Test", "email": f"load-{RUN}-{next(_emails)}@example.com", "password": PASSWORD}
+    response = await user.client.post("/api/users/", json=body)
+    if response.status_code == 201:
+        user.known_ids.append(response.json()["id"])
+    return response
+
+
+async def signin(user: VirtualUser) -> httpx.Response:
+    response = await user.client.post("/auth/signin", json={"email": user.email, "password": PASSWORD})
+    if response.status_code == 200:
+        user.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return response
+
+
+async def get(user: VirtualUser) -> httpx.Response:
+    return await user.client.get(f"/api/users/{random.choice(user.known_ids)}", headers=user.headers)
+
+
+async def list_users(user: VirtualUser) -> httpx.Response:
+    return await user.client.get("/api/users/", params={"limit": 20})
+
+
+async def update(user: VirtualUser) -> httpx.Response:
+    body = {"name": f"Load Test {random.randrange(1000)}"}
+    return await user.client.put(f"/api/users/{user.id}", json=body, headers=user.headers)
+
+
+# name -> (default weight, scenario)
+SCENARIOS = {
+    "get": (50, get),
+    "list": (25, list_users),
+    "update": (10, update),
+    "signin": (10, signin),
+    "create": (5, create),
+}
+
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, name: str, milliseconds: float, failed: bool) -> None:
+        self.latencies[name].append(milliseconds)
+        self.errors[name] += failed
+
+    def summary(self, seconds: float) -> dict:
+        return {
+            name: {
+                "requests": len(samples),
+                "rps": round(len(samples) / seconds, 1),
+                "p50_ms": round(percentile(samples, 50), 2),
+                "p95_ms": round(percentile(samples, 95), 2),
+                "p99_ms": round(percentile(samples, 99), 2),
+                "errors": self.errors[name],
+            }
+            for name, samples in sorted(self.latencies.items())
+        }
+
+
+async def virtual_user(user: VirtualUser, weights: dict, started: float, deadline: float, results: Results):
+    names, scenario_weights = list(weights), list(weights.values())
+    while time.perf_counter() < deadline:
+        name = random.choices(names, scenario_weights)[0]
+        start = time.perf_counter()
+        try:
+            failed = (await SCENARIOS[name][1](user)).status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        if start >= started:
+            results.record(name, (time.perf_counter() - start) * 1000, failed)
+
+
+async def run(client: httpx.AsyncClient, args, weights: dict) -> dict:
+    known_ids = []
+    users = [VirtualUser(client, known_ids) for _ in range(args.users)]
+    await asyncio.gather(*(user.register() for user in users))
+
+    results = Results()
+    started = time.perf_counter() + args.warmup
+    deadline = started + args.seconds
+    await asyncio.gather(*(virtual_user(user, weights, started, deadline, results) for user in users))
+    return results.summary(args.seconds)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def target(args):
+    """
+    An HTTP client for the app under test, started and stopped around the run.
+    """
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30) as client:
+            yield client
+        return
+
+    if args.uvicorn:
+        port = free_port()
+        command = [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--port", str(port), "--workers", str(args.workers), "--log-level", "warning",
+        ]
+        server = subprocess.Popen(command)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30) as client:
+                for _ in range(100):
+                    try:
+                        (await client.get("/openapi.json")).raise_for_status()
+                        break
+                    except httpx.HTTPError:
+                        await asyncio.sleep(0.1)
+                else:
+                    raise RuntimeError("uvicorn did not start")
+                yield client
+        finally:
+            server.terminate()
+            server.wait()
+        return
+
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+            yield client
+
+
+def median_summary(summaries: list) -> dict:
+    """
+    Per scenario, the median of each run's percentiles and RPS; requests and errors are summed.
+    """
+    median = {}
+    for name in summaries[0]:
+        results = [summary[name] for summary in summaries if name in summary]
+        median[name] = {
+            "requests": sum(result["requests"] for result in results),
+            "rps": round(statistics.median(result["rps"] for result in results), 1),
+            **{
+                key: round(statistics.median(result[key] for result in results), 2)
+                for key in ("p50_ms", "p95_ms", "p99_ms")
+            },
+            "errors": sum(result["errors"] for result in results),
+        }
+    return median
+
+
+def this_machine() -> dict:
+    """
+    What the budgets depend on besides the code: CPU model and count, Python, OS.
+    """
+    processor = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            processor = next(line.split(":", 1)[1].strip() for line in cpuinfo if line.startswith("model name"))
+    except (OSError, StopIteration):
+        pass
+    return {
+        "processor": processor,
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "platform": platform.platform(terse=True),
+    }
+
+
+def check(summary: dict, budgets: dict) -> list:
+    """
+    Every budget the run exceeded, as readable lines.
+    """
+    failures = []
+    for name, budget in budgets.items():
+        result = summary.get(name)
+        if result is None:
+            continue  # Scenario disabled for this run
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if key in budget and result[key] > budget[key]:
+                failures.append(f"{name}: {key} {result[key]} > {budget[key]}")
+        if "min_rps" in budget and result["rps"] < budget["min_rps"]:
+            failures.append(f"{name}: rps {result['rps']} < {budget['min_rps']}")
+        error_rate = result["errors"] / result["requests"] if result["requests"] else 0.0
+        if error_rate > budget.get("max_error_rate", 0.0):
+            failures.append(f"{name}: error rate {error_rate:.2%} > {budget.get('max_error_rate', 0.0):.2%}")
+    return failures
+
+
+def make_budgets(summary: dict, tolerance: float, slack_ms: float) -> dict:
+    """
+    Budgets `tolerance` times the median run's p50 and p95, and never less than
+    `slack_ms` above them, so millisecond reads are not failed by scheduler jitter.
+    p99 is reported but not budgeted: with a few hundred samples per scenario it
+    is a handful of requests.
+    """
+    def budget(milliseconds: float) -> float:
+        return round(max(milliseconds * tolerance, milliseconds + slack_ms), 1)
+
+    return {
+        name: {
+            "p50_ms": budget(result["p50_ms"]),
+            "p95_ms": budget(result["p95_ms"]),
+            "min_rps": round(result["rps"] / tolerance, 1),
+            "max_error_rate": 0.0,
+        }
+        for name, result in summary.items()
+    }
+
+
+def report(summary: dict) -> None:
+    print(f"{'scenario':<8} {'requests':>8} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>6}")
+    for name, result in summary.items():
+        print(
+            f"{name:<8} {result['requests']:>8} {result['rps']:>8.1f} "
+            f"{result['p50_ms']:>7.2f}ms {result['p95_ms']:>7.2f}ms {result['p99_ms']:>7.2f}ms "
+            f"{result['errors']:>6}"
+        )
+
+
+def parse_weights(overrides: list) -> dict:
+    weights = {name: weight for name, (weight, _) in SCENARIOS.items()}
+    for override in overrides:
+        name, _, weight = override.partition("=")
+        if name not in SCENARIOS or not weight.isdigit():
+            raise SystemExit(f"--weight expects one of {', '.join(SCENARIOS)} as NAME=INTEGER, got {override!r}")
+        weights[name] = int(weight)
+    return weights
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=None, help="concurrent virtual users")
+    parser.add_argument("--seconds", type=float, default=None, help="measured duration")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--weight", action="append", default=[], metavar="NAME=N", help="override a scenario weight")
+    parser.add_argument("--url", help="load test a running server instead of the in-process app")
+    parser.add_argument("--uvicorn", action="store_true", help="serve the app with uvicorn on localhost")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--check", action="store_true", help="exit 1 when a budget is exceeded")
+    parser.add_argument("--update-baseline", action="store_true", help="write budgets from this run")
+    parser.add_argument("--runs", type=int, default=None, help="repeat the run and use the median of each metric")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="budgets as a multiple of the median on update")
+    parser.add_argument("--slack-ms", type=float, default=5.0, help="minimum budget above the median on update")
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    parser.add_argument("--note", help="describe the machine in the baseline on update, e.g. shared or dedicated CPUs")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {"run": {}, "budgets": {}}
+    # Budgets only mean something for the load they were recorded under
+    args.users = args.users or baseline["run"].get("users", 20)
+    args.seconds = args.seconds or baseline["run"].get("seconds", 10.0)
+    args.runs = args.runs or baseline["run"].get("runs", 1)
+    all_weights = parse_weights([f"{name}={weight}" for name, weight in baseline["run"].get("weights", {}).items()] + args.weight)
+    weights = {name: weight for name, weight in all_weights.items() if weight > 0}
+
+    async def go():
+        async with target(args) as client:
+            return [await run(client, args, weights) for _ in range(args.runs)]
+
+    summaries = asyncio.run(go())
+    print(f"users={args.users} seconds={args.seconds} weights={weights}")
+    for number, run_summary in enumerate(summaries, 1):
+        if args.runs > 1:
+            print(f"run {number}/{args.runs}")
+        report(run_summary)
+    summary = median_summary(summaries)
+    if args.runs > 1:
+        print("median")
+        report(summary)
+    if args.json:
+        args.json.write_text(json.dumps(summary, indent=2))
+
+    if args.update_baseline:
+        machine = this_machine()
+        if args.note:
+            machine["note"] = args.note
+        baseline = {
+            "machine": machine,
+            "run": {"users": args.users, "seconds": args.seconds, "runs": args.runs, "weights": all_weights},
+            "tolerance": args.tolerance,
+            "slack_ms": args.slack_ms,
+            "median": summary,
+            "budgets": make_budgets(summary, args.tolerance, args.slack_ms),
+        }
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+    elif args.check:
+        recorded_on, current = baseline.get("machine"), this_machine()
+        if recorded_on and (recorded_on["processor"], recorded_on["cpus"]) != (current["processor"], current["cpus"]):
+            print(f"WARNING budgets were recorded on {recorded_on['cpus']} x {recorded_on['processor']}")
+        failures = check(summary, baseline["budgets"])
+        for failure in failures:
+            print(f"BUDGET EXCEEDED {failure}")
+        if failures:
+            sys.exit(1)
+        print("All budgets met")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Read latency during a login storm.
+
+Drives the real ASGI app in-process against a throwaway SQLite database.
+A set of readers keeps calling `GET /api/users/{id}` while a second set of
+clients hammers `/auth/signin`. Read percentiles are reported for a quiet
+baseline and for the storm, so the effect of bcrypt on cheap reads is visible.
+
+    python -m benchmarks.login_storm --mode pool     # dedicated hashing limiter
+    python -m benchmarks.login_storm --mode shared   # bcrypt on the default threadpool
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="login-storm-"), "bench.db")
+os.environ["SQL_URL"] = f"sqlite:///{DB_PATH}"  # Always a fresh database: the seed expects no users
+
+import httpx  # noqa: E402
+from anyio import to_thread  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.api.endpoints import auth  # noqa: E402
+from app.db.models import Base, User  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.utils.security import hash_password, hashing_stats, verify_password  # noqa: E402
+from benchmarks.stats import percentile  # noqa: E402
+
+PASSWORD = "benchmark-password"
+
+
+def seed(storm_users: int) -> None:
+    engine.echo = False
+    Base.metadata.create_all(bind=engine)
+    hashed = hash_password(PASSWORD)
+    db = SessionLocal()
+    try:
+        db.add_all(
+            User(name=f"User {i}", email=f"user{i}@example.com", hashed_password=hashed)
+            for i in range(storm_users + 1)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def reader(client, headers, user_id, deadline, samples):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get(f"/api/users/{user_id}", headers=headers)
+        samples.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+
+
+async def login(client, email, deadline, counter):
+    while time.perf_counter() < deadline:
+        response = await client.post("/auth/signin", json={"email": email, "password": PASSWORD})
+        response.raise_for_status()
+        counter.append(1)
+
+
+async def phase(client, headers, user_id, readers, storm_users, seconds):
+    deadline = time.perf_counter() + seconds
+    samples, logins = [], []
+    tasks = [reader(client, headers, user_id, deadline, samples) for _ in range(readers)]
+    tasks += [login(client, f"user{i + 1}@example.com", deadline, logins) for i in range(storm_users)]
+    await asyncio.gather(*tasks)
+    return samples, len(logins)
+
+
+def report(label, samples, logins, seconds):
+    print(
+        f"{label:<8} reads={len(samples):>6} "
+        f"p50={statistics.median(samples):7.2f}ms "
+        f"p99={percentile(samples, 99):7.2f}ms "
+        f"max={max(samples):7.2f}ms "
+        f"logins/s={logins / seconds:6.1f}"
+    )
+
+
+async def main(args):
+    if args.mode == "shared":
+        async def verify_on_default_pool(plain, hashed):
+            return await to_thread.run_sync(verify_password, plain, hashed)
+
+        auth.verify_password_async = verify_on_default_pool
+
+    seed(args.storm_users)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/auth/signin", json={"email": "user0@example.com", "password": PASSWORD})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        me = (await client.get("/api/users/", params={"limit": 1})).json()[0]["id"]
+
+        quiet, _ = await phase(client, headers, me, args.readers, 0, args.seconds)
+        storm, logins = await phase(client, headers, me, args.readers, args.storm_users, args.seconds)
+
+    print(f"mode={args.mode} readers={args.readers} storm_users={args.storm_users}")
+    report("quiet", quiet, 0, args.seconds)
+    report("storm", storm, logins, args.seconds)
+    print(f"hashing={hashing_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=["pool", "shared"], default="pool")
+    parser.add_argument("--readers", type=int, default=6)
+    parser.add_argument("--storm-users", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,85 @@
+"""
+Per-row cost of serialising `GET /api/users/` pages.
+
+Compares FastAPI's generic `response_model` path, as the route used before
+(validate into the original `UserOut` with an `EmailStr` field, dump to
+JSON-compatible Python objects, then `json.dumps`), with the precompiled adapter in
+`app.utils.serialization` that goes from ORM rows straight to JSON bytes.
+Rows are in-memory ORM objects, so no database is involved.
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --rows 100 1000 10000 --repeat 5
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, EmailStr
+
+from app.db.models import User
+from app.utils.serialization import render_users
+
+
+class LegacyUserOut(BaseModel):
+    """
+    `UserOut` as it was before the fast path: email re-validated on output.
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    email: EmailStr
+    role: str
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+
+def response_model_path(users) -> bytes:
+    content = [LegacyUserOut.model_validate(user).model_dump(mode="json") for user in users]
+    return json.dumps(content).encode()
+
+
+PATHS = {"response_model": response_model_path, "adapter": render_users}
+
+
+def make_users(rows: int):
+    now = datetime.now(timezone.utc)
+    return [
+        User(id=i, name=f"User {i}", email=f"user{i}@example.com", role="user",
+             created_at=now, updated_at=now, hashed_password="x")
+        for i in range(1, rows + 1)
+    ]
+
+
+def per_row_microseconds(render, users, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(users)
+        best = min(best, time.perf_counter() - start)
+    return best / len(users) * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5, help="best of this many runs")
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        users = make_users(rows)
+        assert json.loads(response_model_path(users)) == json.loads(render_users(users))
+        timings = {name: per_row_microseconds(render, users, args.repeat) for name, render in PATHS.items()}
+        print(
+            f"rows={rows:>6} "
+            + " ".join(f"{name}={cost:7.2f}us/row" for name, cost in timings.items())
+            + f" speedup={timings['response_model'] / timings['adapter']:5.1f}x",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Kept apart from the scripts themselves, which point `SQL_URL` at their own
+database on import.
+"""
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
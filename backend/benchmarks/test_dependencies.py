@@ -0,0 +1,56 @@
+"""
+Per-request cost of resolving `get_user_repository` and `get_current_user`.
+
+Each endpoint does nothing else, so the difference from `/bare` is the
+dependency overhead, including the session lifecycle and the user lookup.
+"""
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.db.models import User
+from app.db.session import SessionLocal
+from app.deps import get_current_user, get_user_repository
+from app.utils.jwt import create_access_token
+
+app = FastAPI()
+
+
+@app.get("/bare")
+async def bare():
+    return {}
+
+
+@app.get("/repository")
+async def repository(user_repo=Depends(get_user_repository)):
+    return {}
+
+
+@app.get("/current-user")
+async def current_user(user: User = Depends(get_current_user)):
+    return {}
+
+
+@pytest.fixture(scope="module")
+def client(seeded_db):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def auth_headers(seeded_db):
+    db = SessionLocal()
+    try:
+        user = db.query(User).order_by(User.id).first()
+        token = create_access_token({"user_id": user.id, "role": user.role, "ver": user.token_version})
+    finally:
+        db.close()
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.parametrize("path", ["/bare", "/repository", "/current-user"])
+def test_dependency_resolution(benchmark, client, auth_headers, path):
+    benchmark.group = "dependencies"
+    response = benchmark(client.get, path, headers=auth_headers)
+    assert response.status_code == 200
@@ -0,0 +1,54 @@
+"""
+`UserCreate` validation and `UserOut` serialisation at 1, 100 and 10000 rows.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.db.models import User
+from app.schemas.user import UserCreate, UserOut
+from app.utils.serialization import render_users
+
+ROWS = [1, 100, 10000]
+
+user_create_list = TypeAdapter(list[UserCreate])
+
+
+def make_payloads(rows: int):
+    return [{"name": f"User {i}", "email": f"user{i}@example.com", "password": "password1"} for i in range(rows)]
+
+
+def make_users(rows: int):
+    now = datetime.now(timezone.utc)
+    return [
+        User(id=i, name=f"User {i}", email=f"user{i}@example.com", role="user",
+             created_at=now, updated_at=now, hashed_password="x")
+        for i in range(1, rows + 1)
+    ]
+
+
+@pytest.mark.parametrize("rows", ROWS)
+def test_user_create_validation(benchmark, rows):
+    payloads = make_payloads(rows)
+    benchmark.group = f"user-create-{rows}"
+    assert len(benchmark(user_create_list.validate_python, payloads)) == rows
+
+
+@pytest.mark.parametrize("rows", ROWS)
+def test_user_out_model_dump(benchmark, rows):
+    users = make_users(rows)
+    benchmark.group = f"user-out-{rows}"
+
+    def dump():
+        return [UserOut.model_validate(user).model_dump_json() for user in users]
+
+    assert len(benchmark(dump)) == rows
+
+
+@pytest.mark.parametrize("rows", ROWS)
+def test_user_out_render_users(benchmark, rows):
+    users = make_users(rows)
+    benchmark.group = f"user-out-{rows}"
+    assert benchmark(render_users, users).startswith(b"[")
@@ -0,0 +1,40 @@
+"""
+bcrypt at the configured cost, and JWT issue/verify with and without the verification cache.
+"""
+
+from app.utils.jwt import clear_token_cache, create_access_token, verify_access_token
+from app.utils.security import hash_password, pwd_context, verify_password
+
+PASSWORD = "benchmark-password"
+
+
+def test_hash_password(benchmark):
+    benchmark.extra_info["bcrypt_rounds"] = pwd_context.handler("bcrypt").default_rounds
+    hashed = benchmark.pedantic(hash_password, args=(PASSWORD,), rounds=5)
+    assert verify_password(PASSWORD, hashed)
+
+
+def test_verify_password(benchmark):
+    hashed = hash_password(PASSWORD)
+    assert benchmark.pedantic(verify_password, args=(PASSWORD, hashed), rounds=5)
+
+
+def test_create_access_token(benchmark):
+    token = benchmark(create_access_token, {"user_id": 1, "role": "user", "ver": 0})
+    assert verify_access_token(token)["user_id"] == 1
+
+
+def test_verify_access_token_uncached(benchmark):
+    token = create_access_token({"user_id": 1, "role": "user", "ver": 0})
+
+    def verify():
+        clear_token_cache()
+        return verify_access_token(token)
+
+    assert benchmark(verify)["user_id"] == 1
+
+
+def test_verify_access_token_cached(benchmark):
+    token = create_access_token({"user_id": 1, "role": "user", "ver": 0})
+    verify_access_token(token)
+    assert benchmark(verify_access_token, token)["user_id"] == 1
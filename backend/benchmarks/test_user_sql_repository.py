@@ -0,0 +1,76 @@
+"""
+Every `UserSQLRepository` method against the seeded SQLite database.
+"""
+
+import itertools
+
+from app.schemas.user import UserFilter
+
+_emails = itertools.count()
+
+
+def new_user() -> dict:
+    return {"name": "Bench", "email": f"bench{next(_emails)}@example.com", "hashed_password": "x"}
+
+
+def test_get_by_id(benchmark, user_repo):
+    assert benchmark(user_repo.get_by_id, 500).id == 500
+
+
+def test_get_by_email(benchmark, user_repo):
+    assert benchmark(user_repo.get_by_email, "user500@example.com").id == 500
+
+
+def test_get_all_offset(benchmark, user_repo):
+    assert len(benchmark(user_repo.get_all, 500, 100)) == 100
+
+
+def test_get_all_keyset(benchmark, user_repo):
+    assert len(benchmark(user_repo.get_all, 0, 100, after_id=500)) == 100
+
+
+def test_get_all_filtered(benchmark, user_repo):
+    filters = UserFilter(role="user", name="User 1", match="prefix", sort="-created_at")
+    assert benchmark(user_repo.get_all, 0, 100, filters=filters)
+
+
+def test_count(benchmark, user_repo):
+    total, exact = benchmark(user_repo.count, 100000)
+    assert exact and total >= 1000
+
+
+def test_get_version(benchmark, user_repo):
+    assert benchmark(user_repo.get_version, 500) is not None
+
+
+def test_get_page_versions(benchmark, user_repo):
+    assert len(benchmark(user_repo.get_page_versions, 0, 100, None, None, None)) == 100
+
+
+def test_iter_all(benchmark, user_repo):
+    assert benchmark(lambda: sum(1 for _ in user_repo.iter_all(batch_size=500))) >= 1000
+
+
+def test_get_existing_emails(benchmark, user_repo):
+    emails = [f"user{i}@example.com" for i in range(1, 200)] + [f"missing{i}@example.com" for i in range(200)]
+    assert len(benchmark(user_repo.get_existing_emails, emails)) == 199
+
+
+def test_create(benchmark, user_repo):
+    assert benchmark(lambda: user_repo.create(new_user())) is not None
+
+
+def test_create_many(benchmark, user_repo):
+    created = benchmark(lambda: user_repo.create_many([new_user() for _ in range(100)]))
+    assert len(created) == 100
+
+
+def test_update(benchmark, user_repo):
+    assert benchmark(user_repo.update, 500, {"name": "Renamed"}).name == "Renamed"
+
+
+def test_delete(benchmark, user_repo):
+    def setup():
+        return (user_repo.create(new_user()).id,), {}
+
+    assert benchmark.pedantic(user_repo.delete, setup=setup, rounds=50)
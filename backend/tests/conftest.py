@@ -0,0 +1,173 @@
+"""
+Shared fixtures: the app served in-process, on a database of its own.
+
+Each pytest-xdist worker gets its own SQLite file, set before the app is
+imported. Every test runs inside one outer transaction that is rolled back
+afterwards; sessions opened by the test or by the app during a request join
+it through savepoints, so commits work as usual but nothing outlives the test.
+
+    python -m pytest -n auto
+"""
+
+import os
+import tempfile
+
+WORKER = os.environ.get("PYTEST_XDIST_WORKER", "main")
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix=f"tests-{WORKER}-"), "test.db")
+
+# Never a shared database: the app under test always gets this worker's file
+os.environ["SQL_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["DB_TYPE"] = "sql"
+os.environ["SQL_ASYNC"] = "false"
+os.environ["SQL_READ_URLS"] = ""
+os.environ["SQL_READ_WEIGHTS"] = ""
+os.environ["USER_CACHE_BACKEND"] = "none"
+
+import pytest  # noqa: E402
+from fastapi import Depends  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.db.models import Base, User  # noqa: E402
+from app.db.routing import _recent_writers  # noqa: E402
+from app.deps import get_db, get_read_db, get_user_repository  # noqa: E402
+from app.main import app  # noqa: E402
+from app.repositories.user_sql import UserSQLRepository  # noqa: E402
+from app.utils import jwt  # noqa: E402
+from app.utils.counts import invalidate_user_count  # noqa: E402
+from app.utils.jwt import create_access_token  # noqa: E402
+from app.utils.security import pwd_context  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def test_engine():
+    """
+    An engine on the worker's database that can hold one connection across threads.
+    """
+    engine = create_engine(f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False})
+
+    # pysqlite manages transactions itself and breaks SAVEPOINT; take over BEGIN
+    @event.listens_for(engine, "connect")
+    def disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fast_password_hashing():
+    """
+    Minimum bcrypt cost, so creating and signing in users does not dominate the suite.
+    """
+    pwd_context.update(bcrypt__rounds=4)
+
+
+@pytest.fixture(autouse=True)
+def reset_process_state():
+    """
+    Forget per-process caches, since row IDs are reused once a test's rows are rolled back.
+    """
+    yield
+    jwt.clear_token_cache()
+    with jwt._revocations_lock:
+        jwt._revocations.clear()
+    _recent_writers.clear()
+    invalidate_user_count()
+
+
+@pytest.fixture
+def connection(test_engine):
+    connection = test_engine.connect()
+    transaction = connection.begin()
+    yield connection
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture
+def session_factory(connection):
+    return sessionmaker(
+        bind=connection,
+        autoflush=False,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",  # commit() releases a savepoint, not the test's transaction
+    )
+
+
+@pytest.fixture
+def db(session_factory):
+    """
+    A session for arranging and inspecting data, inside the test's transaction.
+    """
+    db = session_factory()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def bind_repository(session_factory):
+    """
+    Install dependency overrides on a FastAPI app so its user repository joins the test's transaction.
+    """
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def override_get_user_repository(sql_db=Depends(override_get_db)):
+        return UserSQLRepository(sql_db)
+
+    bound = []
+
+    def bind(target):
+        target.dependency_overrides[get_db] = override_get_db
+        target.dependency_overrides[get_read_db] = lambda: None
+        target.dependency_overrides[get_user_repository] = override_get_user_repository
+        bound.append(target)
+        return target
+
+    yield bind
+    for target in bound:
+        target.dependency_overrides.clear()
+
+
+@pytest.fixture
+def test_client(bind_repository):
+    """
+    A client for the real app, driven in-process with its repository bound to the test's transaction.
+    """
+    with TestClient(bind_repository(app)) as client:
+        yield client
+
+
+def _headers_for(db, email, role):
+    user = User(name=role.title(), email=email, hashed_password="x", role=role)
+    db.add(user)
+    db.commit()
+    token = create_access_token({"user_id": user.id, "role": user.role, "ver": user.token_version})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def admin_headers(db):
+    """
+    Bearer token of a stored admin.
+    """
+    return _headers_for(db, "admin@example.com", "admin")
+
+
+@pytest.fixture
+def user_headers(db):
+    """
+    Bearer token of a stored regular user.
+    """
+    return _headers_for(db, "user@example.com", "user")
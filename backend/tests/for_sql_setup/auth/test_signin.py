@@ -1,40 +1,13 @@
 import pytest
-import httpx
 from app.db.models import User
 from app.crud import user as user_crud
 from app.schemas.user import UserCreate
-from app.deps import get_db
-from sqlalchemy.orm import Session
 
 
-BASE_URL = "http://localhost:8000"
 SIGNIN_URL = "/auth/signin"
 USERS_URL = "/api/users"
 
 
-@pytest.fixture(scope="module")
-def test_client():
-    with httpx.Client(base_url=BASE_URL) as client:
-        yield client
-
-@pytest.fixture(scope="session", autouse=True)
-def clean_database(db: Session):
-    """
-    Before all tests: clean the database.
-    After all tests: clean the database.
-    """
-    db.query(User).delete()
-    db.commit()
-    yield
-    db.query(User).delete()
-    db.commit()
-
-
-@pytest.fixture(scope="session")
-def db():
-    yield next(get_db())
-
-
 @pytest.fixture(scope="function")
 def create_test_user(db):
     """
@@ -57,15 +30,6 @@ def cleanup_user(db):
     return _cleanup
 
 
-@pytest.fixture(scope="session", autouse=True)
-def cleanup_database(db):
-    """ Cleanup before and after all tests """
-    yield
-    users = db.query(user_crud.User).all()
-    for user in users:
-        user_crud.delete_user(db, user)
-
-
 # ✅ Positive Test Cases
 
 def test_signin_valid_credentials(test_client, create_test_user, cleanup_user):
@@ -95,7 +59,6 @@ def test_signin_after_user_created(test_client, create_test_user, cleanup_user):
     cleanup_user("newuser@example.com")
 
 
-
 # ❌ Negative Test Cases
 
 def test_signin_wrong_password(test_client, create_test_user, cleanup_user):
@@ -1,25 +1,13 @@
 import pytest
-import httpx
 from app.db.models import User
 from app.crud import user as user_crud
 from app.schemas.user import UserCreate
-from app.deps import get_db
-from sqlalchemy.orm import Session
 from datetime import timedelta, datetime
 from app.utils.jwt import create_access_token
 
-BASE_URL = "http://localhost:8000"
 SIGNIN_URL = "/auth/signin"
 SIGNOUT_URL = "/auth/signout"
 
-@pytest.fixture(scope="session")
-def db():
-    yield next(get_db())
-
-@pytest.fixture(scope="module")
-def test_client():
-    with httpx.Client(base_url=BASE_URL) as client:
-        yield client
 
 @pytest.fixture(scope="function")
 def create_user(db):
@@ -0,0 +1,134 @@
+import asyncio
+import pytest
+from app.db.models import User
+from app.deps import get_current_principal
+from app.utils import jwt
+from app.utils.jwt import create_access_token
+
+USERS_URL = "/api/users"
+ADMIN_URL = "/api/admin/queries"
+
+
+def stored(db, email):
+    db.expire_all()
+    return db.query(User).filter(User.email == email).one()
+
+
+def forget_revocations():
+    """
+    What another worker (or this one after a restart) knows: nothing but the database.
+    """
+    with jwt._revocations_lock:
+        jwt._revocations.clear()
+    jwt.clear_token_cache()
+
+
+@pytest.fixture
+def other_user(db):
+    user = User(name="Other", email="other@example.com", hashed_password="x", role="user")
+    db.add(user)
+    db.commit()
+    return user
+
+
+# Positive Test Cases
+
+def test_principal_carries_the_ver_claim():
+    token = create_access_token({"user_id": 7, "role": "admin", "ver": 3})
+    principal = asyncio.run(get_current_principal(token))
+    assert (principal.id, principal.role, principal.ver) == (7, "admin", 3)
+
+
+def test_admin_reaches_admin_only_paths(test_client, admin_headers):
+    assert test_client.get(ADMIN_URL, headers=admin_headers).status_code == 200
+    assert test_client.get(f"{USERS_URL}/export", headers=admin_headers).status_code == 200
+
+
+def test_admin_changes_another_users_role(test_client, db, admin_headers, other_user):
+    response = test_client.put(f"{USERS_URL}/{other_user.id}", json={"role": "admin"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["role"] == "admin"
+    assert stored(db, "other@example.com").token_version == 1
+
+
+def test_self_update_needs_only_the_token(test_client, db, user_headers):
+    user = stored(db, "user@example.com")
+    user.token_version = 5  # Not checked on the claims-only path for one's own account
+    db.commit()
+    response = test_client.put(f"{USERS_URL}/{user.id}", json={"name": "Renamed"}, headers=user_headers)
+    assert response.status_code == 200
+
+
+# Negative Test Cases
+
+def test_role_claim_alone_is_not_admin(test_client, other_user):
+    token = create_access_token({"user_id": other_user.id, "role": "admin", "ver": 0})
+    headers = {"Authorization": f"Bearer {token}"}
+    assert test_client.get(ADMIN_URL, headers=headers).status_code == 403
+    assert test_client.get(f"{USERS_URL}/export", headers=headers).status_code == 403
+    response = test_client.delete(f"{USERS_URL}/{other_user.id + 1000}", headers=headers)
+    assert response.status_code == 404  # Treated as the regular user it is stored as
+
+
+def test_demoted_admin_is_refused_on_every_worker(test_client, admin_headers, user_headers, db):
+    admin_id = stored(db, "admin@example.com").id
+    user = stored(db, "user@example.com")
+    promote = test_client.put(f"{USERS_URL}/{user.id}", json={"role": "admin"}, headers=admin_headers)
+    assert promote.status_code == 200
+    user_token = create_access_token({"user_id": user.id, "role": "admin", "ver": 1})
+    user_admin_headers = {"Authorization": f"Bearer {user_token}"}
+    demote = test_client.put(f"{USERS_URL}/{admin_id}", json={"role": "user"}, headers=user_admin_headers)
+    assert demote.status_code == 200
+
+    forget_revocations()
+    assert test_client.get(ADMIN_URL, headers=admin_headers).status_code == 401
+    assert test_client.get(f"{USERS_URL}/export", headers=admin_headers).status_code == 401
+    response = test_client.put(f"{USERS_URL}/{user.id}", json={"role": "user"}, headers=admin_headers)
+    assert response.status_code == 401
+    assert test_client.delete(f"{USERS_URL}/{user.id}", headers=admin_headers).status_code == 401
+
+
+def test_deleted_admin_is_refused_on_every_worker(test_client, admin_headers, db, other_user):
+    admin = stored(db, "admin@example.com")
+    db.delete(admin)
+    db.commit()
+
+    forget_revocations()
+    assert test_client.get(ADMIN_URL, headers=admin_headers).status_code == 401
+    assert test_client.delete(f"{USERS_URL}/{other_user.id}", headers=admin_headers).status_code == 401
+    assert stored(db, "other@example.com")
+
+
+# Edge Test Cases
+
+def test_role_change_rejects_the_old_token(test_client, db, admin_headers, other_user):
+    test_client.put(f"{USERS_URL}/{other_user.id}", json={"role": "admin"}, headers=admin_headers)
+    forget_revocations()
+
+    stale = create_access_token({"user_id": other_user.id, "role": "admin", "ver": 0})
+    headers = {"Authorization": f"Bearer {stale}"}
+    assert test_client.get(ADMIN_URL, headers=headers).status_code == 401
+    fresh = create_access_token({"user_id": other_user.id, "role": "admin", "ver": 1})
+    assert test_client.get(ADMIN_URL, headers={"Authorization": f"Bearer {fresh}"}).status_code == 200
+
+
+# Corner Test Cases
+
+def test_deleted_user_keeps_reading_until_the_token_expires(test_client, db, user_headers, other_user):
+    """
+    Known limitation: reads are claims-only, and another worker never saw the revocation.
+    """
+    user = stored(db, "user@example.com")
+    db.delete(user)
+    db.commit()
+
+    forget_revocations()
+    assert test_client.get(f"{USERS_URL}/{other_user.id}", headers=user_headers).status_code == 200
+    assert test_client.post("/auth/signout", headers=user_headers).status_code == 401
+
+
+def test_admin_demoted_without_a_version_bump_is_refused(test_client, db, admin_headers):
+    admin = stored(db, "admin@example.com")
+    admin.role = "user"  # Written behind the API's back, token_version unchanged
+    db.commit()
+    assert test_client.get(ADMIN_URL, headers=admin_headers).status_code == 403
@@ -0,0 +1,113 @@
+import time
+from datetime import timedelta
+import pytest
+from prometheus_client import REGISTRY
+from app.utils import jwt
+from app.utils.cache import TTLCache
+from app.utils.jwt import create_access_token, invalidate_token, verify_access_token
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """
+    Count real signature checks, i.e. cache misses that reach python-jose.
+    """
+    calls = []
+    decode = jwt.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt.jwt, "decode", counting_decode)
+    return calls
+
+
+def lookups(outcome):
+    return REGISTRY.get_sample_value("jwt_cache_lookups_total", {"outcome": outcome}) or 0.0
+
+
+# Positive Test Cases
+
+def test_repeated_verification_hits_the_cache(decodes):
+    token = create_access_token({"user_id": 1})
+    hits, misses = lookups("hits"), lookups("misses")
+    assert verify_access_token(token)["user_id"] == 1
+    assert verify_access_token(token)["user_id"] == 1
+    assert len(decodes) == 1
+    assert lookups("hits") == hits + 1
+    assert lookups("misses") == misses + 1
+
+
+def test_cached_payload_is_not_shared_with_callers():
+    token = create_access_token({"user_id": 1})
+    verify_access_token(token)["user_id"] = 2
+    assert verify_access_token(token)["user_id"] == 1
+
+
+def test_cache_counters_are_on_the_metrics_endpoint():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    verify_access_token(create_access_token({"user_id": 1}))
+    body = TestClient(app).get("/metrics").text
+    assert 'jwt_cache_lookups_total{outcome="misses"}' in body
+
+
+# Negative Test Cases
+
+def test_invalidated_token_is_verified_again(decodes):
+    token = create_access_token({"user_id": 1})
+    verify_access_token(token)
+    invalidate_token(token)
+    verify_access_token(token)
+    assert len(decodes) == 2
+
+
+def test_invalid_token_is_not_cached(decodes):
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            verify_access_token("not.a.token")
+    assert len(decodes) == 2
+
+
+# Edge Test Cases
+
+def test_cached_entry_expires_with_the_token(decodes):
+    token = create_access_token({"user_id": 1}, expires_delta=timedelta(seconds=0.3))
+    verify_access_token(token)
+    verify_access_token(token)
+    time.sleep(0.4)
+    try:
+        verify_access_token(token)  # python-jose compares `exp` in whole seconds, so it may still pass
+    except ValueError:
+        pass
+    assert len(decodes) == 2  # Past `exp` the signature and expiry are checked again
+
+
+def test_expired_token_is_never_cached(decodes):
+    token = create_access_token({"user_id": 1}, expires_delta=timedelta(seconds=-1))
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            verify_access_token(token)
+    assert len(decodes) == 2
+
+
+def test_least_recently_used_token_is_evicted(decodes, monkeypatch):
+    monkeypatch.setattr(jwt, "token_cache", TTLCache(maxsize=2, ttl=60))
+    first, second, third = (create_access_token({"user_id": user_id}) for user_id in (1, 2, 3))
+    for token in (first, second, first, third):  # `second` is now the least recently used
+        verify_access_token(token)
+    verify_access_token(first)
+    verify_access_token(second)
+    assert decodes == [first, second, third, second]
+
+
+# Corner Test Cases
+
+def test_zero_size_disables_the_cache(decodes, monkeypatch):
+    monkeypatch.setattr(jwt, "token_cache", TTLCache(maxsize=0, ttl=60))
+    token = create_access_token({"user_id": 1})
+    verify_access_token(token)
+    verify_access_token(token)
+    assert len(decodes) == 2
@@ -0,0 +1,99 @@
+import gzip
+import json
+import logging
+import queue
+import sys
+from prometheus_client import REGISTRY
+from app.core.logging import DepthTrackingQueueListener, DroppingQueueHandler, JSONFormatter, SamplingFilter, _gzip_rotator
+
+
+def make_record(level=logging.INFO, msg="[%s] %s users fetched", args=("req-1", 3), **extra):
+    record = logging.LogRecord("app", level, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def sample(name):
+    return REGISTRY.get_sample_value(name) or 0.0
+
+
+# Positive Test Cases
+
+def test_json_formatter_renders_message_and_extras():
+    entry = json.loads(JSONFormatter().format(make_record(client_ip="127.0.0.1")))
+    assert entry["message"] == "[req-1] 3 users fetched"
+    assert entry["level"] == "INFO" and entry["client_ip"] == "127.0.0.1"
+
+
+def test_queue_handler_defers_formatting():
+    log_queue = queue.Queue(maxsize=10)
+    handler = DroppingQueueHandler(log_queue)
+    handler.emit(make_record())
+    record = log_queue.get_nowait()
+    assert record.msg == "[%s] %s users fetched" and record.args == ("req-1", 3)
+
+
+def test_rotated_files_are_gzipped(tmp_path):
+    source = tmp_path / "backend.log.1"
+    source.write_text("line\n" * 100)
+    _gzip_rotator(str(source), str(tmp_path / "backend.log.1.gz"))
+    assert not source.exists()
+    assert gzip.decompress((tmp_path / "backend.log.1.gz").read_bytes()) == b"line\n" * 100
+
+
+# Negative Test Cases
+
+def test_full_queue_drops_instead_of_blocking():
+    dropped = sample("log_records_dropped_total")
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.emit(make_record())
+    assert sample("log_records_dropped_total") == dropped + 3
+    assert sample("log_queue_depth") == 2
+
+
+def test_zero_rate_drops_sampled_records():
+    sampled_out = sample("log_records_sampled_out_total")
+    sampler = SamplingFilter({"INFO": 0.0})
+    assert not sampler.filter(make_record(sampled=True))
+    assert sample("log_records_sampled_out_total") == sampled_out + 1
+
+
+# Edge Test Cases
+
+def test_listener_updates_the_queue_depth():
+    log_queue = queue.Queue(maxsize=10)
+    handler = DroppingQueueHandler(log_queue)
+    for _ in range(3):
+        handler.emit(make_record())
+    assert sample("log_queue_depth") == 3
+    listener = DepthTrackingQueueListener(log_queue, logging.NullHandler())
+    listener.start()
+    listener.stop()
+    assert sample("log_queue_depth") == 0
+
+
+def test_unsampled_records_are_always_kept():
+    assert SamplingFilter({"INFO": 0.0}).filter(make_record())
+
+
+def test_levels_without_a_rate_are_kept():
+    assert SamplingFilter({"INFO": 0.0}).filter(make_record(level=logging.WARNING, sampled=True))
+
+
+# Corner Test Cases
+
+def test_sampling_rate_is_approximately_honoured():
+    sampler = SamplingFilter({"INFO": 0.25})
+    kept = sum(sampler.filter(make_record(sampled=True)) for _ in range(4000))
+    assert 800 < kept < 1200
+
+
+def test_exceptions_are_included():
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        record = logging.LogRecord("app", logging.ERROR, __file__, 1, "failed", (), sys.exc_info())
+    entry = json.loads(JSONFormatter().format(record))
+    assert "RuntimeError: boom" in entry["exception"]
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+import pytest
+from anyio import CapacityLimiter
+from app.utils import security
+from app.utils.security import hash_password, hash_password_async, hashing_stats, verify_password_async
+
+
+@pytest.fixture
+def slow_hashing(monkeypatch):
+    """
+    A 50ms stand-in for bcrypt that records its thread and how many calls overlap.
+    """
+    calls = {"running": 0, "peak": 0, "threads": set()}
+    lock = threading.Lock()
+
+    def fake_hash(password):
+        with lock:
+            calls["running"] += 1
+            calls["peak"] = max(calls["peak"], calls["running"])
+            calls["threads"].add(threading.get_ident())
+        time.sleep(0.05)
+        with lock:
+            calls["running"] -= 1
+        return f"hashed:{password}"
+
+    monkeypatch.setattr(security, "hash_password", fake_hash)
+    monkeypatch.setattr(security, "hashing_limiter", CapacityLimiter(2))
+    return calls
+
+
+# Positive Test Cases
+
+def test_hashing_runs_off_the_event_loop(slow_hashing):
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        hashed = await hash_password_async("password")
+        task.cancel()
+        return hashed, ticks, threading.get_ident()
+
+    hashed, ticks, loop_thread = asyncio.run(main())
+    assert hashed == "hashed:password"
+    assert loop_thread not in slow_hashing["threads"]
+    assert ticks >= 5  # The loop kept running while the 50ms hash did
+
+
+def test_verify_uses_the_real_hash():
+    hashed = hash_password("password")
+    assert asyncio.run(verify_password_async("password", hashed))
+    assert not asyncio.run(verify_password_async("wrong-password", hashed))
+
+
+# Edge Test Cases
+
+def test_concurrency_is_capped_at_the_limiter(slow_hashing):
+    async def main():
+        tasks = [asyncio.create_task(hash_password_async(f"pw{i}")) for i in range(6)]
+        await asyncio.sleep(0.02)
+        saturated = hashing_stats()
+        await asyncio.gather(*tasks)
+        return saturated
+
+    saturated = asyncio.run(main())
+    assert slow_hashing["peak"] == 2
+    assert saturated["capacity"] == 2
+    assert saturated["in_flight"] == 2
+    assert saturated["queued"] == 4
+
+
+# Corner Test Cases
+
+def test_completed_hashes_are_counted(slow_hashing):
+    before = hashing_stats()["completed"]
+    asyncio.run(hash_password_async("password"))
+    after = hashing_stats()
+    assert after["completed"] == before + 1
+    assert after["in_flight"] == 0 and after["queued"] == 0
@@ -0,0 +1,174 @@
+import logging
+from datetime import timedelta
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pymongo import monitoring
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from app.api.endpoints import admin
+from app.core.config import settings
+from app.db.instrumentation import (
+    OTHER,
+    MongoCommandListener,
+    QueryStats,
+    fingerprint_mongo,
+    fingerprint_sql,
+    instrument_queries,
+    mongo_command_stats,
+    sql_query_stats,
+)
+
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'queries.db'}")
+    instrument_queries(engine)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT)"))
+    sql_query_stats.reset()
+    mongo_command_stats.reset()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(bind_repository):
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/admin")
+    return TestClient(bind_repository(app))
+
+
+@pytest.fixture
+def warnings():
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger("app.core.logging")
+    logger.addHandler(handler)
+    yield records
+    logger.removeHandler(handler)
+
+
+def _mongo_round_trip(listener, command_name, command, micros, request_id=1):
+    address = ("localhost", 27017)
+    listener.started(monitoring.CommandStartedEvent(command, "db", request_id, address, 7, None))
+    duration = timedelta(microseconds=micros)
+    listener.succeeded(monitoring.CommandSucceededEvent(duration, {"ok": 1}, command_name, request_id, address, 7, None))
+
+
+# Positive Test Cases
+
+def test_statements_are_grouped_by_fingerprint(engine):
+    with engine.connect() as connection:
+        for id in range(5):
+            connection.execute(text("SELECT email FROM users WHERE id = :id"), {"id": id})
+        connection.execute(text("SELECT email FROM users WHERE id = 42"))
+    top = sql_query_stats.top(order_by="count")
+    assert top[0]["fingerprint"] == "SELECT email FROM users WHERE id = ?"
+    assert top[0]["count"] == 6
+    assert top[0]["p50_ms"] <= top[0]["p99_ms"] <= top[0]["max_ms"]
+
+
+def test_only_slow_statements_are_logged(engine, warnings, monkeypatch):
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    assert not [record for record in warnings if "Slow SQL" in record.getMessage()]
+
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT count(*) FROM users"))
+    slow = [record for record in warnings if "Slow SQL" in record.getMessage()]
+    assert slow[0].fingerprint == "SELECT count(*) FROM users"
+    assert slow[0].plan is None  # EXPLAIN is PostgreSQL only
+
+
+def test_mongo_commands_are_fingerprinted_and_timed(warnings, monkeypatch):
+    mongo_command_stats.reset()
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 100)
+    listener = MongoCommandListener()
+    _mongo_round_trip(listener, "find", {"find": "users", "filter": {"email": "a@example.com"}, "$db": "db"}, 500)
+    _mongo_round_trip(listener, "find", {"find": "users", "filter": {"email": "b@example.com"}, "$db": "db"}, 150_000, 2)
+    top = mongo_command_stats.top()
+    assert top[0]["fingerprint"] == 'find users {"filter": {"email": "?"}}'
+    assert top[0]["count"] == 2
+    assert top[0]["max_ms"] == 150
+    assert [record.fingerprint for record in warnings if "Slow Mongo" in record.getMessage()] == [top[0]["fingerprint"]]
+
+
+def test_admin_endpoint_lists_top_queries(engine, client, admin_headers):
+    with engine.connect() as connection:
+        connection.execute(text("SELECT id FROM users"))
+
+    body = client.get("/api/admin/queries", params={"order_by": "count", "limit": 1}, headers=admin_headers).json()
+    assert len(body["sql"]) == 1
+    assert body["mongo"] == []
+
+    assert client.delete("/api/admin/queries", headers=admin_headers).status_code == 204
+    assert client.get("/api/admin/queries", headers=admin_headers).json()["sql"] == []
+
+
+# Negative Test Cases
+
+def test_failed_statements_are_counted(engine):
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing_table"))
+    top = sql_query_stats.top()
+    assert top[0]["fingerprint"] == "SELECT * FROM missing_table"
+    assert top[0]["errors"] == 1
+
+
+def test_query_stats_require_admin(client, admin_headers, user_headers):
+    assert client.get("/api/admin/queries", headers=user_headers).status_code == 403
+    assert client.delete("/api/admin/queries", headers=user_headers).status_code == 403
+    assert client.get("/api/admin/queries", params={"order_by": "fingerprint"}, headers=admin_headers).status_code == 422
+
+
+def test_handshake_commands_are_ignored():
+    mongo_command_stats.reset()
+    _mongo_round_trip(MongoCommandListener(), "hello", {"hello": 1, "$db": "admin"}, 100)
+    assert mongo_command_stats.top() == []
+
+
+# Edge Test Cases
+
+@pytest.mark.parametrize("statement, expected", [
+    ("SELECT * FROM users WHERE id IN (?, ?, ?)", "SELECT * FROM users WHERE id IN (?, ...)"),
+    ("INSERT INTO users (name, email) VALUES ($1, $2), ($3, $4)", "INSERT INTO users (name, email) VALUES (?, ...), ..."),
+    ("SELECT *\n  FROM users\n WHERE email = %(email_1)s", "SELECT * FROM users WHERE email = ?"),
+    ("SELECT * FROM users WHERE name = 'O''Brien' AND role::text = 'admin'", "SELECT * FROM users WHERE name = ? AND role::text = ?"),
+    ("SELECT users_1.id FROM users AS users_1 LIMIT 10 OFFSET 20", "SELECT users_1.id FROM users AS users_1 LIMIT ? OFFSET ?"),
+])
+def test_sql_fingerprints(statement, expected):
+    assert fingerprint_sql(statement) == expected
+
+
+def test_mongo_fingerprint_keeps_operators_and_drops_values():
+    command = {
+        "update": "users",
+        "updates": [{"q": {"_id": 1}, "u": {"$set": {"name": "x"}}}, {"q": {"_id": 2}, "u": {"$set": {"name": "y"}}}],
+        "ordered": True,
+        "lsid": {"id": "abc"},
+    }
+    assert fingerprint_mongo("update", command) == 'update users {"updates": {"q": {"_id": "?"}, "u": {"$set": {"name": "?"}}}}'
+
+
+# Corner Test Cases
+
+def test_fingerprints_beyond_the_limit_are_grouped():
+    stats = QueryStats(size=2, samples=10)
+    for statement in ("a", "b", "c", "d"):
+        stats.record(statement, 0.001)
+    assert {row["fingerprint"] for row in stats.top()} == {"a", "b", OTHER}
+    assert next(row for row in stats.top() if row["fingerprint"] == OTHER)["count"] == 2
+
+
+def test_percentiles_use_recent_samples_only():
+    stats = QueryStats(size=10, samples=3)
+    for seconds in (1.0, 0.001, 0.002, 0.003):
+        stats.record("q", seconds)
+    row = stats.top()[0]
+    assert row["max_ms"] == 1000
+    assert row["p99_ms"] == 3
@@ -0,0 +1,139 @@
+import gzip
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.middleware.compression import CODECS, CompressionMiddleware, negotiate, no_compression
+
+BODY = "user@example.com," * 1000
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse(BODY)
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("tiny")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(10):
+                yield BODY
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    @app.get("/opted-out")
+    @no_compression
+    async def opted_out():
+        return PlainTextResponse(BODY)
+
+    @app.get("/precompressed")
+    async def precompressed():
+        return PlainTextResponse(gzip.compress(BODY.encode()), headers={"Content-Encoding": "gzip"})
+
+    @app.get("/binary")
+    async def binary():
+        return PlainTextResponse(BODY, media_type="image/png")
+
+    return TestClient(app)
+
+
+# Positive Test Cases
+
+def test_large_response_is_gzipped(client):
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(BODY)
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.text == BODY
+
+
+@pytest.mark.parametrize("encoding", sorted(CODECS))
+def test_every_available_codec_round_trips(client, encoding):
+    response = client.get("/large", headers={"Accept-Encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert response.text == BODY
+
+
+def test_streaming_response_is_compressed(client):
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == BODY * 10
+
+
+def sample(name, encoding="gzip"):
+    return REGISTRY.get_sample_value(name, {"encoding": encoding}) or 0.0
+
+
+def test_metrics_record_ratio_and_time(client):
+    before = {
+        name: sample(name)
+        for name in (
+            "http_compression_input_bytes_total", "http_compression_output_bytes_total",
+            "http_compression_ratio_count", "http_compression_duration_seconds_count",
+        )
+    }
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    raw = sample("http_compression_input_bytes_total") - before["http_compression_input_bytes_total"]
+    compressed = sample("http_compression_output_bytes_total") - before["http_compression_output_bytes_total"]
+    assert raw == len(BODY)
+    assert compressed == int(response.headers["content-length"])
+    assert sample("http_compression_ratio_count") == before["http_compression_ratio_count"] + 1
+    assert sample("http_compression_duration_seconds_count") == before["http_compression_duration_seconds_count"] + 1
+
+
+def test_metrics_are_on_the_metrics_endpoint(client):
+    from app.main import app
+
+    client.get("/large", headers={"Accept-Encoding": "gzip"})
+    body = TestClient(app).get("/metrics").text
+    assert 'http_compression_ratio_bucket{encoding="gzip"' in body
+    assert 'http_compression_duration_seconds_count{encoding="gzip"}' in body
+
+
+# Negative Test Cases
+
+def test_small_response_is_not_compressed(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_opted_out_route_is_not_compressed(client):
+    response = client.get("/opted-out", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_identity_client_gets_plain_body(client):
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+
+# Edge Test Cases
+
+def test_precompressed_response_is_untouched(client):
+    response = client.get("/precompressed", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == BODY
+
+
+def test_binary_content_type_is_not_compressed(client):
+    response = client.get("/binary", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+# Corner Test Cases
+
+def test_negotiation_honours_q_values_then_preference():
+    assert negotiate("gzip;q=0.5, br;q=0.9", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate("gzip, br", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate("*;q=0.1, zstd;q=0", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate("br;q=0", ["br"]) is None
+    assert negotiate("", ["gzip"]) is None
@@ -0,0 +1,157 @@
+import pytest
+from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from pymongo import monitoring
+from sqlalchemy import create_engine, text
+from app.api.endpoints import metrics as metrics_endpoint
+from app.core.metrics import MongoPoolListener, instrument_engine
+from app.middleware.metrics import MetricsMiddleware
+from app.utils.jwt import create_access_token, verify_access_token
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_endpoint.router)
+    router = APIRouter()
+
+    @router.get("/{item_id}")
+    async def read_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404, detail="missing")
+        return {"id": item_id}
+
+    @app.get("/in-flight")
+    async def in_flight():
+        return {
+            "in_flight": sample("http_requests_in_flight", route="/in-flight"),
+            "items": sample("http_requests_in_flight", route="/items/{item_id}"),
+        }
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app.include_router(router, prefix="/items")
+
+    inner = APIRouter()
+
+    @inner.get("/{name}/in-flight")
+    async def nested_in_flight(name: str):
+        return {"in_flight": sample("http_requests_in_flight", route="/outer/inner/{name}/in-flight")}
+
+    outer = APIRouter()
+    outer.include_router(inner, prefix="/inner")
+    app.include_router(outer, prefix="/outer")
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+# Positive Test Cases
+
+def test_requests_are_labelled_by_route_template(client):
+    before = sample("http_requests_total", method="GET", route="/items/{item_id}", status="2xx")
+    client.get("/items/1")
+    client.get("/items/2")
+    after = sample("http_requests_total", method="GET", route="/items/{item_id}", status="2xx")
+    assert after - before == 2
+    assert sample("http_request_duration_seconds_count", method="GET", route="/items/{item_id}") >= 2
+    assert sample("http_requests_in_flight", route="/items/{item_id}") == 0
+
+
+def test_metrics_endpoint_exposes_samples(client):
+    client.get("/items/1")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="GET",route="/items/{item_id}",status="2xx"}' in response.text
+
+
+def test_engine_pool_is_instrumented(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=2, max_overflow=1)
+    instrument_engine(engine, "test_pool")
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        assert sample("db_pool_checked_out", engine="test_pool") == 1
+        assert sample("db_pool_size", engine="test_pool") == 2
+    assert sample("db_pool_checked_out", engine="test_pool") == 0
+    assert sample("db_pool_checkout_wait_seconds_count", engine="test_pool") == 1
+    engine.dispose()
+
+
+def test_jwt_verification_outcomes_are_timed():
+    token = create_access_token({"user_id": 1, "marker": "metrics"})
+    decoded = sample("jwt_verify_duration_seconds_count", outcome="decoded")
+    cached = sample("jwt_verify_duration_seconds_count", outcome="cached")
+    verify_access_token(token)
+    verify_access_token(token)
+    assert sample("jwt_verify_duration_seconds_count", outcome="decoded") == decoded + 1
+    assert sample("jwt_verify_duration_seconds_count", outcome="cached") == cached + 1
+
+
+# Negative Test Cases
+
+def test_error_statuses_are_counted_by_class(client):
+    not_found = sample("http_requests_total", method="GET", route="/items/{item_id}", status="4xx")
+    errors = sample("http_requests_total", method="GET", route="/boom", status="5xx")
+    client.get("/items/0")
+    client.get("/boom")
+    assert sample("http_requests_total", method="GET", route="/items/{item_id}", status="4xx") == not_found + 1
+    assert sample("http_requests_total", method="GET", route="/boom", status="5xx") == errors + 1
+    assert sample("http_requests_in_flight", route="/boom") == 0
+
+
+def test_invalid_jwt_is_timed():
+    before = sample("jwt_verify_duration_seconds_count", outcome="invalid")
+    with pytest.raises(ValueError):
+        verify_access_token("not-a-token")
+    assert sample("jwt_verify_duration_seconds_count", outcome="invalid") == before + 1
+
+
+# Edge Test Cases
+
+def test_unknown_paths_share_one_label(client):
+    before = sample("http_requests_total", method="GET", route="unmatched", status="4xx")
+    client.get("/nope/1")
+    client.get("/nope/2")
+    assert sample("http_requests_total", method="GET", route="unmatched", status="4xx") == before + 2
+    assert sample("http_requests_in_flight", route="unmatched") == 0
+
+
+def test_wrong_method_uses_the_route_template(client):
+    before = sample("http_requests_total", method="POST", route="/items/{item_id}", status="4xx")
+    assert client.post("/items/1").status_code == 405
+    assert sample("http_requests_total", method="POST", route="/items/{item_id}", status="4xx") == before + 1
+
+
+def test_in_flight_counts_the_current_request_by_route(client):
+    assert client.get("/in-flight").json() == {"in_flight": 1, "items": 0}
+    assert sample("http_requests_in_flight", route="/in-flight") == 0
+
+
+def test_in_flight_resolves_nested_router_prefixes(client):
+    assert client.get("/outer/inner/x/in-flight").json() == {"in_flight": 1}
+    assert sample("http_requests_in_flight", route="/outer/inner/{name}/in-flight") == 0
+
+
+# Corner Test Cases
+
+def test_mongo_pool_listener_tracks_checkouts():
+    listener = MongoPoolListener()
+    address = ("localhost", 27017)
+    connections = sample("mongo_pool_connections")
+    waits = sample("mongo_pool_checkout_wait_seconds_count")
+    listener.connection_created(monitoring.ConnectionCreatedEvent(address, 1))
+    listener.connection_checked_out(monitoring.ConnectionCheckedOutEvent(address, 1, 0.002))
+    assert sample("mongo_pool_checked_out") == 1
+    listener.connection_checked_in(monitoring.ConnectionCheckedInEvent(address, 1))
+    listener.connection_closed(monitoring.ConnectionClosedEvent(address, 1, "stale"))
+    assert sample("mongo_pool_checked_out") == 0
+    assert sample("mongo_pool_connections") == connections
+    assert sample("mongo_pool_checkout_wait_seconds_count") == waits + 1
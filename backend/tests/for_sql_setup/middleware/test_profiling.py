@@ -0,0 +1,130 @@
+import time
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+from app.api.endpoints import admin
+from app.core.config import settings
+from app.core.context import timed
+from app.db.models import User
+from app.middleware.profiling import ProfilingMiddleware, confirm_profile_request
+from app.middleware.request_context import RequestContextMiddleware
+from app.utils.profiling import StackSampler, list_report_ids, save_report
+
+
+def blocking_query():
+    time.sleep(0.05)
+
+
+@pytest.fixture
+def make_client(bind_repository):
+    def make(sample_rate=0.0):
+        app = FastAPI(dependencies=[Depends(confirm_profile_request)])
+        app.add_middleware(ProfilingMiddleware, sample_rate=sample_rate, interval=0.001)
+        app.add_middleware(RequestContextMiddleware)
+        app.include_router(admin.router, prefix="/api/admin")
+
+        @app.get("/slow")
+        async def slow():
+            with timed("db"):
+                await run_in_threadpool(blocking_query)
+            return {"ok": True}
+
+        return TestClient(bind_repository(app))
+
+    return make
+
+
+@pytest.fixture(autouse=True)
+def profiles_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILING_MAX_REPORTS", 3)
+
+
+# Positive Test Cases
+
+def test_admin_request_with_header_is_profiled(make_client, admin_headers):
+    client = make_client()
+    response = client.get("/slow", headers={**admin_headers, "X-Profile": "1", "X-Request-ID": "prof-1"})
+    profile_id = response.headers["x-profile-id"]
+
+    reports = client.get("/api/admin/profiles", headers=admin_headers).json()
+    assert reports[0]["id"] == profile_id
+    assert reports[0]["request_id"] == "prof-1"
+    assert reports[0]["path"] == "/slow"
+    assert reports[0]["phases_ms"]["db"] >= 50
+    assert reports[0]["samples"] > 0
+
+    folded = client.get(f"/api/admin/profiles/{profile_id}", headers=admin_headers).text
+    assert "blocking_query" in folded
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded.splitlines())
+
+
+def test_sample_rate_profiles_without_header(make_client):
+    client = make_client(sample_rate=1.0)
+    assert "x-profile-id" in client.get("/slow").headers
+
+
+# Negative Test Cases
+
+def test_header_from_non_admin_is_ignored(make_client, user_headers):
+    client = make_client()
+    assert "x-profile-id" not in client.get("/slow", headers={**user_headers, "X-Profile": "1"}).headers
+    assert "x-profile-id" not in client.get("/slow", headers={"X-Profile": "1"}).headers
+    assert list_report_ids() == []
+
+
+def test_header_from_demoted_admin_is_ignored(make_client, admin_headers, db):
+    admin = db.query(User).filter(User.email == "admin@example.com").one()
+    admin.role = "user"  # The token still claims admin
+    db.commit()
+    client = make_client()
+    response = client.get("/slow", headers={**admin_headers, "X-Profile": "1"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert list_report_ids() == []
+
+
+def test_header_from_deleted_admin_is_ignored(make_client, admin_headers, db):
+    db.delete(db.query(User).filter(User.email == "admin@example.com").one())
+    db.commit()
+    client = make_client()
+    response = client.get("/slow", headers={**admin_headers, "X-Profile": "1"})
+    assert response.status_code == 200  # The profiled route itself needs no token
+    assert "x-profile-id" not in response.headers
+    assert list_report_ids() == []
+
+
+def test_profiles_require_admin(make_client, user_headers):
+    client = make_client()
+    assert client.get("/api/admin/profiles", headers=user_headers).status_code == 403
+    assert client.get("/api/admin/profiles").status_code == 401
+
+
+def test_unknown_profile_is_not_found(make_client, admin_headers):
+    client = make_client()
+    assert client.get(f"/api/admin/profiles/{'0' * 32}", headers=admin_headers).status_code == 404
+    assert client.get("/api/admin/profiles/..%2Fsecrets", headers=admin_headers).status_code in (404, 422)
+
+
+# Edge Test Cases
+
+def test_old_reports_are_pruned():
+    for index in range(5):
+        save_report(f"{index:032x}", {"id": f"{index:032x}"}, "event loop;main 1\n")
+        time.sleep(0.01)
+    assert list_report_ids() == [f"{index:032x}" for index in (4, 3, 2)]
+
+
+def test_header_set_to_zero_is_ignored(make_client, admin_headers):
+    client = make_client()
+    assert "x-profile-id" not in client.get("/slow", headers={**admin_headers, "X-Profile": "0"}).headers
+
+
+# Corner Test Cases
+
+def test_sampler_skips_idle_worker_threads():
+    sampler = StackSampler(0.001, loop_thread=0)
+    sampler.sample()
+    assert sampler.samples == 1
+    assert all(not stack.startswith("event loop") for stack in sampler.stacks)
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from app.core.context import PhaseTimings, get_request_id, phase_timings_var, timed
+from app.core.logging import RequestIdFilter
+from app.middleware.request_context import RequestContextMiddleware, server_timing
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/echo")
+    async def echo():
+        with timed("db"):
+            await asyncio.sleep(0.01)
+        with timed("serialize"):
+            pass
+        return {"request_id": get_request_id()}
+
+    @app.get("/nested")
+    async def nested():
+        with timed("db"):
+            with timed("db"):
+                await asyncio.sleep(0.01)
+        return {}
+
+    @app.get("/fail")
+    async def fail():
+        raise HTTPException(status_code=404, detail="missing")
+
+    return TestClient(app)
+
+
+def _phases(response):
+    entries = [entry.strip().split(";dur=") for entry in response.headers["server-timing"].split(",")]
+    return {name: float(duration) for name, duration in entries}
+
+
+# Positive Test Cases
+
+def test_incoming_request_id_is_propagated(client):
+    response = client.get("/echo", headers={"X-Request-ID": "abc-123"})
+    assert response.headers["x-request-id"] == "abc-123"
+    assert response.json()["request_id"] == "abc-123"
+
+
+def test_request_id_is_generated_when_missing(client):
+    response = client.get("/echo")
+    request_id = response.headers["x-request-id"]
+    assert len(request_id) == 32
+    assert response.json()["request_id"] == request_id
+
+
+def test_server_timing_reports_phases(client):
+    phases = _phases(client.get("/echo"))
+    assert set(phases) == {"db", "serialize", "total"}
+    assert phases["db"] >= 10
+    assert phases["total"] >= phases["db"]
+
+
+def test_request_id_filter_stamps_records():
+    record = logging.makeLogRecord({"msg": "hello"})
+    assert RequestIdFilter().filter(record)
+    assert record.request_id == "-"
+    explicit = logging.makeLogRecord({"msg": "hello", "request_id": "given"})
+    RequestIdFilter().filter(explicit)
+    assert explicit.request_id == "given"
+
+
+# Negative Test Cases
+
+def test_invalid_request_id_is_replaced(client):
+    response = client.get("/echo", headers={"X-Request-ID": "bad id\twith spaces"})
+    assert response.headers["x-request-id"] != "bad id\twith spaces"
+    assert len(response.headers["x-request-id"]) == 32
+
+
+def test_error_responses_carry_request_id(client):
+    response = client.get("/fail", headers={"X-Request-ID": "trace-1"})
+    assert response.status_code == 404
+    assert response.headers["x-request-id"] == "trace-1"
+
+
+# Edge Test Cases
+
+def test_overlong_request_id_is_replaced(client):
+    response = client.get("/echo", headers={"X-Request-ID": "a" * 129})
+    assert response.headers["x-request-id"] != "a" * 129
+
+
+def test_nested_phase_is_counted_once(client):
+    phases = _phases(client.get("/nested"))
+    assert 10 <= phases["db"] <= phases["total"]
+
+
+# Corner Test Cases
+
+def test_timed_outside_a_request_is_a_noop():
+    with timed("db"):
+        pass
+    assert phase_timings_var.get() is None
+    assert get_request_id() == "-"
+
+
+def test_server_timing_without_phases():
+    assert server_timing(PhaseTimings(), 0.0015) == "total;dur=1.50"
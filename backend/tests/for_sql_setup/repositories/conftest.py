@@ -0,0 +1,44 @@
+"""
+Fixtures for repository tests: a private in-memory database per test.
+
+Repositories are exercised directly rather than through the app, so these
+replace the shared `db` with a session on a fresh SQLite database. Test
+modules seed it with their own rows.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.models import Base
+
+
+@pytest.fixture(scope="function")
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def db(engine):
+    session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="function")
+def statements(engine):
+    """
+    Records every SQL statement sent to the database.
+    """
+    executed = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", _record)
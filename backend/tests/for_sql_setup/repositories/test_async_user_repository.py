@@ -0,0 +1,177 @@
+import asyncio
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from app.db.models import Base, User
+from app.repositories.user_sql_async import AsyncUserSQLRepository
+from app.schemas.user import UserFilter
+
+
+def seed_users(count):
+    return [
+        User(name=f"User {i}", email=f"async{i}@example.com", hashed_password="hashed", role="admin" if i == 0 else "user")
+        for i in range(count)
+    ]
+
+
+def run(scenario, seed=()):
+    """
+    Run `scenario(repo, statements)` against a fresh in-memory aiosqlite database holding `seed`.
+
+    `statements` records every SQL statement the scenario sends.
+    """
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with async_sessionmaker(engine, autoflush=False, expire_on_commit=False)() as db:
+                db.add_all(seed)
+                await db.commit()
+                event.listen(engine.sync_engine, "before_cursor_execute", _record)
+                return await scenario(AsyncUserSQLRepository(db), statements)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+# Positive Test Cases
+
+def test_get_by_id_and_email():
+    async def scenario(repo, statements):
+        by_id = await repo.get_by_id(1)
+        by_email = await repo.get_by_email("ASYNC1@example.com")
+        return by_id.email, by_email.id, len(statements)
+
+    assert run(scenario, seed_users(2)) == ("async0@example.com", 2, 2)
+
+
+def test_list_and_count():
+    async def scenario(repo, statements):
+        page = await repo.get_all(limit=2)
+        after = await repo.get_all(limit=10, after_id=page[-1].id)
+        admins = await repo.count(exact_below=100, filters=UserFilter(role="admin"))
+        total = await repo.count(exact_below=100)
+        return [user.id for user in page], [user.id for user in after], admins, total
+
+    page, after, admins, total = run(scenario, seed_users(5))
+    assert page == [1, 2]
+    assert after == [3, 4, 5]
+    assert admins == (1, True)
+    assert total == (5, True)
+
+
+def test_create_is_single_statement():
+    async def scenario(repo, statements):
+        created = await repo.create(
+            {"name": " New User ", "email": "New@Example.com", "hashed_password": "hashed", "role": "user"}
+        )
+        return created, statements
+
+    created, statements = run(scenario)
+    assert (created.name, created.email, created.token_version) == ("New User", "new@example.com", 0)
+    assert created.id is not None and created.created_at is not None
+    assert len(statements) == 1
+    assert statements[0].startswith("INSERT") and "ON CONFLICT" in statements[0] and "RETURNING" in statements[0]
+
+
+def test_create_many_is_single_statement():
+    async def scenario(repo, statements):
+        created = await repo.create_many([
+            {"name": "First", "email": "first@example.com", "hashed_password": "hashed"},
+            {"name": "Second", "email": "second@example.com", "hashed_password": "hashed"},
+        ])
+        return created, len(statements), await repo.db.scalar(select(func.count(User.id)))
+
+    created, sent, stored = run(scenario)
+    assert set(created) == {"first@example.com", "second@example.com"}
+    assert sent == 1
+    assert stored == 2
+
+
+def test_update_and_delete_use_returning():
+    async def scenario(repo, statements):
+        updated = await repo.update(1, {"name": "New Name", "role": "admin"})
+        deleted = await repo.delete(1)
+        return updated, deleted, statements
+
+    updated, deleted, statements = run(scenario, seed_users(2)[1:])
+    assert (updated.name, updated.role, updated.token_version) == ("New Name", "admin", 1)
+    assert deleted is True
+    assert len(statements) == 2
+    assert statements[0].startswith("UPDATE") and "RETURNING" in statements[0]
+    assert statements[1].startswith("DELETE") and "RETURNING" in statements[1]
+
+
+def test_iter_all_streams_every_user_once():
+    async def scenario(repo, statements):
+        return [user.id async for user in repo.iter_all(batch_size=2)]
+
+    assert run(scenario, seed_users(5)) == [1, 2, 3, 4, 5]
+
+
+# Negative Test Cases
+
+def test_create_duplicate_email_returns_none():
+    async def scenario(repo, statements):
+        duplicate = await repo.create({"name": "Other", "email": "ASYNC0@example.com", "hashed_password": "hashed"})
+        return duplicate, await repo.db.scalar(select(func.count(User.id)))
+
+    assert run(scenario, seed_users(1)) == (None, 1)
+
+
+def test_create_many_skips_existing_emails():
+    async def scenario(repo, statements):
+        return await repo.create_many([
+            {"name": "Taken", "email": "async0@example.com", "hashed_password": "hashed"},
+            {"name": "Free", "email": "free@example.com", "hashed_password": "hashed"},
+        ])
+
+    assert list(run(scenario, seed_users(1))) == ["free@example.com"]
+
+
+def test_missing_user_is_none_or_false():
+    async def scenario(repo, statements):
+        return await repo.get_by_id(9999), await repo.update(9999, {"name": "Nobody"}), await repo.delete(9999)
+
+    assert run(scenario) == (None, None, False)
+
+
+# Edge Test Cases
+
+def test_get_existing_emails():
+    async def scenario(repo, statements):
+        return await repo.get_existing_emails(["async1@example.com", "new@example.com"]), await repo.get_existing_emails([])
+
+    assert run(scenario, seed_users(2)) == ({"async1@example.com"}, set())
+
+
+def test_update_with_no_changes_reads_user():
+    async def scenario(repo, statements):
+        return (await repo.update(1, {"name": None})).id, statements
+
+    user_id, statements = run(scenario, seed_users(1))
+    assert user_id == 1
+    assert len(statements) == 1 and statements[0].startswith("SELECT")
+
+
+# Corner Test Cases
+
+def test_create_many_of_nothing_sends_nothing():
+    async def scenario(repo, statements):
+        return await repo.create_many([]), statements
+
+    assert run(scenario) == ({}, [])
+
+
+def test_iter_all_of_an_empty_table():
+    async def scenario(repo, statements):
+        return [user async for user in repo.iter_all()]
+
+    assert run(scenario) == []
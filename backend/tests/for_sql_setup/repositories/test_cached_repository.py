@@ -0,0 +1,125 @@
+import asyncio
+import time
+import pytest
+from app.db.models import User
+from app.repositories.cached import (
+    CachedUserRepository,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    user_cache_stats,
+)
+from app.repositories.user_sql import UserSQLRepository
+
+
+class FakeRedis:
+    """
+    Stands in for a Redis server: string values with millisecond expiry.
+    """
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        value, expires = self.store.get(key, (None, None))
+        if expires is not None and expires <= time.monotonic():
+            self.store.pop(key, None)
+            return None
+        return value.encode() if value is not None else None
+
+    async def set(self, key, value, px=None):
+        self.store[key] = (value, time.monotonic() + px / 1000 if px else None)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+
+@pytest.fixture(scope="function")
+def user(db):
+    user = User(name="Cached User", email="cached@example.com", hashed_password="hashed", role="user")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture(scope="function", params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        return MemoryCacheBackend(maxsize=100)
+    return RedisCacheBackend(FakeRedis())
+
+
+@pytest.fixture(scope="function")
+def repo(db, backend):
+    return CachedUserRepository(UserSQLRepository(db), backend)
+
+
+# Positive Test Cases
+
+def test_get_by_id_is_served_from_cache(repo, user, statements):
+    first = asyncio.run(repo.get_by_id(user.id))
+    second = asyncio.run(repo.get_by_id(user.id))
+    assert first == second and second.email == "cached@example.com"
+    assert len(statements) == 1
+
+
+def test_update_invalidates_entry(repo, user):
+    asyncio.run(repo.get_by_id(user.id))
+    asyncio.run(repo.update(user.id, {"name": "Renamed"}))
+    assert asyncio.run(repo.get_by_id(user.id)).name == "Renamed"
+
+
+def test_delete_invalidates_entry(repo, user):
+    asyncio.run(repo.get_by_id(user.id))
+    assert asyncio.run(repo.delete(user.id)) is True
+    assert asyncio.run(repo.get_by_id(user.id)) is None
+
+
+def test_hit_ratio_is_reported(repo, user):
+    before = user_cache_stats.snapshot()
+    asyncio.run(repo.get_by_id(user.id))
+    asyncio.run(repo.get_by_id(user.id))
+    after = user_cache_stats.snapshot()
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 1
+    assert 0.0 < after["hit_ratio"] <= 1.0
+
+
+# Negative Test Cases
+
+def test_missing_id_is_cached_briefly(repo, statements):
+    assert asyncio.run(repo.get_by_id(404)) is None
+    assert asyncio.run(repo.get_by_id(404)) is None
+    assert len(statements) == 1
+
+
+def test_create_clears_negative_email_entry(repo):
+    assert asyncio.run(repo.get_by_email("later@example.com")) is None
+    asyncio.run(repo.create({"name": "Later", "email": "later@example.com", "hashed_password": "hashed", "role": "user"}))
+    assert asyncio.run(repo.get_by_email("later@example.com")).email == "later@example.com"
+
+
+# Edge Test Cases
+
+def test_cache_never_holds_password_hash(repo, user, backend):
+    found = asyncio.run(repo.get_by_email(user.email))
+    assert found.hashed_password == "hashed"  # Sign-in still gets the hash from the database
+    cached = asyncio.run(repo.get_by_id(user.id))
+    assert not hasattr(cached, "hashed_password")
+    raw = asyncio.run(backend.get(f"id:{user.id}"))
+    assert "hashed" not in raw
+
+
+def test_get_by_email_always_reads_through(repo, user, statements):
+    asyncio.run(repo.get_by_email(user.email))
+    asyncio.run(repo.get_by_email(user.email))
+    assert len(statements) == 2
+
+
+# Corner Test Cases
+
+def test_role_change_is_visible_with_new_token_version(repo, user):
+    before = asyncio.run(repo.get_by_id(user.id))
+    asyncio.run(repo.update(user.id, {"role": "admin"}))
+    after = asyncio.run(repo.get_by_id(user.id))
+    assert after.role == "admin" and after.token_version == before.token_version + 1
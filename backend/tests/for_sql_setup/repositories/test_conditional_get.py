@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from starlette.requests import Request
+from app.db.models import User
+from app.repositories.user_sql import UserSQLRepository
+from app.utils.http_cache import is_not_modified, last_modified, make_etag, validator_headers
+
+
+def make_request(**headers):
+    raw = [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+@pytest.fixture(scope="function", autouse=True)
+def users(db):
+    for i in range(3):
+        db.add(User(name=f"User {i}", email=f"etag{i}@example.com", hashed_password="hashed", role="user"))
+    db.commit()
+
+
+STAMP = datetime(2024, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+
+
+# Positive Test Cases
+
+def test_version_query_selects_only_updated_at(db, statements):
+    assert UserSQLRepository(db).get_version(1) is not None
+    assert len(statements) == 1
+    assert statements[0].split()[:4] == ["SELECT", "users.updated_at", "FROM", "users"]
+
+
+def test_page_versions_match_get_all(db, statements):
+    repo = UserSQLRepository(db)
+    versions = repo.get_page_versions(limit=2, after_id=1)
+    assert [id for id, _, _ in versions] == [user.id for user in repo.get_all(limit=2, after_id=1)]
+    assert statements[0].split()[:3] == ["SELECT", "users.id,", "users.updated_at,"]
+
+
+def test_matching_etag_is_not_modified():
+    etag = make_etag([(1, STAMP)])
+    assert is_not_modified(make_request(if_none_match=etag), etag, STAMP)
+    assert is_not_modified(make_request(if_none_match=f'"other", W/{etag}'), etag, STAMP)
+
+
+def test_if_modified_since_uses_second_resolution():
+    headers = validator_headers(make_etag([(1, STAMP)]), STAMP)
+    assert is_not_modified(make_request(if_modified_since=headers["Last-Modified"]), '"x"', STAMP)
+
+
+# Negative Test Cases
+
+def test_changed_row_changes_etag():
+    assert make_etag([(1, STAMP)]) != make_etag([(1, STAMP + timedelta(microseconds=1))])
+
+
+def test_stale_etag_is_modified():
+    assert not is_not_modified(make_request(if_none_match='"stale"'), make_etag([(1, STAMP)]), STAMP)
+
+
+def test_missing_user_has_no_version(db):
+    assert UserSQLRepository(db).get_version(404) is None
+
+
+# Edge Test Cases
+
+def test_if_none_match_takes_precedence():
+    request = make_request(if_none_match='"stale"', if_modified_since="Wed, 01 May 2030 00:00:00 GMT")
+    assert not is_not_modified(request, make_etag([(1, STAMP)]), STAMP)
+
+
+def test_page_membership_changes_etag():
+    assert make_etag([(1, STAMP), (2, STAMP)]) != make_etag([(1, STAMP), (3, STAMP)])
+
+
+# Corner Test Cases
+
+def test_naive_timestamps_are_treated_as_utc():
+    naive = STAMP.replace(tzinfo=None)
+    assert make_etag([(1, naive)]) == make_etag([(1, STAMP)])
+    assert last_modified([(1, naive), (2, None)]) == STAMP
+
+
+def test_malformed_date_is_ignored():
+    assert not is_not_modified(make_request(if_modified_since="yesterday"), '"x"', STAMP)
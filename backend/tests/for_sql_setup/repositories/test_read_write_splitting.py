@@ -0,0 +1,139 @@
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+from app.db import routing
+from app.db.models import Base, User
+from app.db.session import choose_read_engine
+from app.repositories.user_sql import UserSQLRepository
+from app.utils.cache import TTLCache
+from app.utils.jwt import create_access_token
+
+
+@pytest.fixture(scope="function")
+def engines(tmp_path):
+    """
+    Two SQLite files standing in for a primary and a read replica.
+    """
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for engine in (primary, replica):
+        Base.metadata.create_all(bind=engine)
+    yield primary, replica
+    primary.dispose()
+    replica.dispose()
+
+
+@pytest.fixture(scope="function")
+def sessions(engines):
+    primary, replica = engines
+    make_session = sessionmaker(autoflush=False, expire_on_commit=False)
+    write_db, read_db = make_session(bind=primary), make_session(bind=replica)
+    yield write_db, read_db
+    write_db.close()
+    read_db.close()
+
+
+@pytest.fixture(scope="function")
+def sticky_window(monkeypatch):
+    monkeypatch.setattr(routing, "READ_URLS", ["sqlite:///replica.db"])
+    monkeypatch.setattr(routing, "_recent_writers", TTLCache(maxsize=100, ttl=60))
+
+
+def make_request(ip="10.0.0.1", token=None, cookie=None):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    if cookie is not None:
+        headers.append((b"cookie", f"{routing.READ_YOUR_WRITES_COOKIE}={cookie}".encode()))
+    return Request({"type": "http", "headers": headers, "client": (ip, 1234)})
+
+
+# Positive Test Cases
+
+def test_writes_go_to_primary(sessions):
+    write_db, read_db = sessions
+    created = UserSQLRepository(write_db, read_db).create(
+        {"name": "Primary", "email": "primary@example.com", "hashed_password": "hashed"}
+    )
+    assert write_db.get(User, created.id) is not None
+    assert read_db.get(User, created.id) is None
+
+
+def test_reads_go_to_replica(sessions):
+    write_db, read_db = sessions
+    read_db.add(User(name="Replica Only", email="replica@example.com", hashed_password="hashed"))
+    read_db.commit()
+    repo = UserSQLRepository(write_db, read_db)
+    assert repo.get_by_email("replica@example.com").name == "Replica Only"
+    assert [user.email for user in repo.get_all()] == ["replica@example.com"]
+    assert repo.get_existing_emails(["replica@example.com"]) == {"replica@example.com"}
+
+
+def test_without_replica_reads_use_primary(sessions):
+    write_db, _ = sessions
+    repo = UserSQLRepository(write_db, None)
+    created = repo.create({"name": "Solo", "email": "solo@example.com", "hashed_password": "hashed"})
+    assert repo.get_by_id(created.id).email == "solo@example.com"
+
+
+def test_recent_writer_reads_from_primary(sticky_window):
+    token = create_access_token({"user_id": 42, "role": "user"})
+    routing.mark_recent_write(make_request(ip="10.0.0.9"), 42)
+    assert routing.reads_from_primary(make_request(ip="10.0.0.5", token=token))
+
+
+def test_writer_is_keyed_on_the_token(sticky_window):
+    token = create_access_token({"user_id": 42, "role": "user"})
+    routing.mark_recent_write(make_request(token=token))
+    assert routing.reads_from_primary(make_request(ip="10.0.0.5", token=token))
+
+
+def test_signup_cookie_pins_the_following_signin(sticky_window, test_client):
+    response = test_client.post("/api/users/", json={"name": "New", "email": "new@example.com", "password": "password"})
+    assert response.status_code == 201
+    cookie = response.cookies[routing.READ_YOUR_WRITES_COOKIE]
+    assert routing.reads_from_primary(make_request(cookie=cookie))
+
+
+# Negative Test Cases
+
+def test_other_callers_read_from_replica(sticky_window):
+    routing.mark_recent_write(make_request(ip="10.0.0.9"), 42)
+    other_token = create_access_token({"user_id": 7, "role": "user"})
+    assert not routing.reads_from_primary(make_request(ip="10.0.0.5", token=other_token))
+
+
+def test_callers_sharing_an_address_are_not_pinned(sticky_window):
+    routing.mark_recent_write(make_request(ip="10.0.0.9"), 42)
+    other_token = create_access_token({"user_id": 7, "role": "user"})
+    assert not routing.reads_from_primary(make_request(ip="10.0.0.9", token=other_token))
+    assert not routing.reads_from_primary(make_request(ip="10.0.0.9"))
+
+
+def test_no_cookie_without_replicas(test_client):
+    response = test_client.post("/api/users/", json={"name": "New", "email": "new@example.com", "password": "password"})
+    assert routing.READ_YOUR_WRITES_COOKIE not in response.cookies
+
+
+def test_invalid_token_is_ignored_for_routing(sticky_window):
+    assert not routing.reads_from_primary(make_request(token="not-a-jwt"))
+
+
+# Edge Test Cases
+
+def test_sticky_window_expires(monkeypatch):
+    monkeypatch.setattr(routing, "READ_URLS", ["sqlite:///replica.db"])
+    monkeypatch.setattr(routing, "_recent_writers", TTLCache(maxsize=100, ttl=0))
+    routing.mark_recent_write(make_request(ip="10.0.0.9"), 42)
+    assert not routing.reads_from_primary(make_request(ip="10.0.0.9"))
+
+
+def test_expired_or_malformed_cookie_is_ignored(sticky_window):
+    assert not routing.reads_from_primary(make_request(cookie=f"{time.time() - 1:.3f}"))
+    assert not routing.reads_from_primary(make_request(cookie="soon"))
+
+
+def test_weighted_replica_selection(engines):
+    primary, replica = engines
+    picks = {choose_read_engine([primary, replica], [0, 1]) for _ in range(20)}
+    assert picks == {replica}
@@ -0,0 +1,48 @@
+import asyncio
+import pytest
+from app.db.models import User
+from app.repositories.user_sql import UserSQLRepository, estimated_count_statement
+from app.utils.counts import count_cache, invalidate_user_count, total_users
+
+
+@pytest.fixture(scope="function", autouse=True)
+def users(db):
+    for i in range(3):
+        db.add(User(name=f"User {i}", email=f"count{i}@example.com", hashed_password="hashed", role="user"))
+    db.commit()
+    count_cache.clear()
+
+
+# Positive Test Cases
+
+def test_small_table_is_counted_exactly(db):
+    assert UserSQLRepository(db).count(exact_below=100) == (3, True)
+
+
+def test_total_is_cached_between_requests(db, statements):
+    repo = UserSQLRepository(db)
+    assert asyncio.run(total_users(repo)) == (3, True)
+    assert asyncio.run(total_users(repo)) == (3, True)
+    assert len(statements) == 1
+
+
+# Negative Test Cases
+
+def test_invalidation_forces_a_recount(db, statements):
+    repo = UserSQLRepository(db)
+    asyncio.run(total_users(repo))
+    invalidate_user_count()
+    asyncio.run(total_users(repo))
+    assert len(statements) == 2
+
+
+# Edge Test Cases
+
+def test_postgres_reads_the_planner_estimate():
+    assert "reltuples" in str(estimated_count_statement("postgresql"))
+
+
+# Corner Test Cases
+
+def test_dialects_without_estimates_count_exactly():
+    assert estimated_count_statement("sqlite") is None
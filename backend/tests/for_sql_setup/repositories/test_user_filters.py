@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy.dialects import postgresql
+from app.db.models import User
+from app.repositories.user_sql import UserSQLRepository, list_users_query
+from app.schemas.user import UserFilter
+
+NAMES = ["Alice", "alfred", "Al_x", "Bob", "bobby", "Carol"]
+
+
+@pytest.fixture(scope="function", autouse=True)
+def users(db):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i, name in enumerate(NAMES):
+        db.add(User(
+            name=name, email=f"{name.lower()}{i}@example.com", hashed_password="hashed",
+            role="admin" if i % 2 else "user", created_at=start + timedelta(days=i),
+        ))
+    db.commit()
+
+
+def query_plan(engine, filters, after_id=None, after_key=None) -> str:
+    """
+    SQLite's EXPLAIN QUERY PLAN for the list query, one step per line.
+    """
+    compiled = list_users_query(0, 100, after_id, filters, after_key).compile(bind=engine)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def names(db, **filters):
+    return [user.name for user in UserSQLRepository(db).get_all(filters=UserFilter(**filters))]
+
+
+# Positive Test Cases
+
+def test_filters_by_role_and_created_at_range(db):
+    assert names(
+        db, role="admin",
+        created_after=datetime(2024, 1, 2, tzinfo=timezone.utc),
+        created_before=datetime(2024, 1, 6, tzinfo=timezone.utc),
+    ) == ["alfred", "Bob"]
+
+
+def test_name_prefix_is_case_insensitive(db):
+    assert names(db, name="AL") == ["Alice", "alfred", "Al_x"]
+
+
+def test_substring_match(db):
+    assert names(db, email="ob", match="contains") == ["Bob", "bobby"]
+
+
+def test_sort_descending(db):
+    assert names(db, sort="-created_at") == list(reversed(NAMES))
+
+
+def test_role_and_created_at_use_compound_index(engine, db):
+    plan = query_plan(engine, UserFilter(role="admin", created_after=datetime(2024, 1, 2), sort="created_at"))
+    assert "ix_users_role_created_at" in plan
+    assert "TEMP B-TREE" not in plan  # Ordered by the index itself
+
+
+@pytest.mark.parametrize("sort, index", [("created_at", "ix_users_created_at"), ("-name", "ix_users_name")])
+def test_sorts_are_index_backed(engine, db, sort, index):
+    plan = query_plan(engine, UserFilter(sort=sort))
+    assert index in plan and "TEMP B-TREE" not in plan
+
+
+# Negative Test Cases
+
+def test_no_match_returns_empty_page(db):
+    assert names(db, name="zed") == []
+
+
+def test_wildcards_in_search_are_literal(db):
+    assert names(db, name="al_") == ["Al_x"]
+    assert names(db, email="%", match="contains") == []
+
+
+# Edge Test Cases
+
+def test_keyset_pages_cover_every_row_once(db):
+    repo = UserSQLRepository(db)
+    filters = UserFilter(sort="-name")
+    seen, after_id, after_key = [], None, None
+    while True:
+        page = repo.get_all(limit=2, after_id=after_id, filters=filters, after_key=after_key)
+        if not page:
+            break
+        seen += [user.name for user in page]
+        after_id, after_key = page[-1].id, page[-1].name
+    assert seen == sorted(NAMES, reverse=True)
+
+
+def test_keyset_position_uses_index(engine, db):
+    plan = query_plan(engine, UserFilter(sort="created_at"), after_id=2, after_key=datetime(2024, 1, 2))
+    assert "ix_users_created_at" in plan
+
+
+# Corner Test Cases
+
+def test_text_search_matches_trigram_indexes_on_postgres():
+    sql = str(list_users_query(0, 10, None, UserFilter(name="al", email="bo", match="contains"), None)
+              .compile(dialect=postgresql.dialect()))
+    assert "users.name ILIKE" in sql and "users.email LIKE" in sql
+    trigram = {index.name: index for index in User.__table__.indexes if index.name.endswith("_trgm")}
+    assert set(trigram) == {"ix_users_name_trgm", "ix_users_email_trgm"}
+    assert all(index.dialect_options["postgresql"]["using"] == "gin" for index in trigram.values())
+
+
+def test_filtered_count_is_capped(db):
+    repo = UserSQLRepository(db)
+    assert repo.count(exact_below=100, filters=UserFilter(role="admin")) == (3, True)
+    assert repo.count(exact_below=2, filters=UserFilter(role="admin")) == (2, False)
@@ -0,0 +1,84 @@
+import pytest
+from app.db.models import User
+from app.repositories.user_sql import UserSQLRepository
+
+
+@pytest.fixture(scope="function")
+def user(db):
+    user = User(name="Test User", email="writes@example.com", hashed_password="hashed", role="user")
+    db.add(user)
+    db.commit()
+    return user
+
+
+# Positive Test Cases
+
+def test_create_is_single_statement(db, statements):
+    created = UserSQLRepository(db).create(
+        {"name": " New User ", "email": "New@Example.com", "hashed_password": "hashed", "role": "user"}
+    )
+    assert (created.name, created.email, created.token_version) == ("New User", "new@example.com", 0)
+    assert created.id is not None and created.created_at is not None
+    assert len(statements) == 1
+    assert statements[0].startswith("INSERT") and "ON CONFLICT" in statements[0] and "RETURNING" in statements[0]
+
+
+def test_update_is_single_statement(db, user, statements):
+    updated = UserSQLRepository(db).update(user.id, {"name": "New Name"})
+    assert updated.name == "New Name"
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE") and "RETURNING" in statements[0]
+
+
+def test_update_result_usable_after_commit(db, user, statements):
+    updated = UserSQLRepository(db).update(user.id, {"email": "  New@Example.com "})
+    assert (updated.email, updated.role, updated.created_at is not None) == ("new@example.com", "user", True)
+    assert len(statements) == 1
+
+
+def test_update_role_change_bumps_token_version(db, user, statements):
+    updated = UserSQLRepository(db).update(user.id, {"role": "admin"})
+    assert updated.role == "admin"
+    assert updated.token_version == 1
+    assert len(statements) == 1
+
+
+def test_delete_is_single_statement(db, user, statements):
+    assert UserSQLRepository(db).delete(user.id) is True
+    assert len(statements) == 1
+    assert statements[0].startswith("DELETE") and "RETURNING" in statements[0]
+
+
+# Negative Test Cases
+
+def test_create_duplicate_email_returns_none(db, user, statements):
+    duplicate = UserSQLRepository(db).create(
+        {"name": "Other", "email": "WRITES@example.com", "hashed_password": "hashed"}
+    )
+    assert duplicate is None
+    assert len(statements) == 1
+    assert db.query(User).count() == 1
+
+
+def test_update_nonexistent_user(db, statements):
+    assert UserSQLRepository(db).update(9999, {"name": "Nobody"}) is None
+    assert len(statements) == 1
+
+
+def test_delete_nonexistent_user(db, statements):
+    assert UserSQLRepository(db).delete(9999) is False
+    assert len(statements) == 1
+
+
+# Edge Test Cases
+
+def test_update_same_role_keeps_token_version(db, user):
+    updated = UserSQLRepository(db).update(user.id, {"role": "user"})
+    assert updated.token_version == 0
+
+
+def test_update_with_no_changes_reads_user(db, user, statements):
+    updated = UserSQLRepository(db).update(user.id, {"name": None})
+    assert updated.id == user.id
+    assert len(statements) == 1
+    assert statements[0].startswith("SELECT")
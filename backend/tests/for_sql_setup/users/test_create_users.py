@@ -1,42 +1,12 @@
 import pytest
-import httpx
 from sqlalchemy.orm import Session
-from app.deps import get_db
 from app.crud import user as user_crud
 from app.schemas.user import UserCreate
 from app.db.models import User
+from app.api.endpoints import users as users_endpoint
+from app.repositories.user_sql import UserSQLRepository
 
-BASE_URL = "http://localhost:8000/api/users"
-
-
-@pytest.fixture(scope="session")
-def db() -> Session:
-    """
-    Provide a single DB session for the whole test session.
-    """
-    yield next(get_db())
-
-
-@pytest.fixture(scope="session", autouse=True)
-def clean_database(db: Session):
-    """
-    Before all tests: clean the database.
-    After all tests: clean the database.
-    """
-    db.query(User).delete()
-    db.commit()
-    yield
-    db.query(User).delete()
-    db.commit()
-
-
-@pytest.fixture(scope="module")
-def test_client():
-    """
-    HTTP client for tests.
-    """
-    with httpx.Client(base_url=BASE_URL) as client:
-        yield client
+USERS_URL = "/api/users/"
 
 
 @pytest.fixture(scope="function")
@@ -55,7 +25,7 @@ def cleanup_user(db: Session):
 
 def test_create_valid_user(test_client, cleanup_user):
     payload = {"name": "John Doe", "email": "john@example.com", "password": "securepassword"}
-    response = test_client.post("/", json=payload)
+    response = test_client.post(USERS_URL, json=payload)
     assert response.status_code == 201
     data = response.json()
     assert data["email"] == "john@example.com"
@@ -67,7 +37,7 @@ def test_create_valid_user(test_client, cleanup_user):
 def test_create_user_max_name_length(test_client, cleanup_user):
     name = "a" * 255
     payload = {"name": name, "email": "maxname@example.com", "password": "securepassword"}
-    response = test_client.post("/", json=payload)
+    response = test_client.post(USERS_URL, json=payload)
     assert response.status_code == 201
     data = response.json()
     assert data["name"] == name
@@ -77,7 +47,7 @@ def test_create_user_max_name_length(test_client, cleanup_user):
 
 def test_create_user_special_chars_in_name(test_client, cleanup_user):
     payload = {"name": "John_Doe!", "email": "special@example.com", "password": "securepassword"}
-    response = test_client.post("/", json=payload)
+    response = test_client.post(USERS_URL, json=payload)
     assert response.status_code == 201
     data = response.json()
     assert data["name"] == "John_Doe!"
@@ -90,7 +60,7 @@ def test_create_user_special_chars_in_name(test_client, cleanup_user):
 def test_create_user_duplicate_email(test_client, db):
     user_crud.create_user(db, UserCreate(name="Duplicate", email="dup@example.com", password="password"))
     payload = {"name": "Duplicate2", "email": "dup@example.com", "password": "password"}
-    response = test_client.post("/", json=payload)
+    response = test_client.post(USERS_URL, json=payload)
     assert response.status_code == 400
     data = response.json()
     assert data["detail"] == "Email already registered."
@@ -99,29 +69,44 @@ def test_create_user_duplicate_email(test_client, db):
         user_crud.delete_user(db, user)
 
 
+def test_create_user_duplicate_email_skips_hashing(test_client, db, monkeypatch):
+    user_crud.create_user(db, UserCreate(name="Taken", email="taken@example.com", password="password"))
+    hashed = []
+
+    async def recording_hash(password):
+        hashed.append(password)
+        return "hashed"
+
+    monkeypatch.setattr(users_endpoint, "hash_password_async", recording_hash)
+    payload = {"name": "Taken2", "email": "TAKEN@example.com", "password": "password"}
+    response = test_client.post(USERS_URL, json=payload)
+    assert response.status_code == 400
+    assert hashed == []  # Rejected by the index lookup before bcrypt
+
+
 def test_create_user_missing_name(test_client):
     payload = {"email": "noname@example.com", "password": "password"}
-    response = test_client.post("/", json=payload)
+    response = test_client.post(USERS_URL, json=payload)
     assert response.status_code == 422
     assert "detail" in response.json()
 
 
 def test_create_user_invalid_email(test_client):
     payload = {"name": "InvalidEmail", "email": "invalid-email", "password": "password"}
-    response = test_client.post("/", json=payload)
+    response = test_client.post(USERS_URL, json=payload)
     assert response.status_code == 422
     assert "detail" in response.json()
 
 
 def test_create_user_short_password(test_client):
     payload = {"name": "ShortPass", "email": "shortpass@example.com", "password": "pw"}
-    response = test_client.post("/", json=payload)
+    response = test_client.post(USERS_URL, json=payload)
     assert response.status_code == 422
     assert "detail" in response.json()
 
 
 def test_create_user_empty_body(test_client):
-    response = test_client.post("/", json={})
+    response = test_client.post(USERS_URL, json={})
     assert response.status_code == 422
     assert "detail" in response.json()
 
@@ -131,7 +116,7 @@ def test_create_user_empty_body(test_client):
 def test_create_user_edge_max_name_length(test_client, cleanup_user):
     name = "a" * 255
     payload = {"name": name, "email": "edge_max_name@example.com", "password": "password"}
-    response = test_client.post("/", json=payload)
+    response = test_client.post(USERS_URL, json=payload)
     assert response.status_code == 201
     data = response.json()
     assert data["name"] == name
@@ -142,7 +127,7 @@ def test_create_user_edge_max_name_length(test_client, cleanup_user):
 def test_create_user_edge_max_email_length(test_client, cleanup_user):
     long_email = f"{'a'*64}@{'b'*63}.com"
     payload = {"name": "EdgeEmail", "email": long_email, "password": "password"}
-    response = test_client.post("/", json=payload)
+    response = test_client.post(USERS_URL, json=payload)
     assert response.status_code == 201
     data = response.json()
     assert data["email"] == long_email
@@ -152,7 +137,7 @@ def test_create_user_edge_max_email_length(test_client, cleanup_user):
 
 def test_create_user_edge_min_password_length(test_client, cleanup_user):
     payload = {"name": "MinPass", "email": "minpass@example.com", "password": "password"}
-    response = test_client.post("/", json=payload)
+    response = test_client.post(USERS_URL, json=payload)
     assert response.status_code == 201
     data = response.json()
     assert data["email"] == "minpass@example.com"
@@ -162,7 +147,7 @@ def test_create_user_edge_min_password_length(test_client, cleanup_user):
 
 def test_create_user_edge_max_password_length(test_client, cleanup_user):
     payload = {"name": "MaxPass", "email": "maxpass@example.com", "password": "p" * 128}
-    response = test_client.post("/", json=payload)
+    response = test_client.post(USERS_URL, json=payload)
     assert response.status_code == 201
     data = response.json()
     assert data["email"] == "maxpass@example.com"
@@ -174,14 +159,14 @@ def test_create_user_edge_max_password_length(test_client, cleanup_user):
 
 def test_create_user_name_only_spaces(test_client):
     payload = {"name": " ", "email": "spaces@example.com", "password": "password"}
-    response = test_client.post("/", json=payload)
+    response = test_client.post(USERS_URL, json=payload)
     assert response.status_code == 422
     assert "detail" in response.json()
 
 
 def test_create_user_uppercase_email(test_client, cleanup_user):
     payload = {"name": "UpperCaseEmail", "email": "USER@EMAIL.COM", "password": "password"}
-    response = test_client.post("/", json=payload)
+    response = test_client.post(USERS_URL, json=payload)
     assert response.status_code == 201
     data = response.json()
     assert data["email"] == "USER@EMAIL.COM".lower()
@@ -191,16 +176,27 @@ def test_create_user_uppercase_email(test_client, cleanup_user):
 
 def test_create_user_password_only_spaces(test_client):
     payload = {"name": "SpacesPass", "email": "spacespass@example.com", "password": " "}
-    response = test_client.post("/", json=payload)
+    response = test_client.post(USERS_URL, json=payload)
     assert response.status_code == 422
     assert "detail" in response.json()
 
 
 def test_create_user_unicode_name(test_client, cleanup_user):
     payload = {"name": "测试用户", "email": "unicode@example.com", "password": "password"}
-    response = test_client.post("/", json=payload)
+    response = test_client.post(USERS_URL, json=payload)
     assert response.status_code == 201
     data = response.json()
     assert data["email"] == "unicode@example.com"
     assert data["name"] == "测试用户"
     cleanup_user("unicode@example.com")
+
+
+def test_create_user_lost_race_is_rejected(test_client, db, monkeypatch):
+    user_crud.create_user(db, UserCreate(name="Winner", email="race@example.com", password="password"))
+    # The pre-check ran before the competing signup committed; the insert settles it
+    monkeypatch.setattr(UserSQLRepository, "get_existing_emails", lambda self, emails: set())
+    payload = {"name": "Loser", "email": "race@example.com", "password": "password"}
+    response = test_client.post(USERS_URL, json=payload)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered."
+    assert db.query(User).filter(User.email == "race@example.com").one().name == "Winner"
@@ -0,0 +1,111 @@
+import pytest
+from app.api.endpoints import users as users_endpoint
+from app.db.models import User
+from app.utils.pagination import encode_cursor
+
+USERS_URL = "/api/users/"
+
+
+@pytest.fixture(scope="function")
+def five_users(db):
+    users = [User(name=f"User {i}", email=f"page{i}@example.com", hashed_password="x", role="user") for i in range(5)]
+    db.add_all(users)
+    db.commit()
+    return [user.id for user in users]
+
+
+def ids(response):
+    return [user["id"] for user in response.json()]
+
+
+# Positive Test Cases
+
+def test_cursor_walks_every_page_once(test_client, five_users):
+    seen, params = [], {"limit": 2}
+    while True:
+        response = test_client.get(USERS_URL, params=params)
+        assert response.status_code == 200
+        seen += ids(response)
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params = {"limit": 2, "cursor": response.headers["X-Next-Cursor"]}
+    assert seen == five_users
+
+
+def test_cursor_overrides_skip(test_client, five_users):
+    cursor = encode_cursor({"id": five_users[1]})
+    response = test_client.get(USERS_URL, params={"cursor": cursor, "skip": 3})
+    assert ids(response) == five_users[2:]
+
+
+@pytest.mark.parametrize("sort", ["created_at", "-created_at", "name", "-email"])
+def test_cursor_walks_every_page_in_sort_order(test_client, five_users, sort):
+    first = test_client.get(USERS_URL, params={"limit": 2, "sort": sort})
+    rest = test_client.get(USERS_URL, params={"limit": 10, "sort": sort, "cursor": first.headers["X-Next-Cursor"]})
+    everything = test_client.get(USERS_URL, params={"limit": 10, "sort": sort})
+    assert rest.status_code == 200
+    assert ids(first) + ids(rest) == ids(everything)
+
+
+# Negative Test Cases
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    encode_cursor({"id": {"a": 1}}),
+    encode_cursor({"id": [1, 2]}),
+    encode_cursor({"id": "1"}),
+    encode_cursor({"id": True}),
+    encode_cursor({"id": None}),
+    encode_cursor({"key": 1}),
+])
+def test_tampered_cursor_is_rejected(test_client, five_users, cursor):
+    response = test_client.get(USERS_URL, params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor."
+
+
+def test_cursor_from_another_sort_is_rejected(test_client, five_users):
+    cursor = test_client.get(USERS_URL, params={"limit": 2, "sort": "name"}).headers["X-Next-Cursor"]
+    response = test_client.get(USERS_URL, params={"cursor": cursor})
+    assert response.status_code == 400
+    response = test_client.get(USERS_URL, params={"cursor": cursor, "sort": "-name"})
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("values", [
+    {"sort": "created_at", "key": 5, "id": 1},
+    {"sort": "created_at", "key": "yesterday", "id": 1},
+    {"sort": "created_at", "id": 1},
+    {"sort": "name", "key": ["User 1"], "id": 1},
+    {"sort": "name", "key": None, "id": 1},
+])
+def test_cursor_with_a_bad_sort_key_is_rejected(test_client, five_users, values):
+    response = test_client.get(USERS_URL, params={"cursor": encode_cursor(values), "sort": values["sort"]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor."
+
+
+# Edge Test Cases
+
+def test_full_last_page_links_to_an_empty_one(test_client, five_users):
+    response = test_client.get(USERS_URL, params={"limit": 5})
+    assert ids(response) == five_users
+    last = test_client.get(USERS_URL, params={"limit": 5, "cursor": response.headers["X-Next-Cursor"]})
+    assert last.status_code == 200
+    assert last.json() == []
+    assert "X-Next-Cursor" not in last.headers
+
+
+def test_short_page_has_no_next_link(test_client, five_users):
+    response = test_client.get(USERS_URL, params={"limit": 10})
+    assert len(response.json()) == 5
+    assert "X-Next-Cursor" not in response.headers
+
+
+# Corner Test Cases
+
+def test_mongo_cursor_ids_must_be_object_ids(monkeypatch):
+    monkeypatch.setattr(users_endpoint.settings, "DB_TYPE", "nosql")
+    assert users_endpoint.valid_cursor_id("65f1c0ffee0ddba11ca7f00d")
+    assert not users_endpoint.valid_cursor_id("not-an-object-id")
+    assert not users_endpoint.valid_cursor_id(1)
+
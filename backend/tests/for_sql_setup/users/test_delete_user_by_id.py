@@ -1,27 +1,12 @@
 import pytest
-import httpx
 from app.db.models import User
 from app.crud import user as user_crud
 from app.schemas.user import UserCreate
-from app.deps import get_db
-from sqlalchemy.orm import Session
 
-BASE_URL = "http://localhost:8000"
 USERS_URL = "/api/users"
 SIGNIN_URL = "/auth/signin"
 
 
-@pytest.fixture(scope="session")
-def db():
-    yield next(get_db())
-
-
-@pytest.fixture(scope="module")
-def test_client():
-    with httpx.Client(base_url=BASE_URL) as client:
-        yield client
-
-
 @pytest.fixture(scope="function")
 def create_user(db):
     def _create(name, email, password, role="user"):
@@ -133,5 +118,5 @@ def test_delete_deleted_user(test_client, create_user, signin, db):
 def test_delete_user_id_with_spaces(test_client, signin):
     token, _ = signin("spaces@example.com", "password")
     headers = {"Authorization": f"Bearer {token}"}
-    response = test_client.delete(f"{USERS_URL}/%20%201%20%20", headers=headers)
+    response = test_client.delete(f"{USERS_URL}/%20%209999%20%20", headers=headers)
     assert response.status_code == 404
@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+from functools import partial
+import pytest
+from app.api.endpoints import users as users_endpoint
+from app.db.models import User
+from app.repositories.user_sql import UserSQLRepository
+from app.utils.export import EXPORT_FIELDS, encode_rows
+
+EXPORT_URL = "/api/users/export"
+
+
+@pytest.fixture(scope="function")
+def exported_users(db, admin_headers):
+    db.add_all(
+        User(name=f"Export, User {i}", email=f"export{i}@example.com", hashed_password="x", role="user")
+        for i in range(7)
+    )
+    db.commit()
+    return {user.email for user in db.query(User)}  # Includes the admin
+
+
+@pytest.fixture(scope="function")
+def small_batches(monkeypatch):
+    """
+    Read in yield_per batches of 2 rows and flush a chunk per row, so a few users span many of both.
+    """
+    calls = []
+    iter_all = UserSQLRepository.iter_all
+
+    def small_iter_all(self, batch_size=1000):
+        calls.append(batch_size)
+        return iter_all(self, batch_size=2)
+
+    monkeypatch.setattr(UserSQLRepository, "iter_all", small_iter_all)
+    monkeypatch.setattr(users_endpoint, "encode_rows", partial(encode_rows, chunk_size=1))
+    return calls
+
+
+# Positive Test Cases
+
+def test_export_ndjson(test_client, admin_headers, exported_users):
+    response = test_client.get(EXPORT_URL, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="users.ndjson"'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert {row["email"] for row in rows} == exported_users
+    assert all("hashed_password" not in row for row in rows)
+
+
+def test_export_csv(test_client, admin_headers, exported_users):
+    response = test_client.get(EXPORT_URL, params={"format": "csv"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="users.csv"'
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == EXPORT_FIELDS
+    assert {row[EXPORT_FIELDS.index("email")] for row in rows} == exported_users
+    assert "Export, User 0" in {row[EXPORT_FIELDS.index("name")] for row in rows}  # Quoted, not split
+
+
+# Negative Test Cases
+
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+def test_export_requires_admin(test_client, user_headers, format):
+    response = test_client.get(EXPORT_URL, params={"format": format}, headers=user_headers)
+    assert response.status_code == 403
+
+
+def test_export_requires_a_token(test_client):
+    assert test_client.get(EXPORT_URL).status_code == 401
+
+
+def test_export_rejects_unknown_format(test_client, admin_headers):
+    assert test_client.get(EXPORT_URL, params={"format": "xml"}, headers=admin_headers).status_code == 422
+
+
+# Edge Test Cases
+
+def test_every_row_once_across_batches_ndjson(test_client, admin_headers, exported_users, small_batches):
+    response = test_client.get(EXPORT_URL, headers=admin_headers)
+    ids = [json.loads(line)["id"] for line in response.text.splitlines()]
+    assert len(small_batches) == 1  # One streamed query, not one per batch
+    assert len(ids) == len(exported_users) == 8
+    assert ids == sorted(set(ids))
+
+
+def test_every_row_once_across_batches_csv(test_client, admin_headers, exported_users, small_batches):
+    response = test_client.get(EXPORT_URL, params={"format": "csv"}, headers=admin_headers)
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    ids = [int(row[EXPORT_FIELDS.index("id")]) for row in rows]
+    assert header == EXPORT_FIELDS
+    assert len(ids) == len(exported_users)
+    assert ids == sorted(set(ids))
+
+
+# Corner Test Cases
+
+def test_export_of_only_the_admin_csv_is_header_and_one_row(test_client, admin_headers):
+    response = test_client.get(EXPORT_URL, params={"format": "csv"}, headers=admin_headers)
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == EXPORT_FIELDS
+    assert [row[EXPORT_FIELDS.index("email")] for row in rows] == ["admin@example.com"]
@@ -1,23 +1,11 @@
 import pytest
-import httpx
 from app.db.models import User
 from app.crud import user as user_crud
 from app.schemas.user import UserCreate
-from app.deps import get_db
-from sqlalchemy.orm import Session
 
-BASE_URL = "http://localhost:8000"
 USERS_URL = "/api/users"
 SIGNIN_URL = "/auth/signin"
 
-@pytest.fixture(scope="session")
-def db():
-    yield next(get_db())
-
-@pytest.fixture(scope="module")
-def test_client():
-    with httpx.Client(base_url=BASE_URL) as client:
-        yield client
 
 @pytest.fixture(scope="function")
 def create_user(db):
@@ -64,8 +52,8 @@ def test_get_existing_user_by_valid_user_id(test_client, create_user):
 
 
 def test_get_user_with_max_user_id(test_client, db, signin):
-    max_id = db.query(User).order_by(User.id.desc()).first().id
     token, _ = signin("maxid@example.com", "password")
+    max_id = db.query(User).order_by(User.id.desc()).first().id
     headers = {"Authorization": f"Bearer {token}"}
     response = test_client.get(f"{USERS_URL}/{max_id}", headers=headers)
     assert response.status_code == 200
@@ -1,30 +1,11 @@
 import pytest
-import httpx
 from app.db.models import User
 from app.crud import user as user_crud
 from app.schemas.user import UserCreate
-from app.deps import get_db
-from sqlalchemy.orm import Session
 
-BASE_URL = "http://localhost:8000"
 USERS_URL = "/api/users/"
 
 
-@pytest.fixture(scope="session")
-def db():
-    yield next(get_db())
-
-
-@pytest.fixture(scope="session", autouse=True)
-def clean_database(db: Session):
-    """ BeforeAll and AfterAll: Clean database """
-    db.query(User).delete()
-    db.commit()
-    yield
-    db.query(User).delete()
-    db.commit()
-
-
 @pytest.fixture(scope="function")
 def create_test_user(db):
     """ Create a user """
@@ -45,12 +26,6 @@ def cleanup_users(db):
     return _cleanup
 
 
-@pytest.fixture(scope="module")
-def test_client():
-    with httpx.Client(base_url=BASE_URL) as client:
-        yield client
-
-
 # Positive Test Cases
 
 def test_get_all_users(test_client, create_test_user, cleanup_users):
@@ -78,6 +53,16 @@ def test_get_users_when_no_users_exist(test_client, cleanup_users):
     assert response.json() == []
 
 
+def test_get_users_total_count_follows_writes(test_client, admin_headers):
+    before = int(test_client.get(USERS_URL).headers["X-Total-Count"])
+    assert int(test_client.get(USERS_URL).headers["X-Total-Count"]) == before  # Served from the count cache
+    created = test_client.post(USERS_URL, json={"name": "Counted", "email": "counted@example.com", "password": "password"})
+    assert created.status_code == 201
+    assert int(test_client.get(USERS_URL).headers["X-Total-Count"]) == before + 1
+    assert test_client.delete(f"{USERS_URL}{created.json()['id']}", headers=admin_headers).status_code == 204
+    assert int(test_client.get(USERS_URL).headers["X-Total-Count"]) == before
+
+
 # Negative Test Cases
 
 def test_get_users_invalid_skip(test_client):
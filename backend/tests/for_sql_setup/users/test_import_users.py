@@ -0,0 +1,177 @@
+import asyncio
+import json
+import pytest
+from app.api.endpoints import users as users_endpoint
+from app.db.models import User
+from app.repositories.user_sql import UserSQLRepository
+from app.utils.importer import ImportDecodeError, iter_import_batches
+from app.utils.security import verify_password
+
+IMPORT_URL = "/api/users/import"
+
+
+def ndjson(*rows):
+    return "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows) + "\n"
+
+
+def row(i, **overrides):
+    return {"name": f"Imported {i}", "email": f"import{i}@example.com", "password": "password", **overrides}
+
+
+def post(test_client, headers, body, format="ndjson"):
+    content_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return test_client.post(
+        IMPORT_URL, params={"format": format}, content=body,
+        headers={**headers, "Content-Type": content_type},
+    )
+
+
+def statuses(response):
+    return [(result["line"], result["status"]) for result in response.json()["results"]]
+
+
+@pytest.fixture(scope="function")
+def create_many_calls(monkeypatch):
+    """
+    Record the rows handed to each multi-row insert.
+    """
+    calls = []
+    create_many = UserSQLRepository.create_many
+
+    def recording_create_many(self, objs):
+        calls.append([obj["email"] for obj in objs])
+        return create_many(self, objs)
+
+    monkeypatch.setattr(UserSQLRepository, "create_many", recording_create_many)
+    return calls
+
+
+# Positive Test Cases
+
+def test_import_ndjson(test_client, db, admin_headers):
+    response = post(test_client, admin_headers, ndjson(row(1), row(2, role="admin")))
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["duplicates"], body["invalid"]) == (2, 0, 0)
+    assert statuses(response) == [(1, "created"), (2, "created")]
+    stored = db.query(User).filter(User.email == "import2@example.com").one()
+    assert body["results"][1]["id"] == stored.id
+    assert stored.role == "admin"
+    assert verify_password("password", stored.hashed_password)
+
+
+def test_import_csv(test_client, db, admin_headers):
+    body = "name,email,password\r\nImported 1,import1@example.com,password\r\n\"Imported, 2\",IMPORT2@example.com,password\r\n"
+    response = post(test_client, admin_headers, body, format="csv")
+    assert response.status_code == 200
+    assert statuses(response) == [(2, "created"), (3, "created")]  # Line 1 is the header
+    assert db.query(User).filter(User.email == "import2@example.com").one().name == "Imported, 2"
+
+
+def test_import_csv_quoted_field_spanning_lines(test_client, db, admin_headers):
+    body = (
+        "name,email,password\r\n"
+        "\"Imported\r\nOne\",import1@example.com,password\r\n"
+        "Imported 2,import2@example.com,password\r\n"
+    )
+    response = post(test_client, admin_headers, body, format="csv")
+    assert statuses(response) == [(2, "created"), (4, "created")]  # Numbered by the line each row starts on
+    assert db.query(User).filter(User.email == "import1@example.com").one().name == "Imported\r\nOne"
+
+
+# Negative Test Cases
+
+def test_import_requires_admin(test_client, db, user_headers):
+    response = post(test_client, user_headers, ndjson(row(1)))
+    assert response.status_code == 403
+    assert db.query(User).filter(User.email == "import1@example.com").count() == 0
+
+
+def test_invalid_rows_are_reported_with_line_numbers(test_client, admin_headers):
+    body = ndjson(row(1), "{not json", "[1, 2]", row(4, email="not-an-email"), row(5, password="short"), row(6))
+    response = post(test_client, admin_headers, body)
+    results = response.json()["results"]
+    assert statuses(response) == [
+        (1, "created"), (2, "invalid"), (3, "invalid"), (4, "invalid"), (5, "invalid"), (6, "created"),
+    ]
+    assert results[1]["error"] == "Invalid JSON"
+    assert results[2]["error"] == "Expected a JSON object"
+    assert results[3]["error"].startswith("email:")
+    assert results[4]["error"].startswith("password:")
+    assert response.json()["invalid"] == 4
+
+
+def test_csv_row_with_wrong_column_count_is_invalid(test_client, admin_headers):
+    body = "name,email,password\nImported 1,import1@example.com\n"
+    response = post(test_client, admin_headers, body, format="csv")
+    assert statuses(response) == [(2, "invalid")]
+    assert response.json()["results"][0]["error"] == "Expected 3 columns, got 2"
+
+
+def test_duplicates_within_the_file(test_client, db, admin_headers):
+    response = post(test_client, admin_headers, ndjson(row(1), row(1, email="IMPORT1@example.com"), row(2)))
+    assert statuses(response) == [(1, "created"), (2, "duplicate"), (3, "created")]
+    assert response.json()["results"][1]["email"] == "import1@example.com"
+    assert db.query(User).filter(User.email == "import1@example.com").count() == 1
+
+
+def test_duplicates_already_in_the_database(test_client, db, admin_headers, create_many_calls):
+    response = post(test_client, admin_headers, ndjson(row(1), row(2, email="admin@example.com")))
+    assert statuses(response) == [(1, "created"), (2, "duplicate")]
+    assert create_many_calls == [["import1@example.com"]]  # Known duplicates never reach the insert
+
+
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+def test_invalid_utf8_is_rejected_with_its_line(test_client, admin_headers, format):
+    body = "name,email,password\nImported 1,import1@example.com,password\n" if format == "csv" else ndjson(row(1))
+    response = post(test_client, admin_headers, body.encode() + b"Imported \xff\n", format=format)
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"Invalid UTF-8 on line {3 if format == 'csv' else 2}."
+
+
+# Edge Test Cases
+
+def test_batch_boundary(test_client, db, admin_headers, create_many_calls, monkeypatch):
+    monkeypatch.setattr(users_endpoint.settings, "IMPORT_BATCH_SIZE", 2)
+    body = ndjson(row(1), row(2), row(3), row(1), row(4))  # The repeat of row 1 lands in the second batch
+    response = post(test_client, admin_headers, body)
+    assert statuses(response) == [(1, "created"), (2, "created"), (3, "created"), (4, "duplicate"), (5, "created")]
+    assert create_many_calls == [
+        ["import1@example.com", "import2@example.com"],
+        ["import3@example.com"],
+        ["import4@example.com"],
+    ]
+    assert db.query(User).filter(User.email.like("import%")).count() == 4
+
+
+def test_blank_lines_are_skipped_but_counted(test_client, admin_headers):
+    response = post(test_client, admin_headers, "\n" + ndjson(row(1)) + "\n\n" + ndjson(row(2)))
+    assert statuses(response) == [(2, "created"), (5, "created")]
+
+
+# Corner Test Cases
+
+def test_decode_error_line_counts_across_chunks():
+    async def chunks():
+        for chunk in (b'{"a": 1}\n{"b": "\xc3', b'\xa9"}\n', b'{"c": 3}\n\xff'):
+            yield chunk
+
+    async def drain():
+        return [batch async for batch in iter_import_batches(chunks(), "ndjson", 10)]
+
+    with pytest.raises(ImportDecodeError) as error:
+        asyncio.run(drain())
+    assert error.value.line == 4  # The split "é" on line 2 is valid
+
+
+def test_row_lost_to_a_concurrent_signup_is_a_duplicate(test_client, admin_headers, monkeypatch):
+    monkeypatch.setattr(UserSQLRepository, "get_existing_emails", lambda self, emails: set())
+    response = post(test_client, admin_headers, ndjson(row(1, email="admin@example.com"), row(2)))
+    assert statuses(response) == [(1, "duplicate"), (2, "created")]
+
+
+def test_empty_body_imports_nothing(test_client, admin_headers, create_many_calls):
+    response = post(test_client, admin_headers, "")
+    assert response.status_code == 200
+    assert response.json() == {"created": 0, "duplicates": 0, "invalid": 0, "results": []}
+    assert create_many_calls == []
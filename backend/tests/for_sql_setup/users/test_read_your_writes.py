@@ -0,0 +1,84 @@
+import json
+import pytest
+from fastapi import Depends
+from starlette.requests import Request
+from app.db import routing
+from app.db.models import User
+from app.deps import get_user_repository
+from app.utils.cache import TTLCache
+
+USERS_URL = "/api/users"
+
+
+@pytest.fixture(scope="function")
+def replicas(monkeypatch):
+    monkeypatch.setattr(routing, "READ_URLS", ["sqlite:///replica.db"])
+    monkeypatch.setattr(routing, "_recent_writers", TTLCache(maxsize=100, ttl=60))
+
+
+@pytest.fixture(scope="function")
+def pinned_reads(test_client):
+    """
+    Whether each request through the API would read from the primary.
+    """
+    pinned = []
+    bound = test_client.app.dependency_overrides[get_user_repository]
+
+    def recording_repository(request: Request, user_repo=Depends(bound)):
+        pinned.append(routing.reads_from_primary(request))
+        return user_repo
+
+    test_client.app.dependency_overrides[get_user_repository] = recording_repository
+    return pinned
+
+
+@pytest.fixture(scope="function")
+def other_user(db):
+    user = User(name="Other", email="other@example.com", hashed_password="x", role="user")
+    db.add(user)
+    db.commit()
+    return user
+
+
+# Positive Test Cases
+
+def test_update_pins_the_next_read_on_another_worker(replicas, test_client, user_headers, db, pinned_reads, monkeypatch):
+    user_id = db.query(User).filter(User.email == "user@example.com").one().id
+    response = test_client.put(f"{USERS_URL}/{user_id}", json={"name": "Renamed"}, headers=user_headers)
+    assert routing.READ_YOUR_WRITES_COOKIE in response.cookies
+    monkeypatch.setattr(routing, "_recent_writers", TTLCache(maxsize=100, ttl=60))  # The read lands elsewhere
+    assert test_client.get(f"{USERS_URL}/{user_id}", headers=user_headers).json()["name"] == "Renamed"
+    assert pinned_reads[-1]
+
+
+def test_every_write_sets_the_window_cookie(replicas, test_client, admin_headers, other_user):
+    row = {"name": "Imported", "email": "imported@example.com", "password": "password"}
+    writes = [
+        test_client.put(f"{USERS_URL}/{other_user.id}", json={"name": "Renamed"}, headers=admin_headers),
+        test_client.post(
+            f"{USERS_URL}/import", content=json.dumps(row) + "\n",
+            headers={**admin_headers, "Content-Type": "application/x-ndjson"},
+        ),
+        test_client.delete(f"{USERS_URL}/{other_user.id}", headers=admin_headers),
+    ]
+    assert [response.status_code for response in writes] == [200, 200, 204]
+    assert all(routing.READ_YOUR_WRITES_COOKIE in response.cookies for response in writes)
+
+
+# Negative Test Cases
+
+def test_without_the_cookie_another_worker_reads_the_replica(replicas, test_client, user_headers, db, pinned_reads, monkeypatch):
+    user_id = db.query(User).filter(User.email == "user@example.com").one().id
+    test_client.put(f"{USERS_URL}/{user_id}", json={"name": "Renamed"}, headers=user_headers)
+    test_client.cookies.clear()
+    monkeypatch.setattr(routing, "_recent_writers", TTLCache(maxsize=100, ttl=60))
+    test_client.get(f"{USERS_URL}/{user_id}", headers=user_headers)
+    assert not pinned_reads[-1]
+
+
+# Edge Test Cases
+
+def test_refused_write_sets_no_cookie(replicas, test_client, user_headers, other_user):
+    response = test_client.put(f"{USERS_URL}/{other_user.id}", json={"name": "Renamed"}, headers=user_headers)
+    assert response.status_code == 403
+    assert routing.READ_YOUR_WRITES_COOKIE not in response.cookies
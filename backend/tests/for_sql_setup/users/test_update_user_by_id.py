@@ -1,23 +1,11 @@
 import pytest
-import httpx
 from app.db.models import User
 from app.crud import user as user_crud
 from app.schemas.user import UserCreate
-from app.deps import get_db
-from sqlalchemy.orm import Session
 
-BASE_URL = "http://localhost:8000"
 USERS_URL = "/api/users"
 SIGNIN_URL = "/auth/signin"
 
-@pytest.fixture(scope="session")
-def db():
-    yield next(get_db())
-
-@pytest.fixture(scope="module")
-def test_client():
-    with httpx.Client(base_url=BASE_URL) as client:
-        yield client
 
 @pytest.fixture(scope="function")
 def create_user(db):
@@ -28,17 +16,6 @@ def create_user(db):
         return user_crud.create_user(db, UserCreate(name=name, email=email, password=password))
     return _create
 
-@pytest.fixture(scope="session", autouse=True)
-def clean_database(db: Session):
-    """
-    Before all tests: clean the database.
-    After all tests: clean the database.
-    """
-    db.query(User).delete()
-    db.commit()
-    yield
-    db.query(User).delete()
-    db.commit()
 
 @pytest.fixture(scope="function")
 def cleanup_user(db):
@@ -126,6 +103,25 @@ def test_update_user_unauthorized(test_client):
     assert response.status_code == 401
 
 
+def test_user_cannot_change_own_role(test_client, db, signin):
+    token, user_id = signin("own_role@example.com", "password")
+    headers = {"Authorization": f"Bearer {token}"}
+    response = test_client.put(f"{USERS_URL}/{user_id}", json={"role": "admin"}, headers=headers)
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Only admins can change roles."
+    db.expire_all()
+    assert db.get(User, user_id).role == "user"
+
+
+def test_refused_role_change_updates_nothing(test_client, db, signin):
+    token, user_id = signin("role_and_name@example.com", "password")
+    headers = {"Authorization": f"Bearer {token}"}
+    response = test_client.put(f"{USERS_URL}/{user_id}", json={"name": "Renamed", "role": "admin"}, headers=headers)
+    assert response.status_code == 403
+    db.expire_all()
+    assert db.get(User, user_id).name == "Test User"
+
+
 # Edge Test Cases
 
 def test_update_user_long_name(test_client, signin):